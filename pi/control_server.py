@@ -1,10 +1,19 @@
+import heapq
 import json
+import mmap
 import os
+import struct
+import threading
+from bisect import bisect_right
 from datetime import datetime, timedelta, timezone
 from flask import Flask, request, jsonify, Response
+from pi.status_from_ics import parse_group_sources
 
 RUNTIME_DIR = os.environ.get("STATUS_SCREEN_DIR", "/home/pi/status-screen")
 OVERRIDE_JSON_PATH = os.path.join(RUNTIME_DIR, "override.json")
+AVAILABILITY_DIR = os.path.join(RUNTIME_DIR, "availability")
+HISTORY_DIR = os.path.join(RUNTIME_DIR, "history")
+OVERRIDE_JOURNAL_PATH = os.path.join(RUNTIME_DIR, "override-journal.jsonl")
 
 def load_dotenv(dotenv_path: str):
     if not os.path.exists(dotenv_path):
@@ -34,9 +43,20 @@ def parse_env_list(key: str) -> list[str]:
     return [item.strip() for item in raw.split(",") if item.strip()]
 
 AUTH_TOKENS = parse_env_list("AUTH_TOKENS")
-ICS_URLS = parse_env_list("ICS_URLS")
 DISPLAY_NAMES = parse_env_list("DISPLAY_NAMES")
-GROUP_COUNT = len(ICS_URLS) if ICS_URLS else 1
+TIMEZONE_NAME = os.environ.get("TIMEZONE_NAME", "America/Los_Angeles")
+GROUP_COUNT = parse_group_sources()[2]
+CONTROL_HOST = os.environ.get("CONTROL_HOST", "0.0.0.0")
+CONTROL_PORT = int(os.environ.get("CONTROL_PORT", "5000"))
+OVERRIDE_JOURNAL_MAX_BYTES = int(os.environ.get("OVERRIDE_JOURNAL_MAX_BYTES", str(1024 * 1024)))
+OVERRIDE_JOURNAL_LOCK = threading.Lock()
+AVAILABILITY_MAX_DAYS = 31
+AVAILABILITY_CACHE: dict[str, tuple] = {}
+# Must match HISTORY_RECORD in status_from_ics.py.
+HISTORY_RECORD = struct.Struct("<IHHHH")
+HISTORY_PAGE_MAX = 500
+HISTORY_CHUNK_RECORDS = 1024
+HISTORY_NAMES_CACHE: dict[str, tuple] = {}
 
 app = Flask(__name__)
 
@@ -88,7 +108,9 @@ def write_override(state: str, label: str, detail: str, minutes: int, override_p
         "until": until.isoformat().replace("+00:00", "Z"),
     }
     os.makedirs(os.path.dirname(override_path), exist_ok=True)
-    tmp = override_path + ".tmp"
+    # Requests are served on several threads; a shared temp name would let one
+    # writer rename another's file out from under it.
+    tmp = f"{override_path}.{threading.get_ident()}.tmp"
     with open(tmp, "w") as f:
         json.dump(payload, f)
     os.replace(tmp, override_path)
@@ -100,6 +122,21 @@ def clear_override(override_path: str):
     except FileNotFoundError:
         pass
 
+def journal_override(group_index: int, payload: dict | None):
+    entry = {"time": now_utc().isoformat().replace("+00:00", "Z"), "group": group_index, "override": payload}
+    try:
+        with OVERRIDE_JOURNAL_LOCK:
+            # Keep one previous generation, like the status history log.
+            try:
+                if os.path.getsize(OVERRIDE_JOURNAL_PATH) >= OVERRIDE_JOURNAL_MAX_BYTES:
+                    os.replace(OVERRIDE_JOURNAL_PATH, OVERRIDE_JOURNAL_PATH + ".1")
+            except FileNotFoundError:
+                pass
+            with open(OVERRIDE_JOURNAL_PATH, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+    except OSError:
+        app.logger.exception("Failed to journal override change")
+
 @app.get("/control")
 def control_page():
     group_options = "".join(
@@ -209,7 +246,9 @@ def api_override():
     minutes = max(1, min(minutes_value, 24 * 60))
     group_index = resolve_group_index(token_index, data)
     override_path = override_path_for(group_index)
-    return jsonify(write_override(state, label, detail, minutes, override_path))
+    payload = write_override(state, label, detail, minutes, override_path)
+    journal_override(group_index, payload)
+    return jsonify(payload)
 
 @app.post("/api/clear")
 def api_clear():
@@ -220,11 +259,269 @@ def api_clear():
     group_index = resolve_group_index(token_index, data)
     override_path = override_path_for(group_index)
     clear_override(override_path)
+    journal_override(group_index, None)
     return jsonify({"ok": True})
 
+def local_timezone():
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+    try:
+        return ZoneInfo(TIMEZONE_NAME)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+def parse_request_time(value: str | None, default: datetime, tzinfo) -> datetime | None:
+    if not value:
+        return default
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=tzinfo)
+
+def resolve_requested_groups(raw: str | None) -> list[int] | None:
+    if not raw:
+        return list(range(GROUP_COUNT))
+    names = [name.lower() for name in group_display_names()]
+    indexes = []
+    for token in raw.split(","):
+        token = token.strip()
+        if not token:
+            continue
+        if token.isdigit() and int(token) < GROUP_COUNT:
+            indexes.append(int(token))
+        elif token.lower() in names:
+            indexes.append(names.index(token.lower()))
+        else:
+            return None
+    return sorted(set(indexes))
+
+def load_availability(index: int) -> dict | None:
+    path = os.path.join(AVAILABILITY_DIR, f"group-{index + 1}.json")
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = AVAILABILITY_CACHE.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    data["busy"] = [tuple(interval) for interval in data.get("busy") or []]
+    data["busy_starts"] = [start for start, _ in data["busy"]]
+    if data.get("work") is not None:
+        data["work"] = [tuple(interval) for interval in data["work"]]
+        data["work_starts"] = [start for start, _ in data["work"]]
+    AVAILABILITY_CACHE[path] = (version, data)
+    return data
+
+def clip_intervals(intervals: list, starts: list, start: float, end: float) -> list[tuple]:
+    position = max(bisect_right(starts, start) - 1, 0)
+    clipped = []
+    while position < len(intervals) and intervals[position][0] < end:
+        interval_start, interval_end = intervals[position]
+        if interval_end > start:
+            clipped.append((max(interval_start, start), min(interval_end, end)))
+        position += 1
+    return clipped
+
+def complement_intervals(intervals: list, start: float, end: float) -> list[tuple]:
+    gaps = []
+    cursor = start
+    for interval_start, interval_end in intervals:
+        if interval_start > cursor:
+            gaps.append((cursor, interval_start))
+        cursor = max(cursor, interval_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+def union_sorted_intervals(*interval_lists) -> list[tuple]:
+    merged: list[list] = []
+    for interval_start, interval_end in heapq.merge(*interval_lists):
+        if merged and interval_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], interval_end)
+        else:
+            merged.append([interval_start, interval_end])
+    return [(interval_start, interval_end) for interval_start, interval_end in merged]
+
+def group_busy_intervals(data: dict, start: float, end: float, working_hours: bool) -> list[tuple]:
+    busy = clip_intervals(data["busy"], data["busy_starts"], start, end)
+    if working_hours and data.get("work") is not None:
+        work = clip_intervals(data["work"], data["work_starts"], start, end)
+        busy = union_sorted_intervals(busy, complement_intervals(work, start, end))
+    return busy
+
+def compute_availability(
+    indexes: list[int],
+    start: float,
+    end: float,
+    min_seconds: float,
+    working_hours: bool = True,
+) -> dict:
+    groups = []
+    busy_lists = []
+    names = group_display_names()
+    for index in indexes:
+        data = load_availability(index)
+        entry = {"index": index, "name": names[index] if index < len(names) else f"Group {index + 1}"}
+        if data is None or not (data["window"][0] <= start and end <= data["window"][1]):
+            entry["error"] = "availability not published for this range"
+            groups.append(entry)
+            continue
+        busy = group_busy_intervals(data, start, end, working_hours)
+        entry["busy"] = busy
+        entry["free"] = complement_intervals(busy, start, end)
+        busy_lists.append(busy)
+        groups.append(entry)
+    common = complement_intervals(union_sorted_intervals(*busy_lists), start, end) if busy_lists else []
+    return {
+        "groups": groups,
+        "common_free": [slot for slot in common if slot[1] - slot[0] >= min_seconds],
+        "complete": len(busy_lists) == len(indexes),
+    }
+
+def format_intervals(intervals: list, tzinfo) -> list[dict]:
+    return [
+        {
+            "start": datetime.fromtimestamp(start, tzinfo).isoformat(timespec="minutes"),
+            "end": datetime.fromtimestamp(end, tzinfo).isoformat(timespec="minutes"),
+        }
+        for start, end in intervals
+    ]
+
+@app.get("/api/availability")
+def api_availability():
+    if resolve_token_index(request) is None:
+        return jsonify({"error": "unauthorized"}), 401
+    tzinfo = local_timezone()
+    now = now_utc().astimezone(tzinfo)
+    start = parse_request_time(request.args.get("start"), now, tzinfo)
+    if start is None:
+        return jsonify({"error": "invalid start"}), 400
+    end = parse_request_time(request.args.get("end"), start + timedelta(days=1), tzinfo)
+    if end is None or end <= start:
+        return jsonify({"error": "invalid end"}), 400
+    if end - start > timedelta(days=AVAILABILITY_MAX_DAYS):
+        return jsonify({"error": f"range is limited to {AVAILABILITY_MAX_DAYS} days"}), 400
+    indexes = resolve_requested_groups(request.args.get("groups"))
+    if not indexes:
+        return jsonify({"error": "unknown group"}), 400
+    try:
+        min_minutes = max(int(request.args.get("min_minutes", "30")), 0)
+    except ValueError:
+        return jsonify({"error": "invalid min_minutes"}), 400
+    working_hours = request.args.get("working_hours", "true").strip().lower() not in {"0", "false", "no", "off"}
+    result = compute_availability(indexes, start.timestamp(), end.timestamp(), min_minutes * 60, working_hours)
+    for group in result["groups"]:
+        if "busy" in group:
+            group["busy"] = format_intervals(group["busy"], tzinfo)
+            group["free"] = format_intervals(group["free"], tzinfo)
+    result["common_free"] = format_intervals(result["common_free"], tzinfo)
+    result["start"] = start.isoformat(timespec="minutes")
+    result["end"] = end.isoformat(timespec="minutes")
+    return jsonify(result)
+
+def load_history_names() -> list[str]:
+    path = os.path.join(HISTORY_DIR, "names.json")
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return [""]
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = HISTORY_NAMES_CACHE.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    try:
+        with open(path, "r") as f:
+            names = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return [""]
+    HISTORY_NAMES_CACHE[path] = (version, names)
+    return names
+
+def history_position(view, count: int, before: int) -> int:
+    low, high = 0, count
+    size = HISTORY_RECORD.size
+    while low < high:
+        middle = (low + high) // 2
+        if HISTORY_RECORD.unpack_from(view, middle * size)[0] < before:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+def read_history(groups: set[int] | None, before: int, limit: int) -> tuple[list[tuple], int | None]:
+    # Binary search for ``before``, then chunks towards older records: a page costs the same on any log size.
+    log_path = os.path.join(HISTORY_DIR, "transitions.bin")
+    size = HISTORY_RECORD.size
+    found = []
+    for path in (log_path, log_path + ".1"):
+        try:
+            with open(path, "rb") as f:
+                count = os.fstat(f.fileno()).st_size // size
+                if not count:
+                    continue
+                with mmap.mmap(f.fileno(), count * size, access=mmap.ACCESS_READ) as view:
+                    end = history_position(view, count, before)
+                    while end > 0:
+                        start = max(end - HISTORY_CHUNK_RECORDS, 0)
+                        chunk = list(HISTORY_RECORD.iter_unpack(view[start * size:end * size]))
+                        for record in reversed(chunk):
+                            if len(found) >= limit and record[0] != found[-1][0]:
+                                return found, found[-1][0]
+                            if groups is None or record[1] in groups:
+                                found.append(record)
+                        end = start
+        except FileNotFoundError:
+            continue
+    return found, None
+
+@app.get("/api/history")
+def api_history():
+    if resolve_token_index(request) is None:
+        return jsonify({"error": "unauthorized"}), 401
+    tzinfo = local_timezone()
+    now = now_utc().astimezone(tzinfo)
+    before = parse_request_time(request.args.get("before"), now + timedelta(seconds=1), tzinfo)
+    if before is None:
+        return jsonify({"error": "invalid before"}), 400
+    indexes = resolve_requested_groups(request.args.get("groups"))
+    if not indexes:
+        return jsonify({"error": "unknown group"}), 400
+    try:
+        limit = min(max(int(request.args.get("limit", "100")), 1), HISTORY_PAGE_MAX)
+    except ValueError:
+        return jsonify({"error": "invalid limit"}), 400
+    groups = None if len(indexes) == GROUP_COUNT else set(indexes)
+    records, cursor = read_history(groups, int(before.timestamp()), limit)
+    names = load_history_names()
+    display_names = group_display_names()
+
+    def name_for(position: int) -> str:
+        return names[position] if position < len(names) else ""
+
+    transitions = [
+        {
+            "time": datetime.fromtimestamp(ts, tzinfo).isoformat(timespec="seconds"),
+            "group": group,
+            "name": display_names[group] if group < len(display_names) else f"Group {group + 1}",
+            "state": name_for(state),
+            "source": name_for(source),
+            "label": name_for(label),
+        }
+        for ts, group, state, source, label in records
+    ]
+    next_before = datetime.fromtimestamp(cursor, tzinfo).isoformat(timespec="seconds") if cursor else None
+    return jsonify({"transitions": transitions, "next_before": next_before})
+
 @app.get("/api/health")
 def api_health():
     return jsonify({"ok": True})
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000)
+    app.run(host=CONTROL_HOST, port=CONTROL_PORT)
@@ -0,0 +1,445 @@
+import json
+import logging
+import os
+import socket
+import struct
+import sys
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+
+RUNTIME_DIR = os.environ.get("STATUS_SCREEN_DIR", "/home/pi/status-screen")
+STATUS_JSON_PATH = os.path.join(RUNTIME_DIR, "status.json")
+
+def load_dotenv(dotenv_path: str):
+    if not os.path.exists(dotenv_path):
+        return
+    with open(dotenv_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            k, v = line.split("=", 1)
+            k = k.strip()
+            v = v.strip().strip('"').strip("'")
+            os.environ.setdefault(k, v)
+
+load_dotenv(os.path.join(RUNTIME_DIR, ".env"))
+
+def parse_env_positive_int(key: str, default: int) -> int:
+    raw = os.environ.get(key, "").strip()
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        logging.warning("Invalid %s=%s; using %s.", key, raw, default)
+        return default
+    if value <= 0:
+        logging.warning("Invalid %s=%s; using %s.", key, raw, default)
+        return default
+    return value
+
+EINK_MODES = {"mono": 0, "gray": 1, "tricolor": 2}
+EINK_WIDTH = parse_env_positive_int("EINK_WIDTH", 800)
+EINK_HEIGHT = parse_env_positive_int("EINK_HEIGHT", 480)
+EINK_MODE = os.environ.get("EINK_MODE", "").strip().lower() or {
+    "grayscale": "gray",
+    "tricolor": "tricolor",
+}.get(os.environ.get("DISPLAY_MODE", "").strip().lower(), "mono")
+EINK_OUTPUT = os.environ.get("EINK_OUTPUT", os.path.join(RUNTIME_DIR, "eink", "frame.bin"))
+EINK_SOCKET = os.environ.get("EINK_SOCKET", "")
+EINK_POLL_SECONDS = parse_env_positive_int("EINK_POLL_SECONDS", 2)
+TIMEZONE_NAME = os.environ.get("TIMEZONE_NAME", "America/Los_Angeles")
+
+# Palette indexes held in the framebuffer, one byte per pixel.
+WHITE = 0
+BLACK = 1
+RED = 2
+LIGHT = 3
+DARK = 4
+
+# (background, foreground) per state for each panel type.
+STATE_COLORS = {
+    "mono": {"available": (WHITE, BLACK)},
+    "gray": {
+        "available": (WHITE, BLACK),
+        "meeting": (LIGHT, BLACK),
+        "busy": (DARK, WHITE),
+        "ooo": (DARK, WHITE),
+        "error": (LIGHT, BLACK),
+    },
+    "tricolor": {
+        "available": (WHITE, BLACK),
+        "meeting": (WHITE, RED),
+        "busy": (RED, WHITE),
+        "ooo": (RED, WHITE),
+        "error": (BLACK, WHITE),
+    },
+}
+DEFAULT_COLORS = {"mono": (BLACK, WHITE), "gray": (DARK, WHITE), "tricolor": (BLACK, WHITE)}
+
+# Framebuffer palette index -> packed digit for each output plane.
+PLANE_DIGITS = {
+    "mono": [b"10010" + b"1" * 251],
+    "gray": [b"30021" + b"3" * 251],
+    "tricolor": [b"10110" + b"1" * 251, b"00100" + b"0" * 251],
+}
+PLANE_BASES = {"mono": 2, "gray": 4, "tricolor": 2}
+
+FRAME_HEADER = struct.Struct("<4sBBHHHI")
+RECT_HEADER = struct.Struct("<HHHH")
+
+# Classic 5x7 font for ASCII 0x20-0x7E: five column bytes per glyph, bit 0 at the top.
+FONT_5X7 = bytes.fromhex(
+    "0000000000" "00005f0000" "0007000700" "147f147f14" "242a7f2a12" "2313086462" "3649552250"
+    "0005030000" "001c224100" "0041221c00" "082a1c2a08" "08083e0808" "0050300000" "0808080808"
+    "0060600000" "2010080402" "3e5149453e" "00427f4000" "4261514946" "2141454b31" "1814127f10"
+    "2745454539" "3c4a494930" "0171090503" "3649494936" "064949291e" "0036360000" "0056360000"
+    "0008142241" "1414141414" "4122140800" "0201510906" "324979413e" "7e1111117e" "7f49494936"
+    "3e41414122" "7f4141221c" "7f49494941" "7f09090101" "3e41415132" "7f0808087f" "00417f4100"
+    "2040413f01" "7f08142241" "7f40404040" "7f0204027f" "7f0408107f" "3e4141413e" "7f09090906"
+    "3e4151215e" "7f09192946" "4649494931" "01017f0101" "3f4040403f" "1f2040201f" "7f2018207f"
+    "6314081463" "0304780403" "6151494543" "00007f4141" "0204081020" "41417f0000" "0402010204"
+    "4040404040" "0001020400" "2054545478" "7f48444438" "3844444420" "384444487f" "3854545418"
+    "087e090102" "081454543c" "7f08040478" "00447d4000" "2040443d00" "007f102844" "00417f4000"
+    "7c04180478" "7c08040478" "3844444438" "7c14141408" "081414187c" "7c08040408" "4854545420"
+    "043f444020" "3c4040207c" "1c2040201c" "3c4030403c" "4428102844" "0c5050503c" "4464544c44"
+    "0008364100" "00007f0000" "0041360800" "0804081008"
+)
+GLYPH_WIDTH = 5
+GLYPH_HEIGHT = 7
+GLYPH_ADVANCE = GLYPH_WIDTH + 1
+
+@lru_cache(maxsize=None)
+def glyph_runs(char: str, scale: int) -> tuple:
+    code = ord(char) if " " <= char <= "~" else ord("?")
+    columns = FONT_5X7[(code - 0x20) * GLYPH_WIDTH:(code - 0x20 + 1) * GLYPH_WIDTH]
+    runs = []
+    for row in range(GLYPH_HEIGHT):
+        column = 0
+        while column < GLYPH_WIDTH:
+            if columns[column] >> row & 1:
+                start = column
+                while column < GLYPH_WIDTH and columns[column] >> row & 1:
+                    column += 1
+                runs.append((row * scale, (row + 1) * scale, start * scale, column * scale))
+            else:
+                column += 1
+    return tuple(runs)
+
+def text_width(text: str, scale: int) -> int:
+    return max(len(text) * GLYPH_ADVANCE - 1, 0) * scale
+
+def fit_text(text: str, width: int, height: int, max_scale: int) -> tuple[str, int]:
+    scale = min(max_scale, height // (GLYPH_HEIGHT + 1))
+    while scale > 1 and text_width(text, scale) > width:
+        scale -= 1
+    if scale < 1:
+        return "", 0
+    if text_width(text, scale) > width:
+        keep = max((width // scale + 1) // GLYPH_ADVANCE - 3, 0)
+        text = text[:keep] + "..."
+    return text, scale
+
+@lru_cache(maxsize=1)
+def local_timezone():
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+    try:
+        return ZoneInfo(TIMEZONE_NAME)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+def format_clock(value: str | None) -> str:
+    if not value:
+        return ""
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return ""
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(local_timezone())
+    hour = parsed.hour % 12 or 12
+    return f"{hour}:{parsed.minute:02d} {'AM' if parsed.hour < 12 else 'PM'}"
+
+def plan_view(person: dict, now_ts: float) -> dict:
+    for segment in person.get("plan") or ():
+        try:
+            start = datetime.fromisoformat(segment["start"]).timestamp()
+            end = datetime.fromisoformat(segment["end"]).timestamp()
+        except (KeyError, ValueError):
+            continue
+        if start <= now_ts < end:
+            view = {**person, "detail": "", "until": None, "next_event_at": None}
+            view.update((key, value) for key, value in segment.items() if key not in {"start", "end"})
+            return view
+    return person
+
+def plan_boundary(people: list[dict], now_ts: float) -> float:
+    boundary = float("inf")
+    for person in people:
+        for segment in person.get("plan") or ():
+            try:
+                start = datetime.fromisoformat(segment["start"]).timestamp()
+            except (KeyError, ValueError):
+                continue
+            if start > now_ts:
+                boundary = min(boundary, start)
+                break
+    return boundary
+
+# Dirty rectangles are trimmed to the rows that differ and widened to whole bytes.
+class FrameRenderer:
+    __slots__ = ("width", "height", "mode", "pixels", "fills", "boxes", "sequence")
+
+    def __init__(self, width: int = EINK_WIDTH, height: int = EINK_HEIGHT, mode: str = EINK_MODE):
+        if mode not in EINK_MODES:
+            logging.warning("Unknown EINK_MODE=%s; using mono.", mode)
+            mode = "mono"
+        if width % 8:
+            logging.warning("EINK_WIDTH=%s is not a multiple of 8; rounding up.", width)
+            width += 8 - width % 8
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.pixels = bytearray(width * height)
+        self.fills = [bytes([color]) * width for color in range(DARK + 1)]
+        self.boxes: list[tuple] = []
+        self.sequence = 0
+
+    def fill(self, x: int, y: int, w: int, h: int, color: int):
+        row = self.fills[color][:w]
+        pixels = self.pixels
+        stride = self.width
+        for line in range(y * stride + x, (y + h) * stride + x, stride):
+            pixels[line:line + w] = row
+
+    def draw_text(self, text: str, x: int, y: int, scale: int, color: int):
+        pixels = self.pixels
+        stride = self.width
+        row = self.fills[color]
+        for char in text:
+            for top, bottom, left, right in glyph_runs(char, scale):
+                span = row[:right - left]
+                start = (y + top) * stride + x + left
+                for line in range(start, start + (bottom - top) * stride, stride):
+                    pixels[line:line + right - left] = span
+            x += GLYPH_ADVANCE * scale
+
+    def draw_centered(self, text: str, x: int, y: int, w: int, h: int, max_scale: int, color: int):
+        text, scale = fit_text(text, w, h, max_scale)
+        if not scale:
+            return
+        left = x + (w - text_width(text, scale)) // 2
+        top = y + (h - GLYPH_HEIGHT * scale) // 2
+        self.draw_text(text, left, top, scale, color)
+
+    def layout(self, count: int, rows_per_column: int | None) -> list[tuple]:
+        count = max(count, 1)
+        per_column = max(min(rows_per_column or count, count), 1)
+        columns = -(-count // per_column)
+        boxes = []
+        for index in range(count):
+            column, row = divmod(index, per_column)
+            x0 = self.width * column // columns
+            x1 = self.width * (column + 1) // columns
+            y0 = self.height * row // per_column
+            y1 = self.height * (row + 1) // per_column
+            boxes.append((x0, y0, x1 - x0, y1 - y0))
+        return boxes
+
+    def draw_person(self, person: dict, box: tuple, fallback_name: str):
+        x, y, w, h = box
+        background, foreground = STATE_COLORS[self.mode].get(
+            person.get("state", "error"), DEFAULT_COLORS[self.mode]
+        )
+        self.fill(x, y, w, h, background)
+        divider = BLACK if background != BLACK else WHITE
+        if x:
+            self.fill(x, y, min(2, w), h, divider)
+        if y:
+            self.fill(x, y, w, min(2, h), divider)
+        pad = max(min(w, h) // 20, 2)
+        inner_w = w - 2 * pad
+        inner_h = h - 2 * pad
+        top = y + pad
+        line = ""
+        if person.get("until") and person.get("state") not in {"available", "ooo"}:
+            line = f"Until {format_clock(person['until'])}"
+        elif person.get("next_event_at") and person.get("state") != "ooo":
+            line = f"Next event at {format_clock(person['next_event_at'])}"
+        if person.get("calendar_stale"):
+            line = "Calendar offline"
+        sections = (
+            ((person.get("name") or fallback_name).upper(), 0.2, 6),
+            ((person.get("label") or "UNKNOWN").upper(), 0.4, 16),
+            (person.get("detail") or "", 0.2, 6),
+            (line, 0.2, 5),
+        )
+        for text, share, max_scale in sections:
+            section_h = int(inner_h * share)
+            if text:
+                self.draw_centered(text, x + pad, top, inner_w, section_h, max_scale, foreground)
+            top += section_h
+
+    def render(self, people: list[dict], rows_per_column: int | None = None) -> tuple[list[tuple], bool]:
+        boxes = self.layout(len(people), rows_per_column)
+        keys = [
+            json.dumps(
+                {key: value for key, value in person.items() if key not in {"plan", "plan_version", "updated"}},
+                sort_keys=True,
+            )
+            for person in people
+        ] or [""]
+        people = people or [{"state": "error", "label": "NO STATUS", "name": ""}]
+        full = [box for box, _ in self.boxes] != boxes
+        dirty = []
+        stride = self.width
+        for index, (box, key) in enumerate(zip(boxes, keys)):
+            if not full and self.boxes[index][1] == key:
+                continue
+            if full:
+                self.draw_person(people[index], box, f"Group {index + 1}")
+                continue
+            x, y, w, h = box
+            before = [bytes(self.pixels[line * stride + x:line * stride + x + w]) for line in range(y, y + h)]
+            self.draw_person(people[index], box, f"Group {index + 1}")
+            changed = [
+                line
+                for line, old in zip(range(y, y + h), before)
+                if self.pixels[line * stride + x:line * stride + x + w] != old
+            ]
+            if changed:
+                dirty.append((x, changed[0], w, changed[-1] - changed[0] + 1))
+        self.boxes = list(zip(boxes, keys))
+        if full:
+            dirty = [(0, 0, self.width, self.height)]
+        if dirty:
+            self.sequence += 1
+        return [align_rect(rect) for rect in dirty], full
+
+    def pack(self, rect: tuple) -> bytes:
+        x, y, w, h = rect
+        stride = self.width
+        region = b"".join(bytes(self.pixels[line * stride + x:line * stride + x + w]) for line in range(y, y + h))
+        base = PLANE_BASES[self.mode]
+        bits = 1 if base == 2 else 2
+        planes = []
+        for digits in PLANE_DIGITS[self.mode]:
+            # translate + int(..., base) packs pixels in C instead of a Python loop per pixel.
+            text = region.translate(digits)
+            planes.append(int(text, base).to_bytes(len(region) * bits // 8, "big") if text else b"")
+        return b"".join(planes)
+
+    def message(self, rects: list[tuple]) -> bytes:
+        parts = [
+            FRAME_HEADER.pack(
+                b"EINK", 1, EINK_MODES[self.mode], self.width, self.height, len(rects), self.sequence
+            )
+        ]
+        for rect in rects:
+            parts.append(RECT_HEADER.pack(*rect))
+            parts.append(self.pack(rect))
+        return b"".join(parts)
+
+def align_rect(rect: tuple) -> tuple:
+    x, y, w, h = rect
+    left = x - x % 8
+    right = x + w + (-(x + w)) % 8
+    return left, y, right - left, h
+
+def write_frame_file(renderer: FrameRenderer, rects: list[tuple], full: bool, path: str = EINK_OUTPUT):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    meta = {
+        "sequence": renderer.sequence,
+        "mode": renderer.mode,
+        "width": renderer.width,
+        "height": renderer.height,
+        "full": full,
+        "rects": [list(rect) for rect in rects],
+    }
+    # The two files cannot be replaced together; a driver pairs them by the
+    # sequence in the JSON and the frame header, and rereads on a mismatch.
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, path + ".json")
+    with open(tmp, "wb") as f:
+        f.write(renderer.message([(0, 0, renderer.width, renderer.height)]))
+    os.replace(tmp, path)
+
+class SocketSink:
+    __slots__ = ("path", "connection")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = None
+
+    def send(self, renderer: FrameRenderer, rects: list[tuple]):
+        if self.connection is None:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                connection.connect(self.path)
+            except OSError as ex:
+                connection.close()
+                logging.warning("E-ink driver socket %s unavailable: %s", self.path, ex)
+                return
+            self.connection = connection
+            # A fresh driver has no previous frame to patch.
+            rects = [(0, 0, renderer.width, renderer.height)]
+        try:
+            self.connection.sendall(renderer.message(rects))
+        except OSError as ex:
+            logging.warning("Lost e-ink driver socket %s: %s", self.path, ex)
+            self.connection.close()
+            self.connection = None
+
+def load_people(path: str = STATUS_JSON_PATH) -> tuple[list[dict], int | None]:
+    with open(path, "r") as f:
+        data = json.load(f)
+    people = data.get("people") if isinstance(data.get("people"), list) else [data]
+    return people, data.get("rows_per_column")
+
+def main():
+    logging.basicConfig(
+        level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    renderer = FrameRenderer()
+    sink = SocketSink(EINK_SOCKET) if EINK_SOCKET else None
+    version = None
+    people: list[dict] = []
+    rows_per_column = None
+    redraw_at = 0.0
+    while True:
+        try:
+            stat = os.stat(STATUS_JSON_PATH)
+            if (stat.st_mtime_ns, stat.st_size) != version:
+                people, rows_per_column = load_people()
+                version = (stat.st_mtime_ns, stat.st_size)
+                redraw_at = 0.0
+        except (OSError, ValueError) as ex:
+            logging.warning("Cannot read %s: %s", STATUS_JSON_PATH, ex)
+        now_ts = time.time()
+        if now_ts >= redraw_at:
+            began = time.perf_counter()
+            rects, full = renderer.render([plan_view(person, now_ts) for person in people], rows_per_column)
+            if rects:
+                try:
+                    write_frame_file(renderer, rects, full)
+                except OSError:
+                    logging.exception("Failed to write e-ink frame to %s", EINK_OUTPUT)
+                if sink is not None:
+                    sink.send(renderer, rects)
+                logging.info(
+                    "Rendered frame %s: %s rect(s) in %.1f ms",
+                    renderer.sequence,
+                    len(rects),
+                    (time.perf_counter() - began) * 1000,
+                )
+            redraw_at = plan_boundary(people, now_ts)
+        time.sleep(EINK_POLL_SECONDS)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,58 @@
+import codecs
+import concurrent.futures
+import gzip
+import hashlib
 import json
 import logging
 import os
+import random
+import re
+import selectors
+import signal
+import socket
+import struct
+import sys
+import threading
 import time
+from array import array
+from bisect import bisect_left, bisect_right
 from datetime import date, datetime, timedelta, timezone
 from functools import lru_cache
+from itertools import accumulate
+
+# Fallback start time for startup metrics where /proc is unavailable.
+STARTED_AT = time.monotonic()
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 RUNTIME_DIR = os.environ.get("STATUS_SCREEN_DIR", "/home/pi/status-screen")
 
 STATUS_JSON_PATH = os.path.join(RUNTIME_DIR, "status.json")
 OVERRIDE_JSON_PATH = os.path.join(RUNTIME_DIR, "override.json")
+AVAILABILITY_DIR = os.path.join(RUNTIME_DIR, "availability")
+STATUS_SHARD_DIR = os.path.join(RUNTIME_DIR, "status")
+HISTORY_DIR = os.path.join(RUNTIME_DIR, "history")
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s %(message)s",
 )
 
+# Seconds spent importing each heavy dependency, in import order. They are
+# imported on first use, so a warm start that never touches the network or
+# parses a feed never pays for them.
+IMPORT_SECONDS: dict[str, float] = {}
+
+def lazy_import(name: str):
+    # Always go through __import__: another group's thread may be halfway
+    # through importing the same module, and only the import lock makes this
+    # one wait for it. (importlib.import_module would also skip -X importtime.)
+    loaded = name in sys.modules
+    began = time.perf_counter()
+    __import__(name)
+    if not loaded:
+        IMPORT_SECONDS.setdefault(name, time.perf_counter() - began)
+    return sys.modules[name]
+
 def load_dotenv(dotenv_path: str):
     if not os.path.exists(dotenv_path):
         return
@@ -67,6 +104,20 @@ def parse_env_positive_int(key: str) -> int | None:
         return None
     return value
 
+def parse_env_fraction(key: str, default: float) -> float:
+    raw = os.environ.get(key)
+    if raw is None:
+        return default
+    try:
+        value = float(raw.strip())
+    except ValueError:
+        logging.warning("Invalid %s=%s; expected a number between 0 and 1.", key, raw)
+        return default
+    if not 0 <= value <= 1:
+        logging.warning("Invalid %s=%s; expected a number between 0 and 1.", key, raw)
+        return default
+    return value
+
 def configure_logging():
     level_name = os.environ.get("LOG_LEVEL", "INFO").upper()
     level = logging.INFO
@@ -83,6 +134,40 @@ POLL_SECONDS = int(os.environ.get("POLL_SECONDS", "30"))
 ICS_REFRESH_SECONDS = int(
     os.environ.get("ICS_REFRESH_SECONDS", os.environ.get("ICS_REFRESH", "300"))
 )
+ICS_REFRESH_MIN_SECONDS = parse_env_positive_int("ICS_REFRESH_MIN_SECONDS") or max(
+    ICS_REFRESH_SECONDS // 2, 1
+)
+ICS_REFRESH_MAX_SECONDS = parse_env_positive_int("ICS_REFRESH_MAX_SECONDS") or max(
+    ICS_REFRESH_SECONDS * 12, ICS_REFRESH_MIN_SECONDS
+)
+ICS_REFRESH_OFF_HOURS_FACTOR = parse_env_positive_int("ICS_REFRESH_OFF_HOURS_FACTOR") or 4
+ICS_REFRESH_ACTIVE_HOURS = os.environ.get("ICS_REFRESH_ACTIVE_HOURS", "07:00-19:00")
+ICS_REFRESH_JITTER = parse_env_fraction("ICS_REFRESH_JITTER", 0.1)
+ICS_MAX_CONCURRENT_FETCHES = parse_env_positive_int("ICS_MAX_CONCURRENT_FETCHES") or 2
+ICS_MAX_BYTES = parse_env_positive_int("ICS_MAX_BYTES") or 20 * 1024 * 1024
+ICS_CONNECT_TIMEOUT = parse_env_positive_int("ICS_CONNECT_TIMEOUT") or 10
+ICS_READ_TIMEOUT = parse_env_positive_int("ICS_READ_TIMEOUT") or 30
+BATCH_EVALUATION = parse_env_bool("BATCH_EVALUATION", False)
+INDEX_SNAPSHOTS = parse_env_bool("INDEX_SNAPSHOTS", True)
+HISTORY_RING_SIZE = parse_env_positive_int("HISTORY_RING_SIZE") or 256
+STATUS_PLAN_HOURS = parse_env_positive_int("STATUS_PLAN_HOURS") or 24
+STATUS_JSON_PLANS = parse_env_bool("STATUS_JSON_PLANS", False)
+HISTORY_FLUSH_SECONDS = parse_env_positive_int("HISTORY_FLUSH_SECONDS") or 60
+HISTORY_MAX_BYTES = parse_env_positive_int("HISTORY_MAX_BYTES") or 8 * 1024 * 1024
+STATUS_SOCKET_PATH = os.environ.get("STATUS_SOCKET_PATH", os.path.join(RUNTIME_DIR, "status.sock"))
+STATUS_SOCKET_BUFFER_BYTES = parse_env_positive_int("STATUS_SOCKET_BUFFER_BYTES") or 1024 * 1024
+POLL_DEADLINE_SECONDS = min(
+    parse_env_positive_int("POLL_DEADLINE_SECONDS") or max(POLL_SECONDS - 5, 5), max(POLL_SECONDS, 1)
+)
+# Refreshes mostly wait on FETCH_SLOTS downloads, so a few threads per slot
+# keep them busy without one thread per person on large walls.
+POLL_WORKERS = parse_env_positive_int("POLL_WORKERS") or 4 * ICS_MAX_CONCURRENT_FETCHES
+ICS_BREAKER_THRESHOLD = parse_env_positive_int("ICS_BREAKER_THRESHOLD") or 3
+WATCHDOG_STUCK_SECONDS = parse_env_positive_int("WATCHDOG_STUCK_SECONDS") or 4 * (
+    ICS_CONNECT_TIMEOUT + ICS_READ_TIMEOUT
+)
+WATCHDOG_CYCLE_GRACE_SECONDS = 5
+ICS_BACKOFF_MAX_SECONDS = parse_env_positive_int("ICS_BACKOFF_MAX_SECONDS") or 3600
 ICS_CACHE_PATH = os.environ.get(
     "ICS_CACHE_PATH", os.path.join(RUNTIME_DIR, "calendar.ics")
 )
@@ -94,9 +179,10 @@ ICS_CA_BUNDLE = (
 WORK_HOURS_START = os.environ.get("WORK_HOURS_START", "")
 WORK_HOURS_END = os.environ.get("WORK_HOURS_END", "")
 WORK_HOURS_DAYS = os.environ.get("WORK_HOURS_DAYS", "")
+WORK_HOURS_WINDOWS = os.environ.get("WORK_HOURS_WINDOWS", "")
+WORK_HOURS_HOLIDAYS = os.environ.get("WORK_HOURS_HOLIDAYS", "")
+WORK_HOURS_EXCEPTIONS = os.environ.get("WORK_HOURS_EXCEPTIONS", "")
 
-OOO_KEYWORDS = ["out of office", "ooo", "vacation", "leave", "pto", "sick"]
-IGNORE_KEYWORDS = ["cancelled", "canceled"]
 ALLDAY_ONLY_COUNTS_IF_OOO = parse_env_bool("ALLDAY_ONLY_COUNTS_IF_OOO", True)
 USE_MS_BUSY_STATUS = parse_env_bool("USE_MS_BUSY_STATUS", False)
 SHOW_EVENT_DETAILS = parse_env_bool("SHOW_EVENT_DETAILS", True)
@@ -125,15 +211,42 @@ def parse_env_list(key: str) -> list[str]:
         pass
     return [item.strip() for item in raw.split(",") if item.strip()]
 
-def build_groups() -> list[dict]:
+def parse_env_json_list(key: str) -> list:
+    raw = os.environ.get(key, "").strip()
+    if not raw:
+        return []
+    try:
+        parsed = json.loads(raw)
+    except json.JSONDecodeError:
+        logging.warning("Invalid %s; expected a JSON list.", key)
+        return []
+    if not isinstance(parsed, list):
+        logging.warning("Invalid %s; expected a JSON list.", key)
+        return []
+    return parsed
+
+OOO_KEYWORDS = parse_env_list("OOO_KEYWORDS") or ["out of office", "ooo", "vacation", "leave", "pto", "sick"]
+IGNORE_KEYWORDS = parse_env_list("IGNORE_KEYWORDS") or ["cancelled", "canceled"]
+
+def parse_group_sources() -> tuple[list[str], list, int]:
+    # control_server.py counts people with this too, so both agree for multi-calendar people.
     ics_urls = parse_env_list("ICS_URLS")
+    ics_feeds = parse_env_json_list("ICS_FEEDS")
+    return ics_urls, ics_feeds, max(len(ics_urls), len(ics_feeds)) or 1
+
+def build_groups() -> list[dict]:
+    ics_urls, ics_feeds, group_count = parse_group_sources()
     display_names = parse_env_list("DISPLAY_NAMES")
     auth_tokens = parse_env_list("AUTH_TOKENS")
     work_hour_starts = parse_env_list("WORK_HOURS_STARTS")
     work_hour_ends = parse_env_list("WORK_HOURS_ENDS")
     work_hour_days = parse_env_list("WORK_HOURS_DAYS_LIST")
+    work_hour_windows = parse_env_list("WORK_HOURS_WINDOWS_LIST")
+    work_hour_holidays = parse_env_list("WORK_HOURS_HOLIDAYS_LIST")
+    work_hour_exceptions = parse_env_list("WORK_HOURS_EXCEPTIONS_LIST")
+    event_rules = parse_env_json_list("EVENT_RULES_LIST")
+    team_lists = parse_env_json_list("TEAMS_LIST")
 
-    group_count = len(ics_urls) if ics_urls else 1
     if len(display_names) > group_count or len(auth_tokens) > group_count:
         logging.warning(
             "Extra DISPLAY_NAMES/AUTH_TOKENS provided; only the first %s entries will be used.",
@@ -153,10 +266,7 @@ def build_groups() -> list[dict]:
             cache_path = base_cache
             override_path = OVERRIDE_JSON_PATH
         else:
-            safe_name = "".join(
-                ch.lower() if ch.isalnum() else "-"
-                for ch in display_name.strip()
-            ).strip("-")
+            safe_name = slugify(display_name)
             name_suffix = f"-{safe_name}" if safe_name else ""
             suffix = f"-{index + 1}{name_suffix}"
             cache_path = f"{cache_root}{suffix}{cache_ext}" if cache_ext else f"{base_cache}{suffix}"
@@ -164,19 +274,86 @@ def build_groups() -> list[dict]:
         start_value = work_hour_starts[index] if index < len(work_hour_starts) else WORK_HOURS_START
         end_value = work_hour_ends[index] if index < len(work_hour_ends) else WORK_HOURS_END
         days_value = work_hour_days[index] if index < len(work_hour_days) else WORK_HOURS_DAYS
+        windows_value = work_hour_windows[index] if index < len(work_hour_windows) else WORK_HOURS_WINDOWS
+        holidays_value = work_hour_holidays[index] if index < len(work_hour_holidays) else WORK_HOURS_HOLIDAYS
+        exceptions_value = (
+            work_hour_exceptions[index] if index < len(work_hour_exceptions) else WORK_HOURS_EXCEPTIONS
+        )
+        rules_value = event_rules[index] if index < len(event_rules) else {}
+        if not isinstance(rules_value, dict):
+            logging.warning("Invalid EVENT_RULES_LIST entry for group %s; expected an object.", index + 1)
+            rules_value = {}
+        ics_url = ics_urls[index] if index < len(ics_urls) else ""
+        feeds_value = ics_feeds[index] if index < len(ics_feeds) else None
+        feeds = build_group_feeds(feeds_value, ics_url, cache_path, rules_value, index)
+        teams_value = team_lists[index] if index < len(team_lists) else []
+        if isinstance(teams_value, str):
+            teams_value = [teams_value]
+        if not isinstance(teams_value, list):
+            logging.warning("Invalid TEAMS_LIST entry for group %s; expected a name or list.", index + 1)
+            teams_value = []
         groups.append(
             {
                 "index": index,
-                "ics_url": ics_urls[index] if index < len(ics_urls) else "",
+                "ics_url": feeds[0]["url"],
                 "display_name": display_name,
                 "auth_token": auth_tokens[index] if index < len(auth_tokens) else "",
                 "cache_path": cache_path,
                 "override_path": override_path,
-                "work_hours": build_work_hours_config(start_value, end_value, days_value, index),
+                "work_hours": build_work_hours_config(
+                    start_value,
+                    end_value,
+                    days_value,
+                    index,
+                    windows_value,
+                    holidays_value,
+                    exceptions_value,
+                ),
+                "event_rules": feeds[0]["rules"],
+                "feeds": feeds,
+                "teams": [str(team).strip() for team in teams_value if str(team).strip()],
             }
         )
     return groups
 
+def slugify(name: str) -> str:
+    return "".join(ch.lower() if ch.isalnum() else "-" for ch in name.strip()).strip("-")
+
+FEED_MODES = {"all", "ooo", "meeting"}
+
+def build_group_feeds(
+    feeds_value,
+    ics_url: str,
+    cache_path: str,
+    rules_value: dict,
+    group_index: int,
+) -> list[dict]:
+    # Each feed is a URL or an object with "url", an optional "mode" and event rule overrides.
+    if feeds_value is None:
+        feeds_value = [ics_url]
+    elif not isinstance(feeds_value, list) or not feeds_value:
+        logging.warning("Invalid ICS_FEEDS entry for group %s; expected a non-empty list.", group_index + 1)
+        feeds_value = [ics_url]
+    cache_root, cache_ext = os.path.splitext(cache_path)
+    feeds = []
+    for position, feed in enumerate(feeds_value):
+        if not isinstance(feed, dict):
+            feed = {"url": feed}
+        mode = str(feed.get("mode") or "all").strip().lower()
+        if mode not in FEED_MODES:
+            logging.warning("Unknown feed mode %s for group %s; using all.", mode, group_index + 1)
+            mode = "all"
+        overrides = {key: value for key, value in feed.items() if key not in {"url", "mode"}}
+        feeds.append(
+            {
+                "url": str(feed.get("url") or "").strip(),
+                "mode": mode,
+                "cache_path": cache_path if position == 0 else f"{cache_root}-feed{position + 1}{cache_ext}",
+                "rules": build_event_rules({**rules_value, **overrides}, group_index),
+            }
+        )
+    return feeds
+
 DAY_NAME_TO_INDEX = {
     "mon": 0,
     "monday": 0,
@@ -197,15 +374,16 @@ DAY_NAME_TO_INDEX = {
     "sunday": 6,
 }
 
+# Epoch seconds for "now"; replay swaps in a simulated clock.
+CLOCK = time.time
+
 def now_utc() -> datetime:
-    return datetime.now(timezone.utc)
+    return datetime.fromtimestamp(CLOCK(), timezone.utc)
 
 def now_local(local_tz) -> datetime:
-    return datetime.now(local_tz)
+    return datetime.fromtimestamp(CLOCK(), local_tz)
 
 def get_local_tz():
-    from dateutil import tz
-
     local_tz = resolve_tzinfo(TIMEZONE_NAME)
     if local_tz is None:
         logging.error("Invalid TIMEZONE_NAME=%s", TIMEZONE_NAME)
@@ -213,12 +391,154 @@ def get_local_tz():
         logging.debug("Resolved TIMEZONE_NAME=%s to tzinfo=%s", TIMEZONE_NAME, local_tz)
     return local_tz
 
+# Windows time zone IDs (CLDR windowsZones, territory 001) and the Outlook
+# display names seen in exported feeds, keyed by normalize_tz_key().
 WINDOWS_TZ_MAP = {
+    "dateline standard time": "Etc/GMT+12",
+    "utc-11": "Etc/GMT+11",
+    "aleutian standard time": "America/Adak",
+    "hawaiian standard time": "Pacific/Honolulu",
+    "marquesas standard time": "Pacific/Marquesas",
+    "alaskan standard time": "America/Anchorage",
+    "utc-09": "Etc/GMT+9",
+    "pacific standard time (mexico)": "America/Tijuana",
+    "utc-08": "Etc/GMT+8",
     "pacific standard time": "America/Los_Angeles",
+    "us mountain standard time": "America/Phoenix",
+    "mountain standard time (mexico)": "America/Mazatlan",
     "mountain standard time": "America/Denver",
+    "yukon standard time": "America/Whitehorse",
+    "central america standard time": "America/Guatemala",
     "central standard time": "America/Chicago",
+    "easter island standard time": "Pacific/Easter",
+    "central standard time (mexico)": "America/Mexico_City",
+    "mexico standard time": "America/Mexico_City",
+    "mexico standard time 2": "America/Chihuahua",
+    "canada central standard time": "America/Regina",
+    "sa pacific standard time": "America/Bogota",
+    "eastern standard time (mexico)": "America/Cancun",
     "eastern standard time": "America/New_York",
+    "haiti standard time": "America/Port-au-Prince",
+    "cuba standard time": "America/Havana",
+    "us eastern standard time": "America/Indiana/Indianapolis",
+    "turks and caicos standard time": "America/Grand_Turk",
+    "paraguay standard time": "America/Asuncion",
+    "atlantic standard time": "America/Halifax",
+    "venezuela standard time": "America/Caracas",
+    "central brazilian standard time": "America/Cuiaba",
+    "sa western standard time": "America/La_Paz",
+    "pacific sa standard time": "America/Santiago",
+    "newfoundland standard time": "America/St_Johns",
+    "tocantins standard time": "America/Araguaina",
+    "e. south america standard time": "America/Sao_Paulo",
+    "sa eastern standard time": "America/Cayenne",
+    "argentina standard time": "America/Argentina/Buenos_Aires",
+    "greenland standard time": "America/Nuuk",
+    "montevideo standard time": "America/Montevideo",
+    "magallanes standard time": "America/Punta_Arenas",
+    "saint pierre standard time": "America/Miquelon",
+    "bahia standard time": "America/Bahia",
+    "utc-02": "Etc/GMT+2",
+    "mid-atlantic standard time": "Etc/GMT+2",
+    "azores standard time": "Atlantic/Azores",
+    "cape verde standard time": "Atlantic/Cape_Verde",
     "utc": "UTC",
+    "coordinated universal time": "UTC",
+    "gmt standard time": "Europe/London",
+    "greenwich standard time": "Atlantic/Reykjavik",
+    "sao tome standard time": "Africa/Sao_Tome",
+    "morocco standard time": "Africa/Casablanca",
+    "w. europe standard time": "Europe/Berlin",
+    "central europe standard time": "Europe/Budapest",
+    "romance standard time": "Europe/Paris",
+    "central european standard time": "Europe/Warsaw",
+    "w. central africa standard time": "Africa/Lagos",
+    "jordan standard time": "Asia/Amman",
+    "gtb standard time": "Europe/Bucharest",
+    "middle east standard time": "Asia/Beirut",
+    "egypt standard time": "Africa/Cairo",
+    "e. europe standard time": "Europe/Chisinau",
+    "syria standard time": "Asia/Damascus",
+    "west bank standard time": "Asia/Hebron",
+    "south africa standard time": "Africa/Johannesburg",
+    "fle standard time": "Europe/Kiev",
+    "israel standard time": "Asia/Jerusalem",
+    "south sudan standard time": "Africa/Juba",
+    "kaliningrad standard time": "Europe/Kaliningrad",
+    "sudan standard time": "Africa/Khartoum",
+    "libya standard time": "Africa/Tripoli",
+    "namibia standard time": "Africa/Windhoek",
+    "arabic standard time": "Asia/Baghdad",
+    "turkey standard time": "Europe/Istanbul",
+    "arab standard time": "Asia/Riyadh",
+    "belarus standard time": "Europe/Minsk",
+    "russian standard time": "Europe/Moscow",
+    "e. africa standard time": "Africa/Nairobi",
+    "volgograd standard time": "Europe/Volgograd",
+    "iran standard time": "Asia/Tehran",
+    "arabian standard time": "Asia/Dubai",
+    "astrakhan standard time": "Europe/Astrakhan",
+    "azerbaijan standard time": "Asia/Baku",
+    "russia time zone 3": "Europe/Samara",
+    "mauritius standard time": "Indian/Mauritius",
+    "saratov standard time": "Europe/Saratov",
+    "georgian standard time": "Asia/Tbilisi",
+    "caucasus standard time": "Asia/Yerevan",
+    "armenian standard time": "Asia/Yerevan",
+    "afghanistan standard time": "Asia/Kabul",
+    "west asia standard time": "Asia/Tashkent",
+    "ekaterinburg standard time": "Asia/Yekaterinburg",
+    "pakistan standard time": "Asia/Karachi",
+    "qyzylorda standard time": "Asia/Qyzylorda",
+    "india standard time": "Asia/Kolkata",
+    "sri lanka standard time": "Asia/Colombo",
+    "nepal standard time": "Asia/Kathmandu",
+    "central asia standard time": "Asia/Almaty",
+    "bangladesh standard time": "Asia/Dhaka",
+    "omsk standard time": "Asia/Omsk",
+    "myanmar standard time": "Asia/Yangon",
+    "se asia standard time": "Asia/Bangkok",
+    "altai standard time": "Asia/Barnaul",
+    "w. mongolia standard time": "Asia/Hovd",
+    "north asia standard time": "Asia/Krasnoyarsk",
+    "n. central asia standard time": "Asia/Novosibirsk",
+    "tomsk standard time": "Asia/Tomsk",
+    "china standard time": "Asia/Shanghai",
+    "north asia east standard time": "Asia/Irkutsk",
+    "singapore standard time": "Asia/Singapore",
+    "w. australia standard time": "Australia/Perth",
+    "taipei standard time": "Asia/Taipei",
+    "ulaanbaatar standard time": "Asia/Ulaanbaatar",
+    "aus central w. standard time": "Australia/Eucla",
+    "transbaikal standard time": "Asia/Chita",
+    "tokyo standard time": "Asia/Tokyo",
+    "north korea standard time": "Asia/Pyongyang",
+    "korea standard time": "Asia/Seoul",
+    "yakutsk standard time": "Asia/Yakutsk",
+    "cen. australia standard time": "Australia/Adelaide",
+    "aus central standard time": "Australia/Darwin",
+    "e. australia standard time": "Australia/Brisbane",
+    "aus eastern standard time": "Australia/Sydney",
+    "west pacific standard time": "Pacific/Port_Moresby",
+    "tasmania standard time": "Australia/Hobart",
+    "vladivostok standard time": "Asia/Vladivostok",
+    "lord howe standard time": "Australia/Lord_Howe",
+    "bougainville standard time": "Pacific/Bougainville",
+    "russia time zone 10": "Asia/Srednekolymsk",
+    "magadan standard time": "Asia/Magadan",
+    "norfolk standard time": "Pacific/Norfolk",
+    "sakhalin standard time": "Asia/Sakhalin",
+    "central pacific standard time": "Pacific/Guadalcanal",
+    "russia time zone 11": "Asia/Kamchatka",
+    "kamchatka standard time": "Asia/Kamchatka",
+    "new zealand standard time": "Pacific/Auckland",
+    "utc+12": "Etc/GMT-12",
+    "fiji standard time": "Pacific/Fiji",
+    "chatham islands standard time": "Pacific/Chatham",
+    "utc+13": "Etc/GMT-13",
+    "tonga standard time": "Pacific/Tongatapu",
+    "samoa standard time": "Pacific/Apia",
+    "line islands standard time": "Pacific/Kiritimati",
     "pacific time (us & canada)": "America/Los_Angeles",
     "mountain time (us & canada)": "America/Denver",
     "central time (us & canada)": "America/Chicago",
@@ -239,35 +559,38 @@ def map_windows_tz(value: str | None) -> str | None:
         return None
     return WINDOWS_TZ_MAP.get(key)
 
-@lru_cache(maxsize=64)
+@lru_cache(maxsize=256)
 def resolve_tzinfo(name: str | None):
-    from dateutil import tz
+    tz = lazy_import("dateutil.tz")
 
     if not name:
         return None
+    # Windows IDs win over gettz(), which can misread them as POSIX TZ strings.
     mapped = map_windows_tz(name)
-    mapped_tz = tz.gettz(mapped) if mapped else None
-    tzinfo = tz.gettz(name)
-    if tzinfo is not None:
-        if mapped_tz and name.strip().lower() not in {"utc", "etc/utc"}:
-            now = datetime.now(timezone.utc)
-            if tzinfo.utcoffset(now) == timedelta(0):
-                return mapped_tz
+    if mapped:
+        return tz.gettz(mapped)
+    return tz.gettz(name.strip())
+
+class TimezoneTable(dict):
+    def __missing__(self, tzid: str):
+        tzinfo = resolve_tzinfo(tzid)
+        self[tzid] = tzinfo
         return tzinfo
-    if mapped_tz:
-        return mapped_tz
-    return None
 
-def coerce_event_timezone(dt: datetime, local_tz) -> datetime:
-    if dt.tzinfo is None:
-        return dt.replace(tzinfo=local_tz)
-    tzname = dt.tzinfo.tzname(dt)
-    mapped = map_windows_tz(tzname)
-    if mapped:
-        mapped_tz = resolve_tzinfo(mapped)
-        if mapped_tz:
-            return dt.replace(tzinfo=mapped_tz)
-    return dt
+def build_tz_table(calendar) -> TimezoneTable:
+    table = TimezoneTable()
+    for component in calendar.walk("VTIMEZONE"):
+        tzid = str(component.get("TZID") or "")
+        if not tzid or tzid in table:
+            continue
+        tzinfo = resolve_tzinfo(tzid)
+        if tzinfo is None:
+            try:
+                tzinfo = component.to_tz()
+            except Exception:
+                logging.debug("Failed to build VTIMEZONE %s", tzid, exc_info=True)
+        table[tzid] = tzinfo
+    return table
 
 def parse_hhmm(value: str) -> tuple[int, int] | None:
     try:
@@ -320,78 +643,245 @@ def parse_days(value: str) -> set[int]:
             days.add(day_index)
     return days or set(range(0, 5))
 
-def build_work_hours_config(
-    work_hours_start: str,
-    work_hours_end: str,
-    work_hours_days: str,
-    group_index: int | None = None,
-) -> dict | None:
-    if not work_hours_start or not work_hours_end:
+WEEK_MINUTES = 7 * 24 * 60
+DAY_MINUTES = 24 * 60
+
+def parse_time_range(value: str) -> tuple[int, int] | None:
+    start_raw, sep, end_raw = (value or "").strip().partition("-")
+    if not sep:
         return None
-    start = parse_hhmm(work_hours_start)
-    end = parse_hhmm(work_hours_end)
+    start = parse_hhmm(start_raw.strip())
+    end = (24, 0) if end_raw.strip() == "24:00" else parse_hhmm(end_raw.strip())
     if not start or not end:
-        suffix = f" (group {group_index + 1})" if group_index is not None else ""
-        logging.warning(
-            "Invalid work hours config%s: start=%s end=%s",
-            suffix,
-            work_hours_start,
-            work_hours_end,
-        )
-        return None
-    days = parse_days(work_hours_days)
-    if not days:
-        suffix = f" (group {group_index + 1})" if group_index is not None else ""
-        logging.warning("Invalid work hours days%s: %s", suffix, work_hours_days)
         return None
     start_minutes = start[0] * 60 + start[1]
     end_minutes = end[0] * 60 + end[1]
+    if end_minutes <= start_minutes:
+        end_minutes += DAY_MINUTES
+    return start_minutes, end_minutes
+
+def parse_time_ranges(value: str) -> list[tuple[int, int]] | None:
+    ranges = []
+    for raw_range in value.split(","):
+        if not raw_range.strip():
+            continue
+        parsed = parse_time_range(raw_range)
+        if parsed is None:
+            return None
+        ranges.append(parsed)
+    return ranges
+
+def parse_window_days(value: str) -> set[int] | None:
+    # Unlike parse_days, any unknown token rejects the whole list instead of being skipped.
+    days: set[int] = set()
+    for raw_token in value.split(","):
+        start_raw, sep, end_raw = raw_token.partition("-")
+        start_day = parse_day_token(start_raw)
+        end_day = parse_day_token(end_raw) if sep else start_day
+        if start_day is None or end_day is None:
+            return None
+        days |= expand_day_range(start_day, end_day)
+    return days
+
+def parse_work_windows(value: str) -> dict[int, list[tuple[int, int]]] | None:
+    windows: dict[int, list[tuple[int, int]]] = {}
+    for clause in value.split(";"):
+        clause = clause.strip()
+        if not clause:
+            continue
+        days_raw, _, ranges_raw = clause.partition(" ")
+        ranges = parse_time_ranges(ranges_raw)
+        if not ranges:
+            return None
+        days = parse_window_days(days_raw)
+        if days is None:
+            logging.warning("Ignoring work hours window %r; unknown day in %r.", clause, days_raw)
+            continue
+        for day in days:
+            windows.setdefault(day, []).extend(ranges)
+    return windows or None
+
+def parse_schedule_exceptions(holidays: str, exceptions: str) -> dict[date, tuple] | None:
+    parsed: dict[date, tuple] = {}
+    try:
+        for raw_date in holidays.split(","):
+            if raw_date.strip():
+                parsed[date.fromisoformat(raw_date.strip())] = ()
+        for clause in exceptions.split(";"):
+            clause = clause.strip()
+            if not clause:
+                continue
+            date_raw, _, ranges_raw = clause.partition(" ")
+            ranges_raw = ranges_raw.strip()
+            if ranges_raw.lower() in {"", "off", "none", "closed"}:
+                ranges = []
+            else:
+                ranges = parse_time_ranges(ranges_raw)
+                if ranges is None:
+                    return None
+            parsed[date.fromisoformat(date_raw)] = tuple(sorted(ranges))
+    except ValueError:
+        return None
+    return parsed
+
+def merge_intervals(intervals) -> list[tuple]:
+    merged: list[list] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+def compile_work_schedule(day_windows: dict[int, list[tuple[int, int]]], exceptions: dict[date, tuple]) -> dict:
+    # Boundaries alternate start/end minutes since Monday 00:00, so an in-hours check is one bisect.
+    intervals = []
+    for day, windows in day_windows.items():
+        for start, end in windows:
+            week_start = day * DAY_MINUTES + start
+            week_end = day * DAY_MINUTES + end
+            if week_end > WEEK_MINUTES:
+                intervals.append((week_start, WEEK_MINUTES))
+                intervals.append((0, week_end - WEEK_MINUTES))
+            else:
+                intervals.append((week_start, week_end))
+    merged = merge_intervals(intervals)
+    wraps = bool(merged) and merged[0][0] == 0 and merged[-1][1] == WEEK_MINUTES
     return {
-        "start": start,
-        "end": end,
-        "days": days,
-        "start_minutes": start_minutes,
-        "end_minutes": end_minutes,
-        "overnight": end_minutes <= start_minutes,
+        "boundaries": tuple(point for interval in merged for point in interval),
+        "week_starts": tuple(start for start, _ in merged if not (wraps and start == 0)),
+        "weekday_windows": tuple(tuple(sorted(day_windows.get(day, ()))) for day in range(7)),
+        "exceptions": exceptions,
+        "exception_dates": tuple(sorted(exceptions)),
     }
 
+def build_work_hours_config(
+    work_hours_start: str,
+    work_hours_end: str,
+    work_hours_days: str,
+    group_index: int | None = None,
+    work_hours_windows: str = "",
+    holidays: str = "",
+    exceptions: str = "",
+) -> dict | None:
+    suffix = f" (group {group_index + 1})" if group_index is not None else ""
+    if work_hours_windows:
+        day_windows = parse_work_windows(work_hours_windows)
+        if not day_windows:
+            logging.warning("Invalid work hours windows%s: %s", suffix, work_hours_windows)
+            return None
+        start = end = None
+    else:
+        if not work_hours_start or not work_hours_end:
+            return None
+        start = parse_hhmm(work_hours_start)
+        end = parse_hhmm(work_hours_end)
+        if not start or not end:
+            logging.warning(
+                "Invalid work hours config%s: start=%s end=%s",
+                suffix,
+                work_hours_start,
+                work_hours_end,
+            )
+            return None
+        days = parse_days(work_hours_days)
+        if not days:
+            logging.warning("Invalid work hours days%s: %s", suffix, work_hours_days)
+            return None
+        window = parse_time_range(f"{work_hours_start}-{work_hours_end}")
+        day_windows = {day: [window] for day in days}
+    schedule_exceptions = parse_schedule_exceptions(holidays, exceptions)
+    if schedule_exceptions is None:
+        logging.warning("Invalid work hours holidays/exceptions%s: %s %s", suffix, holidays, exceptions)
+        schedule_exceptions = {}
+    windows = sorted({window for day_list in day_windows.values() for window in day_list})
+    config = {
+        "start": start or divmod(windows[0][0], 60),
+        "end": end or divmod(windows[-1][1] % DAY_MINUTES, 60),
+        "days": set(day_windows),
+        "windows": windows,
+        "schedule": compile_work_schedule(day_windows, schedule_exceptions),
+        "status_cache": None,
+    }
+    config["start_minutes"] = config["start"][0] * 60 + config["start"][1]
+    config["end_minutes"] = config["end"][0] * 60 + config["end"][1]
+    config["overnight"] = config["end_minutes"] <= config["start_minutes"]
+    return config
+
+def schedule_day_windows(schedule: dict, day: date) -> tuple:
+    return schedule["exceptions"].get(day, schedule["weekday_windows"][day.weekday()])
+
+def schedule_has_exception(schedule: dict, first: date, last: date) -> bool:
+    dates = schedule["exception_dates"]
+    position = bisect_left(dates, first)
+    return position < len(dates) and dates[position] <= last
+
+def localize_wall_time(day: date, minutes: int, tzinfo) -> datetime:
+    tz = lazy_import("dateutil.tz")
+
+    wall = datetime(day.year, day.month, day.day, tzinfo=tzinfo) + timedelta(minutes=minutes)
+    # Wall times inside a DST gap move forward to the first valid instant.
+    return tz.resolve_imaginary(wall)
+
 def is_within_work_hours(now_local: datetime, config: dict) -> bool:
+    schedule = config["schedule"]
+    day = now_local.date()
     minutes = now_local.hour * 60 + now_local.minute
-    day = now_local.weekday()
-    if not config["overnight"]:
-        return day in config["days"] and config["start_minutes"] <= minutes < config["end_minutes"]
-    prev_day = (day - 1) % 7
-    in_today_window = day in config["days"] and minutes >= config["start_minutes"]
-    in_prev_day_window = prev_day in config["days"] and minutes < config["end_minutes"]
-    return in_today_window or in_prev_day_window
+    if schedule_has_exception(schedule, day - timedelta(days=1), day):
+        previous = schedule_day_windows(schedule, day - timedelta(days=1))
+        return any(start <= minutes < end for start, end in schedule_day_windows(schedule, day)) or any(
+            start <= minutes + DAY_MINUTES < end for start, end in previous
+        )
+    week_minute = now_local.weekday() * DAY_MINUTES + minutes
+    return bisect_right(schedule["boundaries"], week_minute) % 2 == 1
 
 def next_work_start(now_local: datetime, config: dict) -> datetime | None:
-    if not config["days"]:
-        return None
-    start_hour, start_minute = config["start"]
-    for day_offset in range(0, 14):
-        candidate_date = (now_local + timedelta(days=day_offset)).date()
-        candidate_dt = datetime(
-            candidate_date.year,
-            candidate_date.month,
-            candidate_date.day,
-            start_hour,
-            start_minute,
-            tzinfo=now_local.tzinfo,
-        )
-        if candidate_dt.weekday() not in config["days"]:
-            continue
-        if candidate_dt <= now_local:
-            continue
-        return candidate_dt
+    schedule = config["schedule"]
+    day = now_local.date()
+    minutes = now_local.hour * 60 + now_local.minute
+    starts = schedule["week_starts"]
+    if starts:
+        week_minute = now_local.weekday() * DAY_MINUTES + minutes
+        position = bisect_right(starts, week_minute)
+        target = starts[position] if position < len(starts) else starts[0] + WEEK_MINUTES
+        offset = minutes + target - week_minute
+        candidate_day = day + timedelta(days=offset // DAY_MINUTES)
+        if not schedule_has_exception(schedule, day, candidate_day):
+            return localize_wall_time(candidate_day, offset % DAY_MINUTES, now_local.tzinfo)
+    # Exceptions or holidays sit between now and the weekly answer: walk
+    # the affected days, bounded by the number of exception dates.
+    for day_offset in range(0, len(schedule["exception_dates"]) + 8):
+        candidate_day = day + timedelta(days=day_offset)
+        for start, _ in schedule_day_windows(schedule, candidate_day):
+            if day_offset == 0 and start <= minutes:
+                continue
+            return localize_wall_time(candidate_day, start, now_local.tzinfo)
     return None
 
+def work_hours_valid_until(now_local: datetime, config: dict) -> float:
+    # The next weekly boundary, or the next minute while a date exception may apply.
+    schedule = config["schedule"]
+    day = now_local.date()
+    minutes = now_local.hour * 60 + now_local.minute
+    next_minute = localize_wall_time(day, minutes + 1, now_local.tzinfo).timestamp()
+    boundaries = schedule["boundaries"]
+    if not boundaries:
+        return next_minute
+    week_minute = now_local.weekday() * DAY_MINUTES + minutes
+    position = bisect_right(boundaries, week_minute)
+    target = boundaries[position] if position < len(boundaries) else boundaries[0] + WEEK_MINUTES
+    offset = minutes + target - week_minute
+    if schedule_has_exception(schedule, day - timedelta(days=1), day + timedelta(days=offset // DAY_MINUTES)):
+        return next_minute
+    return max(localize_wall_time(day, offset, now_local.tzinfo).timestamp(), next_minute)
+
 def format_work_hours_detail(config: dict) -> str:
-    start_hour, start_minute = config["start"]
-    end_hour, end_minute = config["end"]
-    start_display = format_time_12h(start_hour, start_minute)
-    end_display = format_time_12h(end_hour, end_minute)
-    return f"Outside working hours ({start_display}-{end_display})"
+    ranges = []
+    for start_minutes, end_minutes in config["windows"]:
+        start_display = format_time_12h(*divmod(start_minutes, 60))
+        end_display = format_time_12h(*divmod(end_minutes % DAY_MINUTES, 60))
+        ranges.append(f"{start_display}-{end_display}")
+    return f"Outside working hours ({', '.join(ranges)})"
 
 def format_time_12h(hour: int, minute: int) -> str:
     period = "AM" if hour < 12 else "PM"
@@ -407,19 +897,28 @@ def working_hours_status(config: dict | None, now: datetime | None = None) -> di
     if local_tz is None:
         return None
     current_local = (now or now_local(local_tz)).astimezone(local_tz)
+    current_ts = current_local.timestamp()
+    cached = config.get("status_cache")
+    # An out-of-hours result holds until the next work start, so it is
+    # reused across polls instead of being recomputed.
+    if cached and cached[0] is local_tz and cached[1] <= current_ts < cached[2]:
+        return dict(cached[3])
     if is_within_work_hours(current_local, config):
         return None
     next_start_local = next_work_start(current_local, config)
     until = None
     if next_start_local:
         until = next_start_local.isoformat()
-    return {
+    status = {
         "state": "ooo",
         "label": "OUT OF OFFICE",
         "detail": format_work_hours_detail(config),
         "until": until,
         "source": "working_hours",
     }
+    if next_start_local:
+        config["status_cache"] = (local_tz, current_ts, next_start_local.timestamp(), status)
+    return dict(status)
 
 def parse_iso(dt_str: str, local_tz) -> datetime | None:
     try:
@@ -448,7 +947,7 @@ def write_status(
         "source": source,
         "time_zone": TIMEZONE_NAME,
         "display_mode": DISPLAY_MODE,
-        "updated": datetime.now().isoformat(timespec="seconds"),
+        "updated": datetime.fromtimestamp(CLOCK()).isoformat(timespec="seconds"),
     }
     if until:
         payload["until"] = until
@@ -465,13 +964,119 @@ def write_status(
         os.replace(tmp, status_path)
     return payload
 
+EVENT_RULE_KINDS = ("ignore", "ooo")
+
+def default_event_rule_spec() -> dict:
+    return {
+        "ooo_keywords": OOO_KEYWORDS,
+        "ignore_keywords": IGNORE_KEYWORDS,
+        "ooo_patterns": parse_env_list("OOO_PATTERNS"),
+        "ignore_patterns": parse_env_list("IGNORE_PATTERNS"),
+        "ooo_categories": parse_env_list("OOO_CATEGORIES"),
+        "ignore_categories": parse_env_list("IGNORE_CATEGORIES"),
+        "ooo_organizers": parse_env_list("OOO_ORGANIZERS"),
+        "ignore_organizers": parse_env_list("IGNORE_ORGANIZERS"),
+    }
+
+def keyword_pattern(keyword: str) -> str:
+    # Lookarounds instead of \b so keywords that start or end with
+    # punctuation still only match whole words ("leave" but not "cleaver").
+    return rf"(?<!\w){re.escape(keyword.strip())}(?!\w)"
+
+def normalize_organizer(value) -> str:
+    text = str(value or "").strip().lower()
+    return text[len("mailto:"):] if text.startswith("mailto:") else text
+
+def compile_event_rules(spec: dict, group_index: int | None = None) -> dict:
+    suffix = f" (group {group_index + 1})" if group_index is not None else ""
+    rules = {}
+    for kind in EVENT_RULE_KINDS:
+        # Keywords share one alternation; each user pattern is compiled on its
+        # own so its groups and backreferences keep their meaning, and a bad
+        # pattern only loses itself.
+        matchers = []
+        keywords = [keyword_pattern(str(k)) for k in spec.get(f"{kind}_keywords", []) if str(k).strip()]
+        if keywords:
+            matchers.append(re.compile("|".join(keywords), re.IGNORECASE))
+        for pattern in spec.get(f"{kind}_patterns", []):
+            try:
+                matchers.append(re.compile(pattern, re.IGNORECASE))
+            except (re.error, TypeError) as exc:
+                logging.warning("Invalid %s pattern%s %r: %s", kind, suffix, pattern, exc)
+        rules[f"{kind}_matchers"] = tuple(matchers)
+        rules[f"{kind}_categories"] = frozenset(str(c).strip().lower() for c in spec.get(f"{kind}_categories", []))
+        organizers = [normalize_organizer(o) for o in spec.get(f"{kind}_organizers", [])]
+        rules[f"{kind}_organizers"] = frozenset(o for o in organizers if o and not o.startswith("@"))
+        rules[f"{kind}_domains"] = tuple(o for o in organizers if o.startswith("@"))
+    return rules
+
+def build_event_rules(overrides: dict | None = None, group_index: int | None = None) -> dict:
+    spec = default_event_rule_spec()
+    for key, value in (overrides or {}).items():
+        if key not in spec:
+            logging.warning("Unknown event rule %s for group %s", key, (group_index or 0) + 1)
+            continue
+        if isinstance(value, str):
+            value = [value]
+        elif not isinstance(value, (list, tuple)) or not all(isinstance(item, str) for item in value):
+            logging.warning(
+                "Invalid event rule %s=%r for group %s; expected a string or a list of strings",
+                key,
+                value,
+                (group_index or 0) + 1,
+            )
+            continue
+        spec[key] = list(value)
+    return compile_event_rules(spec, group_index)
+
+DEFAULT_EVENT_RULES = build_event_rules()
+
+def title_rule_kinds(text: str, rules: dict) -> set[str]:
+    if not text:
+        return set()
+    return {
+        kind
+        for kind in EVENT_RULE_KINDS
+        if any(matcher.search(text) for matcher in rules[f"{kind}_matchers"])
+    }
+
 def is_ooo(text: str) -> bool:
-    t = (text or "").lower()
-    return any(k in t for k in OOO_KEYWORDS)
+    return "ooo" in title_rule_kinds(text, DEFAULT_EVENT_RULES)
 
 def should_ignore(text: str) -> bool:
-    t = (text or "").lower()
-    return any(k in t for k in IGNORE_KEYWORDS)
+    return "ignore" in title_rule_kinds(text, DEFAULT_EVENT_RULES)
+
+def event_categories(event) -> set[str]:
+    prop = event.get("CATEGORIES")
+    if prop is None:
+        return set()
+    categories = set()
+    for item in prop if isinstance(prop, list) else [prop]:
+        for category in getattr(item, "cats", None) or str(item).split(","):
+            categories.add(str(category).strip().lower())
+    return categories
+
+def classify_event(event, rules: dict, cache: dict | None = None) -> int:
+    title = str(event.get("SUMMARY") or "Meeting")
+    categories = event_categories(event)
+    organizer = normalize_organizer(event.get("ORGANIZER"))
+    # Keyed on every field a rule reads, so an edited occurrence that keeps its UID and
+    # SEQUENCE is still classified from its own categories and organizer.
+    key = (str(event.get("UID") or ""), str(event.get("SEQUENCE") or 0), title, frozenset(categories), organizer)
+    flags = cache.get(key) if cache is not None else None
+    if flags is None:
+        kinds = title_rule_kinds(title, rules)
+        for kind in EVENT_RULE_KINDS:
+            if categories & rules[f"{kind}_categories"]:
+                kinds.add(kind)
+            if organizer and (
+                organizer in rules[f"{kind}_organizers"] or organizer.endswith(rules[f"{kind}_domains"])
+            ):
+                kinds.add(kind)
+        flags = (EVENT_OOO if "ooo" in kinds else 0) | (EVENT_IGNORED if "ignore" in kinds else 0)
+    if cache is not None:
+        cache[key] = flags
+    return flags
 
 def load_override(override_path: str) -> dict | None:
     if not os.path.exists(override_path):
@@ -492,30 +1097,276 @@ def load_override(override_path: str) -> dict | None:
         logging.exception("Failed to load override from %s", override_path)
         return None
 
-def fetch_ics_text(ics_url: str, cache_path: str) -> str:
-    import requests
-    from urllib.parse import parse_qs, urlparse, urlunparse
+FEED_REFRESH_STATES: dict[str, dict] = {}
+FETCH_SLOTS = threading.BoundedSemaphore(ICS_MAX_CONCURRENT_FETCHES)
 
-    cached_text = None
-    cache_age = None
-    if os.path.exists(cache_path):
+def jittered(seconds: float) -> float:
+    return seconds * (1 + random.uniform(-ICS_REFRESH_JITTER, ICS_REFRESH_JITTER))
+
+def cache_file_mtime(cache_path: str) -> float | None:
+    try:
+        return os.path.getmtime(cache_path)
+    except OSError:
+        return None
+
+def feed_refresh_state(cache_path: str, cache_mtime: float | None) -> dict:
+    state = FEED_REFRESH_STATES.get(cache_path)
+    if state is None:
+        digest = None
+        if cache_mtime is not None:
+            try:
+                digest = ics_cache_digest(cache_path)
+            except Exception:
+                logging.exception("Failed to read ICS cache %s", cache_path)
+                cache_mtime = None
+        interval = float(min(max(ICS_REFRESH_SECONDS, ICS_REFRESH_MIN_SECONDS), ICS_REFRESH_MAX_SECONDS))
+        state = {
+            "interval": interval,
+            # Jitter the first deadline too so groups restored from disk at
+            # boot do not all expire in the same poll.
+            "next_fetch": cache_mtime + jittered(interval) if cache_mtime is not None else 0.0,
+            "digest": digest,
+            "etag": None,
+            "last_modified": None,
+            "changes": 0,
+            "fetches": 0,
+            "breaker": "closed",
+            "failures": 0,
+            "open_until": 0.0,
+            "last_error": None,
+            "last_success": cache_mtime,
+            "lock": threading.Lock(),
+        }
+        FEED_REFRESH_STATES[cache_path] = state
+    return state
+
+def parse_cache_lifetime(headers, now_ts: float) -> float | None:
+    from email.utils import parsedate_to_datetime
+
+    directives = {}
+    for part in (headers.get("Cache-Control") or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip().strip('"')
+    if "no-store" in directives or "no-cache" in directives:
+        return 0.0
+    if "max-age" in directives:
         try:
-            with open(cache_path, "r") as f:
-                cached_text = f.read()
-            cache_age = time.time() - os.path.getmtime(cache_path)
-        except Exception:
-            logging.exception("Failed to read ICS cache %s", cache_path)
-            cached_text = None
-            cache_age = None
+            age = float(headers.get("Age") or 0)
+            return max(float(directives["max-age"]) - age, 0.0)
+        except ValueError:
+            return None
+    expires = headers.get("Expires")
+    if not expires:
+        return None
+    try:
+        expires_at = parsedate_to_datetime(expires).timestamp()
+        served_at = parsedate_to_datetime(headers["Date"]).timestamp() if headers.get("Date") else now_ts
+    except (TypeError, ValueError, IndexError, OverflowError):
+        # Invalid Expires values such as "0" mean "already expired".
+        return 0.0
+    return max(expires_at - served_at, 0.0)
+
+def seconds_until_active_refresh(now_ts: float, work_hours: dict | None) -> float:
+    local_tz = get_local_tz()
+    if local_tz is None:
+        return 0.0
+    now = datetime.fromtimestamp(now_ts, local_tz)
+    if work_hours:
+        if is_within_work_hours(now, work_hours):
+            return 0.0
+        start = next_work_start(now, work_hours)
+        return (start - now).total_seconds() if start else float(ICS_REFRESH_MAX_SECONDS)
+    window = parse_time_range(ICS_REFRESH_ACTIVE_HOURS)
+    if window is None:
+        return 0.0
+    minutes = now.hour * 60 + now.minute + now.second / 60
+    start, end = window
+    if start <= minutes < end or start <= minutes + DAY_MINUTES < end:
+        return 0.0
+    return ((start - minutes) % DAY_MINUTES) * 60
+
+def schedule_feed_refresh(
+    state: dict,
+    now_ts: float,
+    changed: bool | None,
+    lifetime: float | None = None,
+    work_hours: dict | None = None,
+) -> float:
+    # ``changed`` is None after a failed fetch, which retries at the minimum interval.
+    if changed:
+        state["interval"] = max(state["interval"] / 2, ICS_REFRESH_MIN_SECONDS)
+    elif changed is not None:
+        state["interval"] = min(state["interval"] * 1.5, ICS_REFRESH_MAX_SECONDS)
+    if changed is None:
+        delay = ICS_REFRESH_MIN_SECONDS
+    else:
+        delay = state["interval"]
+        idle = seconds_until_active_refresh(now_ts, work_hours)
+        if idle > 0:
+            # Poll less often off hours, but be back on the normal cadence
+            # by the time the day starts.
+            slow = min(delay * ICS_REFRESH_OFF_HOURS_FACTOR, ICS_REFRESH_MAX_SECONDS)
+            delay = max(delay, min(slow, idle))
+    delay = jittered(delay)
+    if lifetime is not None and changed is not None:
+        # Never revalidate before the server says the copy goes stale, but
+        # don't let a very long max-age stall the feed either.
+        delay = max(delay, min(lifetime, ICS_REFRESH_MAX_SECONDS))
+    state["next_fetch"] = now_ts + delay
+    return state["next_fetch"]
+
+def breaker_allows_fetch(state: dict, now_ts: float) -> bool:
+    # An open breaker lets exactly one caller probe once its backoff ends.
+    with state["lock"]:
+        if state["breaker"] == "closed":
+            return True
+        if state["breaker"] == "open" and now_ts >= state["open_until"]:
+            state["breaker"] = "half_open"
+            return True
+        return False
 
+def record_fetch_success(state: dict, now_ts: float):
+    with state["lock"]:
+        if state["breaker"] != "closed":
+            logging.info("ICS feed recovered after %s failed attempts.", state["failures"])
+        state["breaker"] = "closed"
+        state["failures"] = 0
+        state["last_error"] = None
+        state["last_success"] = now_ts
+
+def record_fetch_failure(state: dict, now_ts: float, error: Exception) -> float | None:
+    with state["lock"]:
+        state["failures"] += 1
+        state["last_error"] = f"{type(error).__name__}: {error}"[:200]
+        if state["breaker"] != "half_open" and state["failures"] < ICS_BREAKER_THRESHOLD:
+            return None
+        backoff = ICS_REFRESH_MIN_SECONDS * 2 ** max(state["failures"] - ICS_BREAKER_THRESHOLD, 0)
+        state["breaker"] = "open"
+        state["open_until"] = now_ts + jittered(min(backoff, ICS_BACKOFF_MAX_SECONDS))
+        return state["open_until"]
+
+def feed_health(cache_path: str) -> dict:
+    state = FEED_REFRESH_STATES.get(cache_path)
+    if state is None:
+        return {"stale": False, "breaker": "closed", "failures": 0}
+    health = {
+        # One failed fetch is often a transient 5xx; only a tripped breaker means the feed is down.
+        "stale": state["breaker"] != "closed" or state["failures"] >= ICS_BREAKER_THRESHOLD,
+        "breaker": state["breaker"],
+        "failures": state["failures"],
+    }
+    if state["last_success"]:
+        health["last_success"] = datetime.fromtimestamp(state["last_success"], timezone.utc)
+    if state["breaker"] == "open":
+        health["retry_at"] = datetime.fromtimestamp(state["open_until"], timezone.utc)
+    if state["last_error"]:
+        health["last_error"] = state["last_error"]
+    return health
+
+ICS_DOWNLOAD_CHUNK_BYTES = 64 * 1024
+ICS_HEADER_BYTES = 2000
+GZIP_MAGIC = b"\x1f\x8b"
+
+def open_ics_cache(cache_path: str):
+    # Caches written by older versions are not compressed.
+    with open(cache_path, "rb") as f:
+        compressed = f.read(2) == GZIP_MAGIC
+    return (gzip.open if compressed else open)(cache_path, "rb")
+
+def read_ics_cache(cache_path: str) -> str:
+    with open_ics_cache(cache_path) as f:
+        return f.read().decode("utf-8", "replace")
+
+def read_cached_feed(cache_path: str) -> str | None:
+    try:
+        return read_ics_cache(cache_path)
+    except Exception:
+        logging.exception("Failed to read ICS cache %s", cache_path)
+        return None
+
+# The same digest as ics_digest(), fed the raw bytes chunk by chunk.
+class TextDigest:
+    __slots__ = ("hash", "decoder")
+
+    def __init__(self):
+        self.hash = hashlib.blake2b(digest_size=16)
+        self.decoder = codecs.getincrementaldecoder("utf-8")("replace")
+
+    def update(self, chunk: bytes):
+        self.hash.update(self.decoder.decode(chunk).encode("utf-8", "surrogatepass"))
+
+    def digest(self) -> bytes:
+        self.hash.update(self.decoder.decode(b"", final=True).encode("utf-8", "surrogatepass"))
+        return self.hash.digest()
+
+def ics_cache_digest(cache_path: str) -> bytes:
+    digest = TextDigest()
+    with open_ics_cache(cache_path) as f:
+        for chunk in iter(lambda: f.read(ICS_DOWNLOAD_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+def stream_ics_to_cache(response, cache_path: str) -> bytes:
+    # Abandoned past ICS_MAX_BYTES, leaving the old cache in place.
+    length = response.headers.get("Content-Length")
+    if length and length.isdigit() and int(length) > ICS_MAX_BYTES:
+        raise RuntimeError(f"ICS feed is {length} bytes; limit is ICS_MAX_BYTES={ICS_MAX_BYTES}")
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp = cache_path + ".tmp"
+    digest = TextDigest()
+    head = b""
+    size = 0
+    try:
+        with gzip.open(tmp, "wb", compresslevel=6) as f:
+            for chunk in response.iter_content(chunk_size=ICS_DOWNLOAD_CHUNK_BYTES):
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > ICS_MAX_BYTES:
+                    raise RuntimeError(f"ICS feed exceeds ICS_MAX_BYTES={ICS_MAX_BYTES}")
+                if len(head) < ICS_HEADER_BYTES:
+                    head += chunk[: ICS_HEADER_BYTES - len(head)]
+                    if len(head) >= ICS_HEADER_BYTES and b"BEGIN:VCALENDAR" not in head:
+                        raise RuntimeError("ICS fetch did not return VCALENDAR")
+                digest.update(chunk)
+                f.write(chunk)
+        if b"BEGIN:VCALENDAR" not in head:
+            raise RuntimeError("ICS fetch did not return VCALENDAR")
+        os.replace(tmp, cache_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return digest.digest()
+
+def fetch_ics_text(ics_url: str, cache_path: str, work_hours: dict | None = None) -> str:
+    from urllib.parse import parse_qs, urlparse, urlunparse
+
+    cache_mtime = cache_file_mtime(cache_path)
+    state = feed_refresh_state(cache_path, cache_mtime)
+    # The cached text is only decoded on the paths that return it, so a
+    # refresh never holds the old and the new feed at once.
+    cached = cache_mtime is not None and state["digest"] is not None
+    now_ts = time.time()
     if ICS_REFRESH_SECONDS < 0:
         logging.warning("ICS_REFRESH_SECONDS=%s is invalid; forcing refresh", ICS_REFRESH_SECONDS)
-    if cached_text and cache_age is not None and cache_age < max(ICS_REFRESH_SECONDS, 0):
-        logging.debug("Using cached ICS file (%s seconds old).", int(cache_age))
-        return cached_text
+    if cached and ICS_REFRESH_SECONDS > 0 and now_ts < state["next_fetch"]:
+        logging.debug("Using cached ICS file (next refresh in %s seconds).", int(state["next_fetch"] - now_ts))
+        cached_text = read_cached_feed(cache_path)
+        if cached_text is not None:
+            return cached_text
+        cached = False
+    if not breaker_allows_fetch(state, now_ts):
+        cached_text = read_cached_feed(cache_path) if cached else None
+        if cached_text is not None:
+            logging.debug("ICS feed circuit open; using cached ICS.")
+            return cached_text
+        raise RuntimeError(f"ICS feed unavailable ({state['last_error']})")
 
     if not ics_url:
-        if cached_text:
+        cached_text = read_cached_feed(cache_path) if cached else None
+        if cached_text is not None:
             logging.warning("ICS_URLS entry is not set; using cached ICS")
             return cached_text
         raise RuntimeError("ICS_URLS entry is not set")
@@ -531,7 +1382,12 @@ def fetch_ics_text(ics_url: str, cache_path: str) -> str:
             if outlook_parsed.scheme in {"webcal", "webcals"}:
                 outlook_url = urlunparse(outlook_parsed._replace(scheme="https"))
             fetch_url = outlook_url
-    headers = {"User-Agent": "StatusScreenPi/1.0"}
+    headers = {"User-Agent": "StatusScreenPi/1.0", "Accept-Encoding": "gzip, deflate"}
+    if cached:
+        if state["etag"]:
+            headers["If-None-Match"] = state["etag"]
+        if state["last_modified"]:
+            headers["If-Modified-Since"] = state["last_modified"]
     verify = True
     if parse_env_falsey(ICS_CA_BUNDLE):
         verify = False
@@ -541,32 +1397,217 @@ def fetch_ics_text(ics_url: str, cache_path: str) -> str:
             logging.warning("ICS_CA_BUNDLE does not exist: %s (using system defaults)", ICS_CA_BUNDLE)
         else:
             verify = ICS_CA_BUNDLE
+    # Only now: a restart with fresh caches never needs the HTTP stack.
+    requests = lazy_import("requests")
     try:
         logging.debug("Fetching ICS URL: %s", fetch_url)
-        r = requests.get(
+        with FETCH_SLOTS, requests.get(
             fetch_url,
             headers=headers,
-            timeout=100,
+            timeout=(ICS_CONNECT_TIMEOUT, ICS_READ_TIMEOUT),
             allow_redirects=True,
             verify=verify,
-        )
-        r.raise_for_status()
-        text = r.text
-        if "BEGIN:VCALENDAR" not in text[:2000]:
-            raise RuntimeError("ICS fetch did not return VCALENDAR")
-        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-        tmp = cache_path + ".tmp"
-        with open(tmp, "w") as f:
-            f.write(text)
-        os.replace(tmp, cache_path)
+            stream=True,
+        ) as r:
+            state["fetches"] += 1
+            if r.status_code == 304 and cached:
+                logging.debug("ICS feed not modified since last fetch.")
+                os.utime(cache_path)
+                now_ts = time.time()
+                record_fetch_success(state, now_ts)
+                schedule_feed_refresh(state, now_ts, False, parse_cache_lifetime(r.headers, now_ts), work_hours)
+                return read_ics_cache(cache_path)
+            r.raise_for_status()
+            digest = stream_ics_to_cache(r, cache_path)
+        now_ts = time.time()
+        lifetime = parse_cache_lifetime(r.headers, now_ts)
+        changed = digest != state["digest"]
+        text = read_ics_cache(cache_path)
+        if changed:
+            state["changes"] += 1
+        state["digest"] = digest
+        state["etag"] = r.headers.get("ETag")
+        state["last_modified"] = r.headers.get("Last-Modified")
+        record_fetch_success(state, now_ts)
+        schedule_feed_refresh(state, now_ts, changed, lifetime, work_hours)
         return text
-    except Exception:
-        logging.exception("Failed to fetch ICS from %s", fetch_url)
-        if cached_text:
-            logging.warning("Using cached ICS after fetch failure.")
+    except Exception as ex:
+        now_ts = time.time()
+        if state["failures"] == 0:
+            logging.exception("Failed to fetch ICS from %s", fetch_url)
+        retry_at = record_fetch_failure(state, now_ts, ex)
+        if retry_at is None:
+            schedule_feed_refresh(state, now_ts, None, work_hours=work_hours)
+        else:
+            # Skip the normal schedule while open; breaker_allows_fetch gates retries.
+            state["next_fetch"] = retry_at
+            logging.warning(
+                "ICS feed %s failing (%s consecutive, %s); next attempt in %s seconds.",
+                fetch_url,
+                state["failures"],
+                state["last_error"],
+                int(retry_at - now_ts),
+            )
+        cached_text = read_cached_feed(cache_path) if cached else None
+        if cached_text is not None:
+            logging.debug("Using cached ICS after fetch failure.")
             return cached_text
         raise
 
+def local_source_path(url: str) -> str | None:
+    if not url.lower().startswith("file://"):
+        return None
+    from urllib.parse import unquote, urlparse
+
+    return unquote(urlparse(url).path)
+
+def local_source_files(path: str) -> list[str]:
+    if os.path.isdir(path):
+        return sorted(
+            entry.path
+            for entry in os.scandir(path)
+            if entry.name.lower().endswith(".ics") and entry.is_file()
+        )
+    return [path]
+
+def local_source_signature(files: list[str]) -> tuple:
+    signature = []
+    for path in files:
+        stat = os.stat(path)
+        signature.append((path, stat.st_ino, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+def read_ics_file(path: str) -> tuple[bytes, bytes]:
+    # Plain reads rather than mmap: a file rewritten in place on a network
+    # share while mapped would kill the process with SIGBUS.
+    with open(path, "rb") as f:
+        data = f.read(ICS_MAX_BYTES + 1)
+    if len(data) > ICS_MAX_BYTES:
+        raise RuntimeError(f"{path} exceeds ICS_MAX_BYTES={ICS_MAX_BYTES}")
+    if not data:
+        raise RuntimeError(f"{path} is empty")
+    begin = data.find(b"BEGIN:VCALENDAR", 0, ICS_HEADER_BYTES)
+    if begin < 0:
+        raise RuntimeError(f"{path} is not a VCALENDAR")
+    first = data.find(b"\nBEGIN:", begin + 1)
+    end = data.rfind(b"END:VCALENDAR")
+    if end < begin:
+        end = len(data)
+    if first < 0 or first > end:
+        return data[begin:end], b""
+    return data[begin : first + 1], data[first + 1 : end]
+
+def read_local_calendar(files: list[str]) -> str:
+    # Files in a directory share the first file's header.
+    header = b""
+    bodies = []
+    for path in files:
+        file_header, body = read_ics_file(path)
+        header = header or file_header
+        bodies.append(body)
+    return (header + b"".join(bodies) + b"END:VCALENDAR\r\n").decode("utf-8", "replace")
+
+def write_ics_cache(cache_path: str, text: str):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp = cache_path + ".tmp"
+    with gzip.open(tmp, "wb", compresslevel=6) as f:
+        f.write(text.encode("utf-8", "surrogatepass"))
+    os.replace(tmp, cache_path)
+
+def read_local_feed(url: str, cache_path: str) -> str:
+    path = local_source_path(url)
+    state = FEED_REFRESH_STATES.get(cache_path)
+    if state is None:
+        state = feed_refresh_state(cache_path, cache_file_mtime(cache_path))
+    now_ts = time.time()
+    try:
+        files = local_source_files(path)
+        if not files:
+            raise RuntimeError(f"No .ics files in {path}")
+        signature = local_source_signature(files)
+        text = read_local_calendar(files)
+    except Exception as ex:
+        if state["failures"] == 0:
+            logging.warning("Failed to read local calendar %s: %s", path, ex)
+        record_fetch_failure(state, now_ts, ex)
+        state["source_signature"] = None
+        if os.path.exists(cache_path):
+            logging.debug("Using cached ICS after local read failure.")
+            return read_ics_cache(cache_path)
+        raise
+    state["fetches"] += 1
+    digest = ics_digest(text)
+    if digest != state["digest"]:
+        state["changes"] += 1
+        state["digest"] = digest
+        try:
+            write_ics_cache(cache_path, text)
+        except OSError:
+            logging.exception("Failed to write ICS cache %s", cache_path)
+    state["source_signature"] = signature
+    record_fetch_success(state, now_ts)
+    return text
+
+def fetch_feed_text(feed: dict, work_hours: dict | None = None) -> str:
+    if local_source_path(feed["url"]) is not None:
+        return read_local_feed(feed["url"], feed["cache_path"])
+    return fetch_ics_text(feed["url"], feed["cache_path"], work_hours)
+
+# inotify(7) events that mean a file in a watched directory was written, replaced or removed.
+INOTIFY_CHANGE_MASK = 0x008 | 0x040 | 0x080 | 0x100 | 0x200
+LOCAL_CHANGE_SETTLE_SECONDS = 1
+
+# Directories are watched so renames are seen. inotify misses NFS writes from other
+# hosts; the per-cycle stat signatures catch those.
+class LocalSourceWatcher:
+    __slots__ = ("fd", "changed", "thread")
+
+    def __init__(self, directories: list[str]):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        for directory in directories:
+            if libc.inotify_add_watch(self.fd, os.fsencode(directory), INOTIFY_CHANGE_MASK) < 0:
+                logging.warning("Cannot watch %s for calendar changes: %s", directory, os.strerror(ctypes.get_errno()))
+        self.changed = threading.Event()
+        self.thread = threading.Thread(target=self.read_events, name="calendar-watch", daemon=True)
+        self.thread.start()
+
+    def read_events(self):
+        while True:
+            try:
+                if not os.read(self.fd, 4096):
+                    return
+            except OSError:
+                return
+            self.changed.set()
+
+    def wait(self, timeout: float) -> bool:
+        changed = self.changed.wait(max(timeout, 0))
+        if changed:
+            time.sleep(LOCAL_CHANGE_SETTLE_SECONDS)
+        self.changed.clear()
+        return changed
+
+def start_local_watcher(groups: list[dict]) -> LocalSourceWatcher | None:
+    directories = set()
+    for group in groups:
+        for feed in group.get("feeds") or ():
+            path = local_source_path(feed["url"])
+            if path is not None:
+                directories.add(path if os.path.isdir(path) else os.path.dirname(path) or ".")
+    if not directories or not sys.platform.startswith("linux"):
+        return None
+    try:
+        return LocalSourceWatcher(sorted(directories))
+    except OSError as ex:
+        logging.warning("Calendar change notifications unavailable (%s); checking mtimes each poll.", ex)
+        return None
+
 def extract_event_tzid(event, prop_name: str) -> str | None:
     target = prop_name.upper()
     if hasattr(event, "get"):
@@ -580,41 +1621,28 @@ def extract_event_tzid(event, prop_name: str) -> str | None:
                 return str(tzid)
     return None
 
-def apply_event_tzid(dt: datetime, event, prop_name: str) -> datetime:
-    if dt is None:
-        return dt
-    tzid = extract_event_tzid(event, prop_name)
-    if not tzid:
-        return dt
-    tzinfo = resolve_tzinfo(tzid)
-    if tzinfo is None:
-        return dt
-    if dt.tzinfo is None:
-        return dt.replace(tzinfo=tzinfo)
-    if dt.utcoffset() == timedelta(0) and tzid.upper() not in {"UTC", "Etc/UTC"}:
-        return dt.replace(tzinfo=tzinfo)
-    return dt
-
-def event_prop_datetime(event, prop_name: str, local_tz) -> datetime | None:
+def event_prop_datetime(event, prop_name: str, local_tz, tz_table: TimezoneTable | None = None) -> datetime | None:
     prop = event.get(prop_name)
     if prop is None:
         return None
     dt_value = prop.dt
     tzid = extract_event_tzid(event, prop_name)
-    tzinfo = resolve_tzinfo(tzid) if tzid else None
+    tzinfo = None
+    if tzid:
+        tzinfo = (tz_table if tz_table is not None else TimezoneTable())[tzid]
     if isinstance(dt_value, datetime):
-        if dt_value.tzinfo is None:
+        if dt_value.tzinfo is None or tzinfo is not None:
+            # The wall time is as written next to the TZID, so re-anchor it to
+            # the resolved zone rather than whatever the parser guessed.
             dt_value = dt_value.replace(tzinfo=tzinfo or local_tz)
-        elif tzinfo and dt_value.utcoffset() == timedelta(0) and tzid not in {"UTC", "Etc/UTC"}:
-            dt_value = dt_value.replace(tzinfo=tzinfo)
         return dt_value
     if isinstance(dt_value, date):
         return datetime(dt_value.year, dt_value.month, dt_value.day, tzinfo=tzinfo or local_tz)
     return None
 
-def event_times_to_local(event, local_tz) -> tuple[datetime, datetime]:
-    start = event_prop_datetime(event, "DTSTART", local_tz)
-    end = event_prop_datetime(event, "DTEND", local_tz)
+def event_times_to_local(event, local_tz, tz_table: TimezoneTable | None = None) -> tuple[datetime, datetime]:
+    start = event_prop_datetime(event, "DTSTART", local_tz, tz_table)
+    end = event_prop_datetime(event, "DTEND", local_tz, tz_table)
     if start is None:
         raise ValueError("Event start missing")
     if end is None:
@@ -625,19 +1653,6 @@ def event_times_to_local(event, local_tz) -> tuple[datetime, datetime]:
                 end = start + duration_value
     if end is None:
         end = start
-    if logging.getLogger().isEnabledFor(logging.DEBUG):
-        logging.debug(
-            "Event %s raw start=%s tz=%s end=%s tz=%s",
-            getattr(event, "name", None),
-            start,
-            getattr(start, "tzinfo", None),
-            end,
-            getattr(end, "tzinfo", None),
-        )
-    start = apply_event_tzid(start, event, "DTSTART")
-    end = apply_event_tzid(end, event, "DTEND")
-    start = coerce_event_timezone(start, local_tz)
-    end = coerce_event_timezone(end, local_tz)
     start_local = start.astimezone(local_tz)
     end_local = end.astimezone(local_tz)
     if logging.getLogger().isEnabledFor(logging.DEBUG):
@@ -685,169 +1700,809 @@ def is_all_day_event(event) -> bool:
     return False
 
 def parse_icalendar(ics_text: str):
-    from icalendar import Calendar
+    return lazy_import("icalendar").Calendar.from_ical(ics_text)
 
-    return Calendar.from_ical(ics_text)
+RRULE_WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+FAST_RRULE_PARTS = {"FREQ", "INTERVAL", "BYDAY", "COUNT", "UNTIL", "WKST"}
 
-def expanded_events(calendar, start: datetime, end: datetime):
-    from recurring_ical_events import of
+def comparable_time(value, tzinfo) -> datetime:
+    if not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day, tzinfo=tzinfo)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=tzinfo)
+    return value
+
+def occurrence_in_window(start, end, window_start: datetime, window_end: datetime) -> bool:
+    # Same inclusion rule as recurring_ical_events: starts inclusive, stops
+    # exclusive, and zero-length events count when they start inside the window.
+    start = comparable_time(start, window_start.tzinfo)
+    end = comparable_time(end, window_start.tzinfo)
+    if start == end:
+        return window_start <= start < window_end
+    return start < window_end and window_start < end
+
+def recurrence_keys(value) -> tuple:
+    if not isinstance(value, datetime):
+        return (datetime(value.year, value.month, value.day),)
+    if value.tzinfo is None:
+        return (value,)
+    return (value.astimezone(timezone.utc).replace(tzinfo=None), value.replace(tzinfo=None))
+
+def same_time_kind(first, second) -> bool:
+    if isinstance(first, datetime) != isinstance(second, datetime):
+        return False
+    if isinstance(first, datetime):
+        return (first.tzinfo is None) == (second.tzinfo is None)
+    return True
+
+def event_end_value(event, start):
+    end = event.get("DTEND")
+    if end is not None:
+        return end.dt
+    duration = event.get("DURATION")
+    if duration is not None:
+        duration_value = getattr(duration, "dt", duration)
+        if isinstance(duration_value, timedelta):
+            return start + duration_value
+        return None
+    if not isinstance(start, datetime):
+        return start + timedelta(days=1)
+    return start
 
+def prop_values(event, prop_name: str) -> list:
+    prop = event.get(prop_name)
+    if prop is None:
+        return []
+    values = []
+    for item in prop if isinstance(prop, list) else [prop]:
+        values.extend(value.dt for value in getattr(item, "dts", []))
+    return values
+
+def simple_rrule_plan(master) -> dict | None:
+    rule = master.get("RRULE")
+    if rule is None or isinstance(rule, list) or master.get("RDATE") is not None:
+        return None
+    if not set(rule) <= FAST_RRULE_PARTS:
+        return None
+    start_prop = master.get("DTSTART")
+    if start_prop is None:
+        return None
+    start = start_prop.dt
+    end = event_end_value(master, start)
+    if end is None or not same_time_kind(start, end) or end < start:
+        return None
     try:
-        return list(of(calendar).between(start, end))
+        freq = str(rule["FREQ"][0]).upper()
+        interval = int(rule.get("INTERVAL", [1])[0])
+        count = int(rule["COUNT"][0]) if "COUNT" in rule else None
+        until = rule["UNTIL"][0] if "UNTIL" in rule else None
+        wkst = RRULE_WEEKDAYS.index(str(rule.get("WKST", ["MO"])[0]).upper())
+        byday = {RRULE_WEEKDAYS.index(str(day).upper()) for day in rule.get("BYDAY", [])}
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+    if interval < 1 or (count is not None and count < 1):
+        return None
+    if count is not None and until is not None:
+        return None
+    if until is not None and not same_time_kind(start, until):
+        return None
+    exdates = prop_values(master, "EXDATE")
+    if any(isinstance(value, datetime) and not same_time_kind(start, value) for value in exdates):
+        return None
+    if freq == "DAILY" and byday and interval == 1:
+        freq = "WEEKLY"
+    if freq == "DAILY" and not byday:
+        period_days, offsets, start_offset = interval, (0,), 0
+    elif freq == "WEEKLY":
+        byday = byday or {start.weekday()}
+        if start.weekday() not in byday:
+            return None
+        period_days = 7 * interval
+        offsets = tuple(sorted((day - wkst) % 7 for day in byday))
+        start_offset = (start.weekday() - wkst) % 7
+    else:
+        return None
+    return {
+        "start": start,
+        "duration": end - start,
+        "period_days": period_days,
+        "offsets": offsets,
+        "start_offset": start_offset,
+        "first_period_count": sum(1 for offset in offsets if offset >= start_offset),
+        "count": count,
+        "until": until,
+        "exdate_keys": {key for value in exdates for key in recurrence_keys(value)},
+        "exdate_dates": {value for value in exdates if not isinstance(value, datetime)},
+    }
+
+def iter_simple_rrule(plan: dict, window_start: datetime, window_end: datetime):
+    start = plan["start"]
+    duration = plan["duration"]
+    period_days = plan["period_days"]
+    offsets = plan["offsets"]
+    start_offset = plan["start_offset"]
+    count = plan["count"]
+    until = plan["until"]
+    tzinfo = window_start.tzinfo
+    # Two days of slack cover DST shifts and floating/all-day conversions.
+    lead_days = (window_start - comparable_time(start, tzinfo) - duration).days - 2
+    period = max(0, (lead_days + start_offset) // period_days)
+    while True:
+        for position, offset in enumerate(offsets):
+            day = period * period_days + offset - start_offset
+            if day < 0:
+                continue
+            if count is not None:
+                if period == 0:
+                    index = position - (len(offsets) - plan["first_period_count"])
+                else:
+                    index = plan["first_period_count"] + (period - 1) * len(offsets) + position
+                if index >= count:
+                    return
+            occurrence = start + timedelta(days=day)
+            if until is not None and occurrence > until:
+                return
+            if comparable_time(occurrence, tzinfo) >= window_end:
+                return
+            if (
+                isinstance(occurrence, datetime) and occurrence.date() in plan["exdate_dates"]
+            ) or occurrence in plan["exdate_dates"]:
+                continue
+            if plan["exdate_keys"].intersection(recurrence_keys(occurrence)):
+                continue
+            yield occurrence, occurrence + duration
+        period += 1
+
+def occurrence_component(master, start, end):
+    from icalendar.prop import vDDDTypes
+
+    component = master.copy()
+    for prop_name, value in (("DTSTART", start), ("DTEND", end)):
+        prop = vDDDTypes(value)
+        tzid = extract_event_tzid(master, prop_name) or extract_event_tzid(master, "DTSTART")
+        if tzid and isinstance(value, datetime) and value.tzinfo is None:
+            prop.params["TZID"] = tzid
+        component[prop_name] = prop
+    component.pop("DURATION", None)
+    for prop_name in ("RRULE", "RDATE", "EXDATE"):
+        component.pop(prop_name, None)
+    component["RECURRENCE-ID"] = vDDDTypes(start)
+    return component
+
+def fast_expand_series(components: list, start: datetime, end: datetime) -> list | None:
+    # None means the rule is not supported and the library expands it.
+    masters = [c for c in components if c.get("RECURRENCE-ID") is None]
+    modifications = [c for c in components if c.get("RECURRENCE-ID") is not None]
+    if len(masters) != 1:
+        return None
+    master = masters[0]
+    if master.get("DTSTART") is None:
+        return None
+    if master.get("RRULE") is None:
+        if modifications or master.get("RDATE") is not None or master.get("EXDATE") is not None:
+            return None
+        master_start = master.get("DTSTART").dt
+        master_end = event_end_value(master, master_start)
+        if master_end is None or not same_time_kind(master_start, master_end):
+            return None
+        return [master] if occurrence_in_window(master_start, master_end, start, end) else []
+    plan = simple_rrule_plan(master)
+    if plan is None:
+        return None
+    modified_keys = set()
+    events = []
+    for modification in modifications:
+        recurrence_id = modification.get("RECURRENCE-ID")
+        if (
+            "RANGE" in recurrence_id.params
+            or modification.get("RRULE") is not None
+            or modification.get("RDATE") is not None
+            or modification.get("DTSTART") is None
+        ):
+            return None
+        keys = set(recurrence_keys(recurrence_id.dt))
+        if keys & modified_keys:
+            return None
+        modified_keys |= keys
+        if keys & plan["exdate_keys"]:
+            continue
+        mod_start = modification.get("DTSTART").dt
+        mod_end = event_end_value(modification, mod_start)
+        if mod_end is None or not same_time_kind(mod_start, mod_end):
+            return None
+        if occurrence_in_window(mod_start, mod_end, start, end):
+            events.append(modification)
+    for occ_start, occ_end in iter_simple_rrule(plan, start, end):
+        if modified_keys.intersection(recurrence_keys(occ_start)):
+            continue
+        if occurrence_in_window(occ_start, occ_end, start, end):
+            events.append(occurrence_component(master, occ_start, occ_end))
+    return events
+
+def library_expanded_events(calendar, components: list, start: datetime, end: datetime) -> list:
+    of = lazy_import("recurring_ical_events").of
+
+    subset = lazy_import("icalendar").Calendar()
+    for timezone_component in calendar.walk("VTIMEZONE"):
+        subset.add_component(timezone_component)
+    for component in components:
+        subset.add_component(component)
+    try:
+        return list(of(subset).between(start, end))
     except Exception:
         logging.debug("Failed to expand recurring events", exc_info=True)
-        return list(calendar.walk("VEVENT"))
+        return list(components)
 
-def current_calendar_event(ics_text: str) -> dict | None:
-    local_tz = get_local_tz()
-    if local_tz is None:
-        return None
-    now = now_local(local_tz)
+def expanded_events(calendar, start: datetime, end: datetime):
+    series: dict[str, list] = {}
+    fallback = []
+    for event in calendar.walk("VEVENT"):
+        uid = event.get("UID")
+        if uid is None:
+            fallback.append(event)
+            continue
+        series.setdefault(str(uid), []).append(event)
+    events = []
+    for components in series.values():
+        try:
+            expanded = fast_expand_series(components, start, end)
+        except Exception:
+            logging.debug("Fast recurrence expansion failed", exc_info=True)
+            expanded = None
+        if expanded is None:
+            fallback.extend(components)
+        else:
+            events.extend(expanded)
+    if fallback:
+        events.extend(library_expanded_events(calendar, fallback, start, end))
+    return events
+
+EVENT_ALL_DAY = 1
+EVENT_OOO = 2
+EVENT_BUSY_OOO = 4
+EVENT_IGNORED = 8
+INDEX_LOOKBEHIND = timedelta(days=1)
+INDEX_LOOKAHEAD = timedelta(days=90)
+INDEX_REBUILD_SECONDS = 3600
+
+# Column-wise UTC epoch seconds sorted by start: a few dozen bytes per occurrence
+# instead of an icalendar component tree.
+class CalendarIndex:
+    __slots__ = (
+        "starts",
+        "ends",
+        "flags",
+        "titles",
+        "tzid_codes",
+        "tzids",
+        "ends_reach",
+        "window_start",
+        "window_end",
+        "built_at",
+        "digest",
+    )
+
+    def __init__(self, records: list, window_start: float, window_end: float, built_at: float, digest: bytes = b""):
+        records.sort(key=lambda record: record[0])
+        tzids: dict[str, int] = {}
+        self.starts = array("d", (record[0] for record in records))
+        self.ends = array("d", (record[1] for record in records))
+        self.flags = array("B", (record[3] for record in records))
+        self.titles = [record[2] for record in records]
+        self.tzid_codes = array("H", (tzids.setdefault(record[4], len(tzids)) for record in records))
+        self.tzids = tuple(tzids)
+        # Latest end among occurrences up to each position, so a long vacation does not make
+        # the current-event lookup walk every meeting inside it.
+        self.ends_reach = array("d", accumulate(self.ends, max))
+        self.window_start = window_start
+        self.window_end = window_end
+        self.built_at = built_at
+        self.digest = digest
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+def ics_digest(ics_text: str) -> bytes:
+    return hashlib.blake2b(ics_text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+def build_calendar_index(
+    ics_text: str,
+    local_tz,
+    now: datetime,
+    rules: dict | None = None,
+    mode: str = "all",
+) -> CalendarIndex | None:
     try:
         cal = parse_icalendar(ics_text)
     except Exception:
         logging.exception("Failed to parse ICS calendar")
         return None
 
-    active = []
-    window_start = now - timedelta(days=1)
-    window_end = now + timedelta(days=1)
+    window_start = now - INDEX_LOOKBEHIND
+    window_end = now + INDEX_LOOKAHEAD
+    tz_table = build_tz_table(cal)
+    rules = rules or DEFAULT_EVENT_RULES
+    classifications: dict = {}
+    records = []
     for e in expanded_events(cal, window_start, window_end):
         name = str(e.get("SUMMARY") or "Meeting")
-        if should_ignore(name):
+        flags = classify_event(e, rules, classifications)
+        if flags & EVENT_IGNORED:
             continue
         try:
-            start_local, end_local = event_times_to_local(e, local_tz)
+            start_local, end_local = event_times_to_local(e, local_tz, tz_table)
         except Exception:
             logging.debug("Failed to parse event times for %s", name)
             continue
+        busy_status = microsoft_busy_status(e) if USE_MS_BUSY_STATUS else None
+        if busy_status == "free":
+            continue
+        if busy_status == "ooo":
+            flags |= EVENT_OOO | EVENT_BUSY_OOO
+        if mode == "ooo" and not flags & EVENT_OOO:
+            continue
+        if mode == "meeting":
+            flags &= ~(EVENT_OOO | EVENT_BUSY_OOO)
+        if is_all_day_event(e):
+            flags |= EVENT_ALL_DAY
+        if ALLDAY_ONLY_COUNTS_IF_OOO and flags & EVENT_ALL_DAY and not flags & EVENT_OOO:
+            continue
+        records.append(
+            (
+                start_local.timestamp(),
+                end_local.timestamp(),
+                sys.intern(name),
+                flags,
+                sys.intern(extract_event_tzid(e, "DTSTART") or ""),
+            )
+        )
+    # The index is cached per feed digest, so each series is classified once
+    # per feed version; drop the parsed tree before the columns are allocated.
+    del cal
+    return CalendarIndex(
+        records,
+        window_start.timestamp(),
+        window_end.timestamp(),
+        now.timestamp(),
+        ics_digest(ics_text),
+    )
 
-        if start_local <= now < end_local:
-            busy_status = microsoft_busy_status(e) if USE_MS_BUSY_STATUS else None
-            event_is_ooo = is_ooo(name) or busy_status == "ooo"
-            if ALLDAY_ONLY_COUNTS_IF_OOO and is_all_day_event(e) and not event_is_ooo:
-                continue
-            if busy_status == "free":
-                continue
-            active.append((start_local, end_local, name, busy_status))
+CALENDAR_INDEXES: dict[str, CalendarIndex] = {}
+INDEX_SNAPSHOT_VERSION = 1
+
+def index_snapshot_fingerprint(rules: dict | None, mode: str) -> str:
+    parts = [
+        INDEX_SNAPSHOT_VERSION,
+        mode,
+        TIMEZONE_NAME,
+        USE_MS_BUSY_STATUS,
+        ALLDAY_ONLY_COUNTS_IF_OOO,
+        INDEX_LOOKBEHIND.total_seconds(),
+        INDEX_LOOKAHEAD.total_seconds(),
+    ]
+    for key, value in sorted((rules or DEFAULT_EVENT_RULES).items()):
+        if isinstance(value, tuple):
+            value = [item.pattern if isinstance(item, re.Pattern) else item for item in value]
+        elif isinstance(value, frozenset):
+            value = sorted(value)
+        parts.append((key, value))
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+def write_index_snapshot(path: str, index: CalendarIndex, fingerprint: str):
+    payload = {
+        "fingerprint": fingerprint,
+        "digest": index.digest.hex(),
+        "window": [index.window_start, index.window_end],
+        "built_at": index.built_at,
+        "starts": index.starts.tolist(),
+        "ends": index.ends.tolist(),
+        "flags": index.flags.tolist(),
+        "titles": index.titles,
+        "tzid_codes": index.tzid_codes.tolist(),
+        "tzids": index.tzids,
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f, separators=(",", ":"))
+    os.replace(tmp, path)
 
-    if not active:
+def read_index_snapshot(path: str, digest: bytes, fingerprint: str, now: float) -> CalendarIndex | None:
+    try:
+        with open(path) as f:
+            payload = json.load(f)
+        if payload["fingerprint"] != fingerprint or payload["digest"] != digest.hex():
+            return None
+        if not 0 <= now - payload["built_at"] < INDEX_REBUILD_SECONDS:
+            return None
+        tzids = payload["tzids"]
+        records = [
+            (start, end, sys.intern(title), flags, sys.intern(tzids[code]))
+            for start, end, title, flags, code in zip(
+                payload["starts"], payload["ends"], payload["titles"], payload["flags"], payload["tzid_codes"]
+            )
+        ]
+        window_start, window_end = payload["window"]
+        return CalendarIndex(records, window_start, window_end, payload["built_at"], digest)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError, IndexError):
+        logging.warning("Ignoring unreadable index snapshot %s", path, exc_info=True)
         return None
-    active.sort(key=lambda x: x[0])
-    return {"name": active[0][2], "end": active[0][1], "busy_status": active[0][3]}
 
-def next_calendar_event(ics_text: str) -> dict | None:
+def load_calendar_index(
+    key: str,
+    ics_text: str,
+    rules: dict | None = None,
+    mode: str = "all",
+    snapshot_path: str | None = None,
+) -> CalendarIndex | None:
+    # A snapshot lets a restarted resolver skip importing icalendar and parsing the feed.
     local_tz = get_local_tz()
     if local_tz is None:
         return None
     now = now_local(local_tz)
-    try:
-        cal = parse_icalendar(ics_text)
-    except Exception:
-        logging.exception("Failed to parse ICS calendar")
+    digest = ics_digest(ics_text)
+    index = CALENDAR_INDEXES.get(key)
+    if index is not None and index.digest == digest and 0 <= now.timestamp() - index.built_at < INDEX_REBUILD_SECONDS:
+        return index
+    CALENDAR_INDEXES.pop(key, None)
+    snapshot_path = snapshot_path if INDEX_SNAPSHOTS else None
+    fingerprint = index_snapshot_fingerprint(rules, mode) if snapshot_path else ""
+    index = read_index_snapshot(snapshot_path, digest, fingerprint, now.timestamp()) if snapshot_path else None
+    if index is None:
+        index = build_calendar_index(ics_text, local_tz, now, rules, mode)
+        if index is not None and snapshot_path:
+            try:
+                write_index_snapshot(snapshot_path, index, fingerprint)
+            except OSError as ex:
+                logging.warning("Failed to write index snapshot %s: %s", snapshot_path, ex)
+    if index is not None:
+        CALENDAR_INDEXES[key] = index
+    return index
+
+def union_records(records: list) -> list[list]:
+    merged: list[list] = []
+    for record in sorted(records, key=lambda item: (item[0], item[1])):
+        last = merged[-1] if merged else None
+        if last is not None and (record[0] < last[1] or record[:2] == tuple(last[:2])):
+            last[1] = max(last[1], record[1])
+            last[3] |= record[3]
+        else:
+            merged.append(list(record))
+    return merged
+
+def subtract_intervals(records: list[list], intervals: list[tuple]) -> list[tuple]:
+    pieces = []
+    position = 0
+    for start, end, *rest in records:
+        while position < len(intervals) and intervals[position][1] <= start:
+            position += 1
+        cursor = start
+        probe = position
+        while probe < len(intervals) and intervals[probe][0] < end:
+            if intervals[probe][0] > cursor:
+                pieces.append((cursor, intervals[probe][0], *rest))
+            cursor = max(cursor, intervals[probe][1])
+            probe += 1
+        if cursor < end or (start == end and probe == position):
+            pieces.append((cursor, end, *rest))
+    return pieces
+
+def merge_calendar_indexes(indexes: list[CalendarIndex]) -> CalendarIndex:
+    # Out-of-office wins where it overlaps a meeting; the result is disjoint, so a lookup is one bisect.
+    ooo_records = []
+    meeting_records = []
+    for index in indexes:
+        for position in range(len(index)):
+            record = (
+                index.starts[position],
+                index.ends[position],
+                index.titles[position],
+                index.flags[position],
+                index.tzids[index.tzid_codes[position]],
+            )
+            (ooo_records if record[3] & EVENT_OOO else meeting_records).append(record)
+    ooo_blocks = union_records(ooo_records)
+    busy = merge_intervals((start, end) for start, end, *_ in ooo_blocks)
+    records = [tuple(block) for block in ooo_blocks]
+    records.extend(subtract_intervals(union_records(meeting_records), busy))
+    return CalendarIndex(
+        records,
+        max(index.window_start for index in indexes),
+        min(index.window_end for index in indexes),
+        min(index.built_at for index in indexes),
+        merged_index_digest(indexes),
+    )
+
+def merged_index_digest(indexes: list[CalendarIndex]) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    for index in indexes:
+        digest.update(index.digest)
+        digest.update(str(index.built_at).encode("ascii"))
+    return digest.digest()
+
+def fresh_feed_index(cache_path: str) -> CalendarIndex | None:
+    state = FEED_REFRESH_STATES.get(cache_path)
+    index = CALENDAR_INDEXES.get(cache_path)
+    if state is None or index is None or ICS_REFRESH_SECONDS <= 0 or state["breaker"] != "closed":
+        return None
+    if time.time() >= state["next_fetch"] or index.digest != state["digest"]:
         return None
+    local_tz = get_local_tz()
+    if local_tz is None or not 0 <= now_local(local_tz).timestamp() - index.built_at < INDEX_REBUILD_SECONDS:
+        return None
+    return index
 
-    upcoming = []
-    window_end = now + timedelta(days=90)
-    for e in expanded_events(cal, now, window_end):
-        name = str(e.get("SUMMARY") or "Meeting")
-        if should_ignore(name):
+def fresh_local_index(feed: dict) -> CalendarIndex | None:
+    state = FEED_REFRESH_STATES.get(feed["cache_path"])
+    index = CALENDAR_INDEXES.get(feed["cache_path"])
+    if state is None or index is None or not state.get("source_signature") or index.digest != state["digest"]:
+        return None
+    try:
+        signature = local_source_signature(local_source_files(local_source_path(feed["url"])))
+    except OSError:
+        return None
+    if signature != state["source_signature"]:
+        return None
+    local_tz = get_local_tz()
+    if local_tz is None or not 0 <= now_local(local_tz).timestamp() - index.built_at < INDEX_REBUILD_SECONDS:
+        return None
+    return index
+
+def load_group_index(group: dict) -> CalendarIndex | None:
+    feeds = group.get("feeds") or [
+        {"url": group["ics_url"], "cache_path": group["cache_path"], "rules": group.get("event_rules"), "mode": "all"}
+    ]
+    indexes = []
+    first_error = None
+    for feed in feeds:
+        if local_source_path(feed["url"]) is not None:
+            index = fresh_local_index(feed)
+        else:
+            index = fresh_feed_index(feed["cache_path"])
+        if index is not None:
+            indexes.append(index)
             continue
         try:
-            start_local, end_local = event_times_to_local(e, local_tz)
-        except Exception:
-            logging.debug("Failed to parse event times for %s", name)
-            continue
-        if start_local <= now:
-            continue
-        busy_status = microsoft_busy_status(e) if USE_MS_BUSY_STATUS else None
-        event_is_ooo = is_ooo(name) or busy_status == "ooo"
-        if ALLDAY_ONLY_COUNTS_IF_OOO and is_all_day_event(e) and not event_is_ooo:
-            continue
-        if busy_status == "free":
+            ics_text = fetch_feed_text(feed, group.get("work_hours"))
+        except Exception as ex:
+            if len(feeds) == 1:
+                raise
+            logging.warning("Skipping feed %s for %s: %s", feed["url"], group.get("display_name", ""), ex)
+            first_error = first_error or ex
             continue
-        upcoming.append((start_local, end_local, name))
+        index = load_calendar_index(
+            feed["cache_path"], ics_text, feed["rules"], feed["mode"], feed["cache_path"] + ".index"
+        )
+        if index is not None:
+            indexes.append(index)
+    if len(feeds) == 1:
+        return indexes[0] if indexes else None
+    if not indexes:
+        if first_error is not None:
+            raise first_error
+        return None
+    key = group["cache_path"] + "#merged"
+    cached = CALENDAR_INDEXES.get(key)
+    if cached is not None and cached.digest == merged_index_digest(indexes):
+        return cached
+    merged = merge_calendar_indexes(indexes)
+    CALENDAR_INDEXES[key] = merged
+    return merged
+
+def current_position(index: CalendarIndex, now_ts: float) -> int:
+    # Everything before the first position whose reach passes now_ts has already ended.
+    position = bisect_right(index.ends_reach, now_ts)
+    if position < len(index) and index.starts[position] <= now_ts:
+        return position
+    return -1
+
+def current_event_from_index(index: CalendarIndex, now: datetime, local_tz) -> dict | None:
+    match = current_position(index, now.timestamp())
+    if match < 0:
+        return None
+    return {
+        "name": index.titles[match],
+        "end": datetime.fromtimestamp(index.ends[match], local_tz),
+        "busy_status": "ooo" if index.flags[match] & EVENT_BUSY_OOO else None,
+        "ooo": bool(index.flags[match] & EVENT_OOO),
+    }
 
-    if not upcoming:
+def next_event_from_index(index: CalendarIndex, now: datetime, local_tz) -> dict | None:
+    position = bisect_right(index.starts, now.timestamp())
+    if position >= len(index):
         return None
-    upcoming.sort(key=lambda x: x[0])
-    return {"name": upcoming[0][2], "start": upcoming[0][0]}
+    return {
+        "name": index.titles[position],
+        "start": datetime.fromtimestamp(index.starts[position], local_tz),
+    }
+
+def current_calendar_event(ics_text: str | None, index: CalendarIndex | None = None) -> dict | None:
+    local_tz = get_local_tz()
+    if local_tz is None:
+        return None
+    now = now_local(local_tz)
+    if index is None:
+        index = build_calendar_index(ics_text, local_tz, now)
+    if index is None:
+        return None
+    return current_event_from_index(index, now, local_tz)
+
+def next_calendar_event(ics_text: str | None, index: CalendarIndex | None = None) -> dict | None:
+    local_tz = get_local_tz()
+    if local_tz is None:
+        return None
+    now = now_local(local_tz)
+    if index is None:
+        index = build_calendar_index(ics_text, local_tz, now)
+    if index is None:
+        return None
+    return next_event_from_index(index, now, local_tz)
 
 def same_local_day(first: datetime, second: datetime) -> bool:
     return first.date() == second.date()
 
+def display_next_event_at(start_local: datetime, now: datetime, work_hours: dict | None) -> str | None:
+    if not same_local_day(start_local, now):
+        return None
+    if work_hours and not is_within_work_hours(start_local, work_hours):
+        return None
+    return start_local.isoformat()
+
 def next_event_for_display(
-    ics_text: str,
+    ics_text: str | None,
     work_hours: dict | None,
+    index: CalendarIndex | None = None,
 ) -> str | None:
     local_tz = get_local_tz()
     if local_tz is None:
         return None
     now = now_local(local_tz)
-    next_ev = next_calendar_event(ics_text)
+    next_ev = next_calendar_event(ics_text, index)
     if not next_ev:
         return None
     start_local = next_ev["start"]
     if start_local.tzinfo is None:
         start_local = start_local.replace(tzinfo=local_tz)
-    start_local = start_local.astimezone(local_tz)
-    if not same_local_day(start_local, now):
-        return None
-    if work_hours and not is_within_work_hours(start_local, work_hours):
-        return None
-    return start_local.isoformat()
+    return display_next_event_at(start_local.astimezone(local_tz), now, work_hours)
+
+PUBLISHED_AVAILABILITY: dict[int, tuple] = {}
+
+def working_intervals(work_hours: dict, window_start: float, window_end: float, local_tz) -> list[tuple]:
+    schedule = work_hours["schedule"]
+    day = datetime.fromtimestamp(window_start, local_tz).date() - timedelta(days=1)
+    last = datetime.fromtimestamp(window_end, local_tz).date()
+    intervals = []
+    while day <= last:
+        for start, end in schedule_day_windows(schedule, day):
+            start_ts = localize_wall_time(day, start, local_tz).timestamp()
+            end_ts = localize_wall_time(day, end, local_tz).timestamp()
+            if end_ts > window_start and start_ts < window_end:
+                intervals.append((max(start_ts, window_start), min(end_ts, window_end)))
+        day += timedelta(days=1)
+    return merge_intervals(intervals)
+
+def publish_availability(group: dict, index: CalendarIndex):
+    # Rewritten only when the index changes, so the availability API never touches ICS.
+    key = group.get("index", 0)
+    if PUBLISHED_AVAILABILITY.get(key) == (index.digest, index.built_at):
+        return
+    local_tz = get_local_tz()
+    if local_tz is None:
+        return
+    work_hours = group.get("work_hours")
+    payload = {
+        "index": key,
+        "name": group.get("display_name", ""),
+        "window": [index.window_start, index.window_end],
+        "busy": merge_intervals(
+            (start, end) for start, end in zip(index.starts, index.ends) if end > start
+        ),
+        "work": (
+            working_intervals(work_hours, index.window_start, index.window_end, local_tz)
+            if work_hours
+            else None
+        ),
+    }
+    os.makedirs(AVAILABILITY_DIR, exist_ok=True)
+    path = os.path.join(AVAILABILITY_DIR, f"group-{key + 1}.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f, separators=(",", ":"))
+    os.replace(tmp, path)
+    PUBLISHED_AVAILABILITY[key] = (index.digest, index.built_at)
+
+def annotate_feed_health(group: dict, payload: dict) -> dict:
+    feeds = group.get("feeds") or [{"cache_path": group["cache_path"]}]
+    stale = [health for health in (feed_health(feed["cache_path"]) for feed in feeds) if health["stale"]]
+    if stale:
+        payload["calendar_stale"] = True
+        updated = [health["last_success"] for health in stale if "last_success" in health]
+        if updated:
+            payload["calendar_updated"] = min(updated).isoformat(timespec="seconds")
+    return payload
 
 def resolve_and_write(group: dict) -> dict:
-    display_name = group.get("display_name", "")
+    return annotate_feed_health(group, resolve_group_status(group))
+
+def refresh_group_index(group: dict) -> CalendarIndex | None:
+    index = load_group_index(group)
+    if index is not None:
+        try:
+            publish_availability(group, index)
+        except OSError:
+            logging.exception("Failed to publish availability for %s", group.get("display_name", ""))
+    return index
+
+def resolve_group_status(group: dict) -> dict:
+    ev = None
     next_event_at = None
     error_detail = None
+    index = None
     try:
-        ics_text = fetch_ics_text(group["ics_url"], group["cache_path"])
-        ev = current_calendar_event(ics_text)
-        next_event_at = next_event_for_display(ics_text, group.get("work_hours"))
-        if ev:
-            name = ev["name"]
-            detail = name if SHOW_EVENT_DETAILS else ""
-            until = ev["end"].isoformat()
-            busy_status = ev.get("busy_status")
-            if USE_MS_BUSY_STATUS and busy_status == "ooo":
-                return write_status(
-                    "ooo",
-                    "OUT OF OFFICE",
-                    detail,
-                    source="calendar",
-                    until=until,
-                    next_event_at=next_event_at,
-                    name=display_name,
-                    status_path=None,
-                )
-            elif is_ooo(name):
-                return write_status(
-                    "ooo",
-                    "OUT OF OFFICE",
-                    detail,
-                    source="calendar",
-                    until=until,
-                    next_event_at=next_event_at,
-                    name=display_name,
-                    status_path=None,
-                )
-            else:
-                return write_status(
-                    "meeting",
-                    "IN A MEETING",
-                    detail,
-                    source="calendar",
-                    until=until,
-                    next_event_at=next_event_at,
-                    name=display_name,
-                    status_path=None,
-                )
+        index = refresh_group_index(group)
+        ev = current_calendar_event(None, index) if index is not None else None
+        next_event_at = (
+            next_event_for_display(None, group.get("work_hours"), index)
+            if index is not None
+            else None
+        )
     except Exception as ex:
         logging.exception("Failed to resolve calendar status")
         error_detail = f"{type(ex).__name__}: {str(ex)}"[:100]
-
     override = load_override(group["override_path"])
+    work_status = None if ev or override else working_hours_status(group.get("work_hours"))
+    payload = compose_group_status(group, ev, next_event_at, error_detail, None if ev else override, work_status)
+    return attach_status_plan(group, payload, index, override, error_detail)
+
+def compose_group_status(
+    group: dict,
+    ev: dict | None,
+    next_event_at: str | None,
+    error_detail: str | None,
+    override: dict | None,
+    work_status: dict | None,
+) -> dict:
+    display_name = group.get("display_name", "")
+    if ev:
+        name = ev["name"]
+        detail = name if SHOW_EVENT_DETAILS else ""
+        until = ev["end"].isoformat()
+        busy_status = ev.get("busy_status")
+        if USE_MS_BUSY_STATUS and busy_status == "ooo":
+            return write_status(
+                "ooo",
+                "OUT OF OFFICE",
+                detail,
+                source="calendar",
+                until=until,
+                next_event_at=next_event_at,
+                name=display_name,
+                status_path=None,
+            )
+        elif ev["ooo"]:
+            return write_status(
+                "ooo",
+                "OUT OF OFFICE",
+                detail,
+                source="calendar",
+                until=until,
+                next_event_at=next_event_at,
+                name=display_name,
+                status_path=None,
+            )
+        else:
+            return write_status(
+                "meeting",
+                "IN A MEETING",
+                detail,
+                source="calendar",
+                until=until,
+                next_event_at=next_event_at,
+                name=display_name,
+                status_path=None,
+            )
+
     if override:
         return write_status(
             override.get("state", "busy"),
@@ -860,7 +2515,6 @@ def resolve_and_write(group: dict) -> dict:
             status_path=None,
         )
 
-    work_status = working_hours_status(group.get("work_hours"))
     if work_status:
         return write_status(
             work_status["state"],
@@ -893,6 +2547,1253 @@ def resolve_and_write(group: dict) -> dict:
         status_path=None,
     )
 
+PLAN_FIELDS = ("state", "label", "detail", "source", "until", "next_event_at")
+STATUS_PLANS: dict[str, tuple] = {}
+STATUS_PLAN_FIELDS = ("plan", "plan_version")
+
+def build_status_plan(
+    group: dict,
+    index: CalendarIndex | None,
+    override: dict | None,
+    error_detail: str | None,
+    now: datetime,
+    hours: int = STATUS_PLAN_HOURS,
+) -> list[dict]:
+    # Segments end where the batch evaluator's payload stops being valid.
+    evaluator = BatchEvaluator(1)
+    evaluator.set_index(0, index, error_detail)
+    evaluator.set_override(0, override)
+    planned = {**group, "override_path": None}
+    local_tz = get_local_tz() or now.tzinfo
+    now_ts = now.timestamp()
+    horizon = now_ts + hours * 3600
+    segments = []
+    previous = None
+    while now_ts < horizon:
+        payload = evaluator.evaluate([planned], datetime.fromtimestamp(now_ts, local_tz))[0]
+        end_ts = min(max(evaluator.payload_until[0], now_ts + 60), horizon)
+        fields = {field: payload[field] for field in PLAN_FIELDS if payload.get(field)}
+        if fields == previous:
+            segments[-1]["end"] = end_ts
+        else:
+            segments.append({"start": now_ts, "end": end_ts, **fields})
+            previous = fields
+        now_ts = end_ts
+    for segment in segments:
+        segment["start"] = datetime.fromtimestamp(segment["start"], local_tz).isoformat(timespec="seconds")
+        segment["end"] = datetime.fromtimestamp(segment["end"], local_tz).isoformat(timespec="seconds")
+    return segments
+
+def attach_status_plan(
+    group: dict,
+    payload: dict,
+    index: CalendarIndex | None,
+    override: dict | None,
+    error_detail: str | None,
+    now: datetime | None = None,
+) -> dict:
+    # Rebuilt when its inputs change or half of its horizon has passed.
+    if now is None:
+        local_tz = get_local_tz()
+        if local_tz is None:
+            return payload
+        now = now_local(local_tz)
+    now_ts = now.timestamp()
+    key = (
+        (index.digest, index.built_at) if index is not None else None,
+        json.dumps(override, sort_keys=True) if override else None,
+        error_detail,
+    )
+    cached = STATUS_PLANS.get(group["cache_path"])
+    if cached is None or cached[0] != key or not cached[1] <= now_ts < cached[1] + STATUS_PLAN_HOURS * 1800:
+        plan = build_status_plan(group, index, override, error_detail, now)
+        version = hashlib.blake2b(json.dumps(plan).encode(), digest_size=6).hexdigest()
+        cached = (key, now_ts, plan, version)
+        STATUS_PLANS[group["cache_path"]] = cached
+    payload["plan"] = cached[2]
+    payload["plan_version"] = cached[3]
+    return payload
+
+def scan_override_versions(override_dirs: dict[str, dict[str, str]]) -> dict[str, tuple]:
+    # One listing per directory; only overrides that exist are stat'ed.
+    versions = {}
+    for directory, names in override_dirs.items():
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    path = names.get(entry.name)
+                    if path is None:
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    versions[path] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+    return versions
+
+# payload_until is when each group's payload stops being valid; only groups past it,
+# or whose index, feed health or override changed, are recomputed.
+class BatchEvaluator:
+    __slots__ = (
+        "indexes", "errors", "health", "calendar", "calendar_until", "overrides", "payloads", "payload_until",
+        "watched", "override_dirs", "override_groups", "override_versions",
+    )
+
+    def __init__(self, count: int):
+        self.indexes: list[CalendarIndex | None] = [None] * count
+        self.errors: list[str | None] = [None] * count
+        self.health: list[tuple] = [()] * count
+        self.calendar: list[tuple] = [(None, None)] * count
+        self.calendar_until = array("d", [float("-inf")] * count)
+        self.overrides: list[dict | None] = [None] * count
+        self.payloads: list[dict | None] = [None] * count
+        self.payload_until = array("d", [float("-inf")] * count)
+        self.watched: list[dict] | None = None
+        self.override_dirs: dict[str, dict[str, str]] = {}
+        self.override_groups: dict[str, list[int]] = {}
+        self.override_versions: dict[str, tuple] = {}
+
+    def set_index(
+        self,
+        group: int,
+        index: CalendarIndex | None,
+        error_detail: str | None = None,
+        health: tuple = (),
+    ):
+        if index is not self.indexes[group] or error_detail != self.errors[group]:
+            self.indexes[group] = index
+            self.errors[group] = error_detail
+            self.calendar_until[group] = float("-inf")
+            self.payload_until[group] = float("-inf")
+        if health != self.health[group]:
+            self.health[group] = health
+            self.payload_until[group] = float("-inf")
+
+    def refresh_calendar(self, group: int, now: datetime, local_tz, work_hours: dict | None):
+        index = self.indexes[group]
+        now_ts = now.timestamp()
+        valid_until = localize_wall_time(now.date() + timedelta(days=1), 0, local_tz).timestamp()
+        ev = None
+        next_event_at = None
+        if index is not None:
+            current = current_position(index, now_ts)
+            if current >= 0:
+                ev = {
+                    "name": index.titles[current],
+                    "end": datetime.fromtimestamp(index.ends[current], local_tz),
+                    "busy_status": "ooo" if index.flags[current] & EVENT_BUSY_OOO else None,
+                    "ooo": bool(index.flags[current] & EVENT_OOO),
+                }
+                valid_until = min(valid_until, index.ends[current])
+            upcoming = bisect_right(index.starts, now_ts)
+            if upcoming < len(index):
+                start_ts = index.starts[upcoming]
+                next_event_at = display_next_event_at(
+                    datetime.fromtimestamp(start_ts, local_tz), now, work_hours
+                )
+                valid_until = min(valid_until, start_ts)
+            valid_until = min(valid_until, index.window_end)
+        self.calendar[group] = (ev, next_event_at)
+        self.calendar_until[group] = valid_until
+
+    def watch_overrides(self, groups: list[dict]):
+        self.watched = groups
+        self.override_dirs = {}
+        self.override_groups = {}
+        self.override_versions = {}
+        for group_index, group in enumerate(groups):
+            path = group.get("override_path")
+            if path is not None:
+                directory, name = os.path.split(path)
+                self.override_dirs.setdefault(directory or ".", {})[name] = path
+                self.override_groups.setdefault(path, []).append(group_index)
+
+    def changed_overrides(self) -> set[int]:
+        versions = scan_override_versions(self.override_dirs)
+        if versions == self.override_versions:
+            return set()
+        changed = set()
+        for path in versions.keys() | self.override_versions.keys():
+            version = versions.get(path)
+            if version != self.override_versions.get(path):
+                override = load_override(path) if version else None
+                for group_index in self.override_groups[path]:
+                    self.overrides[group_index] = override
+                    changed.add(group_index)
+        self.override_versions = versions
+        return changed
+
+    def set_override(self, group: int, override: dict | None):
+        self.overrides[group] = override
+        self.payload_until[group] = float("-inf")
+
+    def evaluate(self, groups: list[dict], now: datetime | None = None) -> list[dict]:
+        local_tz = get_local_tz()
+        if local_tz is None:
+            return [
+                compose_group_status(group, None, None, "Invalid TIMEZONE_NAME", None, None)
+                for group in groups
+            ]
+        now = (now or now_local(local_tz)).astimezone(local_tz)
+        now_ts = now.timestamp()
+        if groups is not self.watched:
+            self.watch_overrides(groups)
+        due = self.changed_overrides()
+        due.update(group_index for group_index, until in enumerate(self.payload_until) if until <= now_ts)
+        for group_index in sorted(due):
+            group = groups[group_index]
+            if self.calendar_until[group_index] <= now_ts:
+                self.refresh_calendar(group_index, now, local_tz, group.get("work_hours"))
+            ev, next_event_at = self.calendar[group_index]
+            valid_until = self.calendar_until[group_index]
+            override = None
+            work_status = None
+            if not ev:
+                override = self.overrides[group_index]
+                override_until = parse_iso(override.get("until", ""), local_tz) if override else None
+                if override_until is not None and now <= override_until:
+                    valid_until = min(valid_until, override_until.timestamp())
+                else:
+                    override = None
+                    work_hours = group.get("work_hours")
+                    if work_hours:
+                        work_status = working_hours_status(work_hours, now)
+                        valid_until = min(valid_until, work_hours_valid_until(now, work_hours))
+            payload = compose_group_status(
+                group, ev, next_event_at, self.errors[group_index], override, work_status
+            )
+            payload["name"] = group["display_name"]
+            self.payloads[group_index] = annotate_feed_health(group, payload)
+            self.payload_until[group_index] = valid_until
+        return list(self.payloads)
+
+def run_batch_cycle(
+    groups: list[dict],
+    executor: concurrent.futures.Executor,
+    tasks: dict[int, concurrent.futures.Future],
+    evaluator: BatchEvaluator,
+    deadline: float,
+) -> list[dict]:
+    def collect(group_index: int):
+        group = groups[group_index]
+        task = tasks.pop(group_index)
+        feeds = group.get("feeds") or [{"cache_path": group["cache_path"]}]
+        health = tuple(
+            (health["stale"], health.get("last_success"))
+            for health in (feed_health(feed["cache_path"]) for feed in feeds)
+        )
+        try:
+            evaluator.set_index(group_index, task.result(), health=health)
+        except Exception as ex:
+            logging.exception("Failed to refresh calendar for %s", group.get("display_name", ""))
+            evaluator.set_index(group_index, None, f"{type(ex).__name__}: {str(ex)}"[:100], health)
+
+    for group_index, group in enumerate(groups):
+        task = tasks.get(group_index)
+        if task is not None and task.done():
+            collect(group_index)
+            task = None
+        if task is None:
+            tasks[group_index] = executor.submit(refresh_group_index, group)
+    concurrent.futures.wait(list(tasks.values()), timeout=max(deadline - time.monotonic(), 0))
+    for group_index in [group_index for group_index, task in tasks.items() if task.done()]:
+        collect(group_index)
+    people = [
+        {**payload, "status_stale": True} if group_index in tasks else payload
+        for group_index, payload in enumerate(evaluator.evaluate(groups))
+    ]
+    local_tz = get_local_tz()
+    if local_tz is None:
+        return people
+    # A UTC "now" keeps the per-group timestamp() cheap; plans are still rendered in local time.
+    now = now_local(local_tz).astimezone(timezone.utc)
+    for group_index, (group, payload) in enumerate(zip(groups, people)):
+        attach_status_plan(
+            group,
+            payload,
+            evaluator.indexes[group_index],
+            evaluator.overrides[group_index],
+            evaluator.errors[group_index],
+            now,
+        )
+    return people
+
+def write_people(people: list[dict]):
+    if not STATUS_JSON_PLANS:
+        # Every display polls status.json; plans are read from the smaller shards.
+        people = [{key: value for key, value in person.items() if key not in STATUS_PLAN_FIELDS} for person in people]
+    payload = {
+        "generated": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "display_mode": DISPLAY_MODE,
+        "people": people,
+    }
+    if ROWS_PER_COLUMN:
+        payload["rows_per_column"] = ROWS_PER_COLUMN
+    os.makedirs(os.path.dirname(STATUS_JSON_PATH), exist_ok=True)
+    tmp = STATUS_JSON_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp, STATUS_JSON_PATH)
+
+PUBLISHED_SHARDS: dict[str, str] = {}
+
+def shard_paths(groups: list[dict]) -> tuple[list[str], dict[str, list[int]]]:
+    people = []
+    taken = set()
+    for index, group in enumerate(groups):
+        slug = slugify(group.get("display_name", "")) or f"group-{index + 1}"
+        if slug in taken:
+            slug = f"{slug}-{index + 1}"
+        taken.add(slug)
+        people.append(slug)
+    teams: dict[str, list[int]] = {}
+    for index, group in enumerate(groups):
+        for team in group.get("teams") or ():
+            teams.setdefault(team, []).append(index)
+    return people, teams
+
+def shard_signature(person: dict) -> str:
+    # "updated" moves on every resolution; only a real change should rewrite a shard.
+    return json.dumps({key: value for key, value in person.items() if key != "updated"}, sort_keys=True)
+
+def write_shard(relative_path: str, signature: str, payload: dict) -> bool:
+    if PUBLISHED_SHARDS.get(relative_path) == signature:
+        return False
+    path = os.path.join(STATUS_SHARD_DIR, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f, separators=(",", ":"))
+    os.replace(tmp, path)
+    PUBLISHED_SHARDS[relative_path] = signature
+    return True
+
+def write_status_shards(groups: list[dict], people: list[dict]) -> int:
+    # Rewritten only when their people change, so nginx can answer single-person displays with a 304.
+    person_slugs, teams = shard_paths(groups)
+    header = {"display_mode": DISPLAY_MODE}
+    if ROWS_PER_COLUMN:
+        header["rows_per_column"] = ROWS_PER_COLUMN
+    signatures = [shard_signature(person) for person in people]
+    written = 0
+    for slug, person, signature in zip(person_slugs, people, signatures):
+        written += write_shard(f"people/{slug}.json", signature, {**header, "people": [person]})
+    team_slugs = {}
+    for position, (team, members) in enumerate(teams.items()):
+        slug = slugify(team) or "team"
+        if slug in team_slugs.values():
+            slug = f"{slug}-{position + 1}"
+        team_slugs[team] = slug
+        signature = "\n".join(signatures[index] for index in members if index < len(people))
+        payload = {
+            **header,
+            "team": team,
+            "people": [people[index] for index in members if index < len(people)],
+        }
+        written += write_shard(f"teams/{slug}.json", signature, payload)
+    index = {
+        "people": {
+            group.get("display_name") or f"Group {index + 1}": f"people/{slug}.json"
+            for index, (group, slug) in enumerate(zip(groups, person_slugs))
+        },
+        "teams": {team: f"teams/{slug}.json" for team, slug in team_slugs.items()},
+    }
+    written += write_shard("index.json", json.dumps(index, sort_keys=True), index)
+    return written
+
+def publish_people_shards(groups: list[dict], people: list[dict]):
+    try:
+        write_status_shards(groups, people)
+    except OSError:
+        logging.exception("Failed to publish per-person status shards")
+
+# One transition: epoch seconds, group, then state/source/label as ids into history/names.json.
+HISTORY_RECORD = struct.Struct("<IHHHH")
+HISTORY_MAX_NAMES = 0xFFFF
+HISTORY_SEED_CHUNK_RECORDS = 1024
+
+class TransitionRing:
+    __slots__ = ("times", "states", "sources", "labels", "total")
+
+    def __init__(self, size: int):
+        self.times = array("I", [0]) * size
+        self.states = array("H", [0]) * size
+        self.sources = array("H", [0]) * size
+        self.labels = array("H", [0]) * size
+        self.total = 0
+
+    def last(self) -> tuple | None:
+        if not self.total:
+            return None
+        slot = (self.total - 1) % len(self.times)
+        return self.states[slot], self.sources[slot], self.labels[slot]
+
+    def append(self, ts: int, state: int, source: int, label: int):
+        slot = self.total % len(self.times)
+        self.times[slot] = ts
+        self.states[slot] = state
+        self.sources[slot] = source
+        self.labels[slot] = label
+        self.total += 1
+
+    def since(self, total: int) -> list[tuple]:
+        size = len(self.times)
+        first = max(total, self.total - size)
+        return [
+            (self.times[n % size], self.states[n % size], self.sources[n % size], self.labels[n % size])
+            for n in range(first, self.total)
+        ]
+
+# Time-ordered fixed-size records, so the control server can page by seeking.
+class TransitionHistory:
+    __slots__ = ("rings", "names", "name_list", "flushed", "names_flushed", "last_flush")
+
+    def __init__(self, group_count: int, ring_size: int = HISTORY_RING_SIZE):
+        self.rings = [TransitionRing(ring_size) for _ in range(group_count)]
+        self.flushed = [0] * group_count
+        self.name_list = [""]
+        try:
+            with open(os.path.join(HISTORY_DIR, "names.json"), "r") as f:
+                stored = json.load(f)
+            if isinstance(stored, list) and stored[:1] == [""]:
+                self.name_list = [str(name) for name in stored]
+        except (OSError, json.JSONDecodeError):
+            pass
+        self.names = {name: position for position, name in enumerate(self.name_list)}
+        self.names_flushed = len(self.name_list)
+        self.last_flush = time.monotonic()
+        if len(self.name_list) > 1:
+            self.seed_from_log()
+
+    def seed_from_log(self):
+        # Start each ring from the group's last logged state, so a restart does not log
+        # an unchanged status as a new transition.
+        log_path = os.path.join(HISTORY_DIR, "transitions.bin")
+        size = HISTORY_RECORD.size
+        missing = set(range(len(self.rings)))
+        for path in (log_path, log_path + ".1"):
+            try:
+                with open(path, "rb") as f:
+                    end = os.fstat(f.fileno()).st_size // size
+                    while missing and end > 0:
+                        start = max(end - HISTORY_SEED_CHUNK_RECORDS, 0)
+                        f.seek(start * size)
+                        chunk = list(HISTORY_RECORD.iter_unpack(f.read((end - start) * size)))
+                        for ts, group, state, source, label in reversed(chunk):
+                            if group in missing and max(state, source, label) < len(self.name_list):
+                                missing.discard(group)
+                                self.rings[group].append(ts, state, source, label)
+                                self.flushed[group] = self.rings[group].total
+                        end = start
+            except OSError:
+                continue
+            if not missing:
+                return
+
+    def intern(self, name: str) -> int:
+        position = self.names.get(name)
+        if position is None:
+            if len(self.name_list) >= HISTORY_MAX_NAMES:
+                return 0
+            position = len(self.name_list)
+            self.names[name] = position
+            self.name_list.append(name)
+        return position
+
+    def record(self, people: list[dict], now_ts: float) -> int:
+        recorded = 0
+        for ring, person in zip(self.rings, people):
+            if person.get("status_stale"):
+                continue
+            entry = (
+                self.intern(person.get("state", "")),
+                self.intern(person.get("source", "")),
+                self.intern(person.get("label", "")),
+            )
+            if ring.last() != entry:
+                ring.append(int(now_ts), *entry)
+                recorded += 1
+        return recorded
+
+    def flush(self, force: bool = False) -> int:
+        if not force and time.monotonic() - self.last_flush < HISTORY_FLUSH_SECONDS:
+            return 0
+        self.last_flush = time.monotonic()
+        pending = []
+        for group_index, ring in enumerate(self.rings):
+            lost = ring.total - len(ring.times) - self.flushed[group_index]
+            if lost > 0:
+                logging.warning("Dropped %s unflushed transitions for group %s.", lost, group_index + 1)
+            pending.extend(
+                (ts, group_index, state, source, label)
+                for ts, state, source, label in ring.since(self.flushed[group_index])
+            )
+        if not pending:
+            return 0
+        pending.sort(key=lambda record: record[0])
+        os.makedirs(HISTORY_DIR, exist_ok=True)
+        if len(self.name_list) != self.names_flushed:
+            names_path = os.path.join(HISTORY_DIR, "names.json")
+            with open(names_path + ".tmp", "w") as f:
+                json.dump(self.name_list, f)
+            os.replace(names_path + ".tmp", names_path)
+            self.names_flushed = len(self.name_list)
+        log_path = os.path.join(HISTORY_DIR, "transitions.bin")
+        try:
+            if os.path.getsize(log_path) >= HISTORY_MAX_BYTES:
+                os.replace(log_path, log_path + ".1")
+        except FileNotFoundError:
+            pass
+        with open(log_path, "ab") as f:
+            f.write(b"".join(HISTORY_RECORD.pack(*record) for record in pending))
+        self.flushed = [ring.total for ring in self.rings]
+        return len(pending)
+
+# The plan is left out of events entirely (subscribers read it from the shards).
+STATUS_EVENT_DROPPED = STATUS_PLAN_FIELDS
+# Sent with every event but changes without the person's status changing.
+STATUS_EVENT_UNCOMPARED = ("updated",)
+
+class StatusSubscriber:
+    __slots__ = ("sock", "inbox", "outbox", "groups", "reading", "events")
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.inbox = bytearray()
+        self.outbox = bytearray()
+        self.groups: set[int] | None = None
+        self.reading = True
+        self.events = 0
+
+# Sockets are only touched on the publisher thread; a subscriber that falls
+# STATUS_SOCKET_BUFFER_BYTES behind is dropped rather than holding up the resolver.
+class StatusPublisher:
+    __slots__ = (
+        "path", "groups", "listener", "selector", "lock", "subscribers",
+        "views", "signatures", "wake_r", "wake_w", "closed", "thread",
+    )
+
+    def __init__(self, path: str, groups: list[dict]):
+        self.path = path
+        self.groups = groups
+        self.lock = threading.Lock()
+        self.subscribers: dict[int, StatusSubscriber] = {}
+        self.views: list[dict] = []
+        self.signatures: list[str] = []
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(path)
+        os.chmod(path, 0o660)
+        self.listener.listen(64)
+        self.listener.setblocking(False)
+        self.wake_r, self.wake_w = socket.socketpair()
+        self.wake_r.setblocking(False)
+        self.wake_w.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.selector.register(self.wake_r, selectors.EVENT_READ)
+        self.closed = False
+        self.thread = threading.Thread(target=self.serve, name="status-publisher", daemon=True)
+        self.thread.start()
+
+    def publish(self, people: list[dict]) -> int:
+        views = []
+        signatures = []
+        changes = []
+        for index, person in enumerate(people):
+            view = {key: value for key, value in person.items() if key not in STATUS_EVENT_DROPPED}
+            signature = json.dumps(
+                {key: value for key, value in view.items() if key not in STATUS_EVENT_UNCOMPARED}, sort_keys=True
+            )
+            views.append(view)
+            signatures.append(signature)
+            if index >= len(self.signatures) or self.signatures[index] != signature:
+                line = json.dumps({"event": "change", "index": index, "person": view}, separators=(",", ":"))
+                changes.append((index, line.encode() + b"\n"))
+        with self.lock:
+            self.views = views
+            self.signatures = signatures
+            if not changes:
+                return 0
+            for subscriber in self.subscribers.values():
+                for index, line in changes:
+                    if subscriber.groups is None or index in subscriber.groups:
+                        subscriber.outbox += line
+        self.wake()
+        return len(changes)
+
+    def wake(self):
+        try:
+            self.wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def close(self):
+        self.closed = True
+        self.wake()
+        self.thread.join(timeout=2)
+        for subscriber in list(self.subscribers.values()):
+            subscriber.sock.close()
+        self.subscribers.clear()
+        self.selector.close()
+        self.listener.close()
+        self.wake_r.close()
+        self.wake_w.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def resolve_filter(self, request: dict) -> set[int] | None:
+        people = {str(name).strip().lower() for name in request.get("people") or ()}
+        teams = {str(name).strip().lower() for name in request.get("teams") or ()}
+        if not people and not teams:
+            return None
+        return {
+            index
+            for index, group in enumerate(self.groups)
+            if group.get("display_name", "").lower() in people
+            or any(team.lower() in teams for team in group.get("teams") or ())
+        }
+
+    def serve(self):
+        while not self.closed:
+            for key, mask in self.selector.select():
+                if key.fileobj is self.listener:
+                    self.accept()
+                elif key.fileobj is self.wake_r:
+                    try:
+                        while self.wake_r.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                elif mask & selectors.EVENT_READ:
+                    self.receive(key.data)
+            self.flush()
+
+    def accept(self):
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except BlockingIOError:
+                return
+            except OSError:
+                logging.exception("Status socket accept failed")
+                return
+            sock.setblocking(False)
+            subscriber = StatusSubscriber(sock)
+            with self.lock:
+                self.subscribers[sock.fileno()] = subscriber
+                self.queue_snapshot(subscriber, None)
+            self.update_interest(subscriber)
+
+    def queue_snapshot(self, subscriber: StatusSubscriber, groups: set[int] | None):
+        subscriber.groups = groups
+        people = [
+            {"index": index, "person": view}
+            for index, view in enumerate(self.views)
+            if groups is None or index in groups
+        ]
+        line = json.dumps({"event": "snapshot", "people": people}, separators=(",", ":"))
+        subscriber.outbox += line.encode() + b"\n"
+
+    def receive(self, subscriber: StatusSubscriber):
+        try:
+            data = subscriber.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            self.drop(subscriber)
+            return
+        if not data:
+            # A half-closed subscriber (e.g. ``nc`` after its stdin ends) still gets events.
+            subscriber.reading = False
+            self.update_interest(subscriber)
+            return
+        subscriber.inbox += data
+        if len(subscriber.inbox) > 65536:
+            self.drop(subscriber)
+            return
+        while b"\n" in subscriber.inbox:
+            line, _, rest = bytes(subscriber.inbox).partition(b"\n")
+            subscriber.inbox[:] = rest
+            try:
+                request = json.loads(line) if line.strip() else {}
+            except ValueError:
+                request = None
+            with self.lock:
+                if not isinstance(request, dict):
+                    subscriber.outbox += b'{"event":"error","error":"expected a JSON object"}\n'
+                    continue
+                self.queue_snapshot(subscriber, self.resolve_filter(request))
+
+    def flush(self):
+        with self.lock:
+            subscribers = list(self.subscribers.values())
+        for subscriber in subscribers:
+            with self.lock:
+                if len(subscriber.outbox) > STATUS_SOCKET_BUFFER_BYTES:
+                    logging.warning("Dropping status subscriber that fell %s bytes behind.", len(subscriber.outbox))
+                    pending = None
+                else:
+                    pending = bytes(subscriber.outbox)
+            if pending is None:
+                self.drop(subscriber)
+                continue
+            if pending:
+                try:
+                    sent = subscriber.sock.send(pending)
+                except BlockingIOError:
+                    sent = 0
+                except OSError:
+                    self.drop(subscriber)
+                    continue
+                with self.lock:
+                    del subscriber.outbox[:sent]
+            self.update_interest(subscriber)
+
+    def update_interest(self, subscriber: StatusSubscriber):
+        events = (selectors.EVENT_READ if subscriber.reading else 0) | (
+            selectors.EVENT_WRITE if subscriber.outbox else 0
+        )
+        if events == subscriber.events:
+            return
+        if not subscriber.events:
+            self.selector.register(subscriber.sock, events, subscriber)
+        elif not events:
+            self.selector.unregister(subscriber.sock)
+        else:
+            self.selector.modify(subscriber.sock, events, subscriber)
+        subscriber.events = events
+
+    def drop(self, subscriber: StatusSubscriber):
+        with self.lock:
+            self.subscribers.pop(subscriber.sock.fileno(), None)
+        if subscriber.events:
+            self.selector.unregister(subscriber.sock)
+            subscriber.events = 0
+        subscriber.sock.close()
+
+def start_status_publisher(groups: list[dict]) -> StatusPublisher | None:
+    if not STATUS_SOCKET_PATH or parse_env_falsey(STATUS_SOCKET_PATH):
+        return None
+    try:
+        return StatusPublisher(STATUS_SOCKET_PATH, groups)
+    except OSError:
+        logging.exception("Failed to open status socket %s", STATUS_SOCKET_PATH)
+        return None
+
+def resolved_group_payload(group: dict, task: concurrent.futures.Future) -> dict:
+    try:
+        payload = task.result()
+    except Exception as ex:
+        logging.exception("Failed to resolve status for %s", group.get("display_name", ""))
+        payload = write_status(
+            "error",
+            "STATUS ERROR",
+            f"{type(ex).__name__}: {str(ex)}"[:100],
+            source="error",
+            status_path=None,
+        )
+    payload["name"] = group["display_name"]
+    return payload
+
+def run_poll_cycle(
+    groups: list[dict],
+    executor: concurrent.futures.Executor,
+    tasks: dict[int, concurrent.futures.Future],
+    last_people: list[dict],
+    deadline: float,
+) -> list[dict]:
+    # A group still working from an earlier cycle is not resubmitted.
+    for index, group in enumerate(groups):
+        task = tasks.get(index)
+        if task is not None and task.done():
+            last_people[index] = resolved_group_payload(group, tasks.pop(index))
+            task = None
+        if task is None:
+            tasks[index] = executor.submit(resolve_and_write, group)
+    concurrent.futures.wait(list(tasks.values()), timeout=max(deadline - time.monotonic(), 0))
+    people = []
+    for index, group in enumerate(groups):
+        task = tasks[index]
+        if task.done():
+            last_people[index] = resolved_group_payload(group, tasks.pop(index))
+            people.append(last_people[index])
+            continue
+        logging.warning(
+            "%s missed the %ss poll deadline; publishing last-known status.",
+            group.get("display_name") or f"Group {index + 1}",
+            POLL_DEADLINE_SECONDS,
+        )
+        people.append({**last_people[index], "status_stale": True})
+    return people
+
+REPLAY_FIELDS = ("state", "source", "label", "detail", "until")
+
+def replay_group_index(group: dict, local_tz, now: datetime) -> CalendarIndex | None:
+    feeds = group.get("feeds") or [
+        {"cache_path": group["cache_path"], "rules": group.get("event_rules"), "mode": "all"}
+    ]
+    indexes = []
+    for feed in feeds:
+        try:
+            ics_text = read_ics_cache(feed["cache_path"])
+        except FileNotFoundError:
+            logging.warning("No recorded ICS at %s; replaying without it.", feed["cache_path"])
+            continue
+        index = build_calendar_index(ics_text, local_tz, now, feed.get("rules"), feed.get("mode", "all"))
+        if index is not None:
+            indexes.append(index)
+    if len(indexes) > 1:
+        return merge_calendar_indexes(indexes)
+    return indexes[0] if indexes else None
+
+def load_override_journal(path: str, groups: list[dict], local_tz) -> list[tuple]:
+    names = [group.get("display_name", "").lower() for group in groups]
+    entries = []
+    sources = [path + ".1", path] if os.path.exists(path + ".1") else [path]
+    for source in sources:
+        with open(source, "r") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    when = parse_iso(entry["time"], local_tz)
+                    group = entry.get("group", 0)
+                    group = names.index(group.lower()) if isinstance(group, str) else int(group)
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    logging.warning("Skipping invalid override journal line %s in %s.", line_number, source)
+                    continue
+                if when is None or not 0 <= group < len(groups):
+                    logging.warning("Skipping invalid override journal line %s in %s.", line_number, source)
+                    continue
+                entries.append((when.timestamp(), group, entry.get("override")))
+    entries.sort(key=lambda entry: entry[0])
+    return entries
+
+def replay_timeline(
+    groups: list[dict],
+    start: datetime,
+    end: datetime,
+    step: float = 60,
+    journal: list[tuple] = (),
+) -> list[tuple]:
+    # Jumps straight to the next sample at which any group's status can change.
+    global CLOCK
+    local_tz = get_local_tz()
+    if local_tz is None:
+        raise ValueError(f"Invalid TIMEZONE_NAME {TIMEZONE_NAME!r}")
+    start_ts = start.timestamp()
+    end_ts = end.timestamp()
+    replay_groups = [{**group, "override_path": None} for group in groups]
+    evaluator = BatchEvaluator(len(groups))
+    index_until = array("d", [float("-inf")] * len(groups))
+    last = [None] * len(groups)
+    rows = []
+    position = 0
+    now_ts = start_ts
+    real_clock = CLOCK
+    CLOCK = lambda: now_ts
+    try:
+        while now_ts < end_ts:
+            now = datetime.fromtimestamp(now_ts, local_tz)
+            while position < len(journal) and journal[position][0] <= now_ts:
+                _, group_index, override = journal[position]
+                evaluator.set_override(group_index, override)
+                position += 1
+            for group_index, group in enumerate(groups):
+                if index_until[group_index] <= now_ts:
+                    index = replay_group_index(group, local_tz, now)
+                    evaluator.set_index(group_index, index)
+                    index_until[group_index] = index.window_end if index is not None else float("inf")
+            for group_index, person in enumerate(evaluator.evaluate(replay_groups, now)):
+                key = tuple(person.get(field) for field in REPLAY_FIELDS)
+                if key != last[group_index]:
+                    last[group_index] = key
+                    rows.append((now_ts, group_index, person))
+            next_change = min(
+                min(evaluator.payload_until, default=end_ts), min(index_until, default=end_ts), end_ts
+            )
+            if position < len(journal):
+                next_change = min(next_change, journal[position][0])
+            steps = max(-(-(next_change - start_ts) // step), (now_ts - start_ts) // step + 1)
+            now_ts = start_ts + steps * step
+    finally:
+        CLOCK = real_clock
+    return rows
+
+def replay_main(argv: list[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="status_from_ics.py replay",
+        description="Print every group's status timeline over a range from recorded ICS files, without waiting.",
+    )
+    parser.add_argument("--start", help="ISO start time (default: now)")
+    parser.add_argument("--end", help="ISO end time (default: start + 7 days)")
+    parser.add_argument("--step", type=float, default=60, help="sample interval in seconds (default: 60)")
+    parser.add_argument("--cache-dir", help="read each feed's ICS cache file from this directory instead")
+    parser.add_argument("--journal", help="override journal to replay (JSON lines of time, group, override)")
+    parser.add_argument("--format", choices=("tsv", "json"), default="tsv")
+    args = parser.parse_args(argv)
+    local_tz = get_local_tz()
+    if local_tz is None:
+        parser.error(f"invalid TIMEZONE_NAME {TIMEZONE_NAME!r}")
+    start = parse_iso(args.start, local_tz) if args.start else now_local(local_tz)
+    end = parse_iso(args.end, local_tz) if args.end else (start + timedelta(days=7) if start else None)
+    if start is None or end is None or end <= start or args.step <= 0:
+        parser.error("need --start < --end and a positive --step")
+    groups = build_groups()
+    if args.cache_dir:
+        for group in groups:
+            for feed in group["feeds"]:
+                feed["cache_path"] = os.path.join(args.cache_dir, os.path.basename(feed["cache_path"]))
+    journal = load_override_journal(args.journal, groups, local_tz) if args.journal else []
+    began = time.perf_counter()
+    rows = replay_timeline(groups, start, end, args.step, journal)
+    elapsed = time.perf_counter() - began
+    if args.format == "json":
+        for ts, group_index, person in rows:
+            when = datetime.fromtimestamp(ts, local_tz).isoformat(timespec="seconds")
+            entry = {"time": when, "group": group_index}
+            entry.update((field, person.get(field)) for field in REPLAY_FIELDS if person.get(field))
+            print(json.dumps(entry))
+    else:
+        print("time\tgroup\tstate\tsource\tlabel\tdetail\tuntil")
+        for ts, group_index, person in rows:
+            when = datetime.fromtimestamp(ts, local_tz).isoformat(timespec="seconds")
+            fields = [" ".join(str(person.get(field) or "").split()) for field in REPLAY_FIELDS]
+            print("\t".join([when, str(group_index), *fields]))
+    logging.info(
+        "Replayed %s groups over %s in %.3fs (%s changes).", len(groups), end - start, elapsed, len(rows)
+    )
+    return 0
+
+DIAGNOSE_RUNAWAY_OCCURRENCES = 1000
+DIAGNOSE_MANY_OVERRIDES = 200
+DIAGNOSE_LONG_EVENT = timedelta(days=30)
+DIAGNOSE_SUBDAILY_FREQS = {"SECONDLY", "MINUTELY", "HOURLY"}
+
+def series_label(components: list) -> str:
+    for component in components:
+        if component.get("RECURRENCE-ID") is None:
+            return str(component.get("SUMMARY") or "")
+    return str(components[0].get("SUMMARY") or "")
+
+def diagnose_calendar(ics_text: str, local_tz, now: datetime, rules: dict | None = None) -> dict:
+    # Mirrors build_calendar_index, but expands each series alone so they can be ranked.
+    rules = rules or DEFAULT_EVENT_RULES
+    window_start = now - INDEX_LOOKBEHIND
+    window_end = now + INDEX_LOOKAHEAD
+    timings = {}
+    warnings = []
+    size = len(ics_text.encode("utf-8", "surrogatepass"))
+    if size > ICS_MAX_BYTES // 2:
+        warnings.append(f"feed is {size} bytes, over half of ICS_MAX_BYTES={ICS_MAX_BYTES}")
+
+    began = time.perf_counter()
+    calendar = parse_icalendar(ics_text)
+    timings["parse"] = time.perf_counter() - began
+
+    vevents = list(calendar.walk("VEVENT"))
+    vtimezones = list(calendar.walk("VTIMEZONE"))
+    series: dict[str, list] = {}
+    orphans = []
+    for event in vevents:
+        uid = event.get("UID")
+        if uid is None:
+            orphans.append(event)
+        else:
+            series.setdefault(str(uid), []).append(event)
+    if orphans:
+        warnings.append(f"{len(orphans)} VEVENTs have no UID and always take the slow expansion path")
+
+    ranking = []
+    occurrences = []
+    timings["expand"] = 0.0
+    for uid, components in series.items():
+        masters = [c for c in components if c.get("RECURRENCE-ID") is None]
+        overrides = len(components) - len(masters)
+        rules_text = [c.get("RRULE").to_ical().decode() for c in masters if c.get("RRULE") is not None]
+        began = time.perf_counter()
+        path = "fast"
+        try:
+            expanded = fast_expand_series(components, window_start, window_end)
+        except Exception:
+            expanded = None
+        if expanded is None:
+            path = "library"
+            expanded = library_expanded_events(calendar, components, window_start, window_end)
+        elapsed = time.perf_counter() - began
+        timings["expand"] += elapsed
+        occurrences.extend(expanded)
+        label = series_label(components)
+        if len(masters) > 1:
+            warnings.append(f"{label!r} ({uid}) has {len(masters)} masters sharing one UID")
+        if overrides > DIAGNOSE_MANY_OVERRIDES:
+            warnings.append(f"{label!r} has {overrides} modified occurrences (RECURRENCE-ID)")
+        for rule in rules_text:
+            parts = dict(part.partition("=")[::2] for part in rule.split(";"))
+            if parts.get("FREQ", "").upper() in DIAGNOSE_SUBDAILY_FREQS:
+                warnings.append(f"{label!r} repeats {parts['FREQ'].upper()} ({rule})")
+            elif path == "library" and "COUNT" not in parts and "UNTIL" not in parts:
+                warnings.append(f"{label!r} has an unbounded rule the fast path cannot expand ({rule})")
+        if len(expanded) > DIAGNOSE_RUNAWAY_OCCURRENCES:
+            warnings.append(f"{label!r} generates {len(expanded)} occurrences in the index window")
+        if rules_text or overrides:
+            ranking.append(
+                {
+                    "uid": uid,
+                    "summary": label,
+                    "rule": " | ".join(rules_text),
+                    "overrides": overrides,
+                    "occurrences": len(expanded),
+                    "seconds": elapsed,
+                    "path": path,
+                }
+            )
+    if orphans:
+        began = time.perf_counter()
+        occurrences.extend(library_expanded_events(calendar, orphans, window_start, window_end))
+        timings["expand"] += time.perf_counter() - began
+    ranking.sort(key=lambda entry: (entry["occurrences"], entry["seconds"]), reverse=True)
+
+    began = time.perf_counter()
+    tz_table = build_tz_table(calendar)
+    times = []
+    long_events = 0
+    for event in occurrences:
+        try:
+            start_local, end_local = event_times_to_local(event, local_tz, tz_table)
+        except Exception:
+            times.append(None)
+            continue
+        times.append((start_local, end_local))
+        if end_local - start_local > DIAGNOSE_LONG_EVENT:
+            long_events += 1
+    timings["timezones"] = time.perf_counter() - began
+    used_tzids = {
+        tzid for event in occurrences for tzid in (extract_event_tzid(event, "DTSTART"), extract_event_tzid(event, "DTEND"))
+        if tzid
+    }
+    unresolved = sorted(tzid for tzid in used_tzids if tz_table[tzid] is None)
+    if unresolved:
+        warnings.append(f"unresolvable TZIDs fall back to {TIMEZONE_NAME}: {', '.join(unresolved)}")
+    unused = len({str(c.get("TZID") or "") for c in vtimezones} - used_tzids)
+    if unused > 10:
+        warnings.append(f"{unused} VTIMEZONE definitions are never used by events in the window")
+    if long_events:
+        warnings.append(f"{long_events} occurrences last longer than {DIAGNOSE_LONG_EVENT.days} days")
+    unparsed = times.count(None)
+    if unparsed:
+        warnings.append(f"{unparsed} occurrences have unparseable start/end times")
+
+    began = time.perf_counter()
+    classifications: dict = {}
+    indexed = 0
+    for event, span in zip(occurrences, times):
+        if span is not None and not classify_event(event, rules, classifications) & EVENT_IGNORED:
+            indexed += 1
+    timings["classify"] = time.perf_counter() - began
+
+    return {
+        "bytes": size,
+        "vevents": len(vevents),
+        "vtimezones": len(vtimezones),
+        "recurring_masters": sum(1 for event in vevents if event.get("RRULE") is not None),
+        "overrides": sum(1 for event in vevents if event.get("RECURRENCE-ID") is not None),
+        "window": [window_start.isoformat(timespec="seconds"), window_end.isoformat(timespec="seconds")],
+        "occurrences": len(occurrences),
+        "indexed": indexed,
+        "timings": timings,
+        "series": ranking,
+        "warnings": warnings,
+    }
+
+def diagnose_main(argv: list[str]) -> int:
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(
+        prog="status_from_ics.py diagnose",
+        description="Report what makes one calendar feed slow to fetch, parse, expand and index.",
+    )
+    parser.add_argument("source", help="feed URL, or a path to an ICS file or a (gzip) cache file")
+    parser.add_argument("--at", help="ISO time to index the feed at (default: now)")
+    parser.add_argument("--top", type=int, default=10, help="recurring series to list (default: 10)")
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args(argv)
+    local_tz = get_local_tz()
+    if local_tz is None:
+        parser.error(f"invalid TIMEZONE_NAME {TIMEZONE_NAME!r}")
+    now = parse_iso(args.at, local_tz) if args.at else now_local(local_tz)
+    if now is None:
+        parser.error(f"invalid --at {args.at!r}")
+
+    began = time.perf_counter()
+    if os.path.exists(args.source):
+        ics_text = read_ics_cache(args.source)
+        stage = "read"
+    elif local_source_path(args.source) is not None:
+        ics_text = read_local_calendar(local_source_files(local_source_path(args.source)))
+        stage = "read"
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            ics_text = fetch_ics_text(args.source, os.path.join(tmp, "feed.ics"))
+        stage = "download"
+    loaded = time.perf_counter() - began
+    report = diagnose_calendar(ics_text, local_tz, now)
+    report = {"source": args.source, **report, "timings": {stage: loaded, **report["timings"]}}
+
+    if args.format == "json":
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"source       {report['source']}")
+    print(f"bytes        {report['bytes']:,}")
+    print(
+        f"VEVENT       {report['vevents']} ({report['recurring_masters']} recurring masters, "
+        f"{report['overrides']} modified occurrences)"
+    )
+    print(f"VTIMEZONE    {report['vtimezones']}")
+    print(f"window       {report['window'][0]} .. {report['window'][1]}")
+    print(f"occurrences  {report['occurrences']} expanded, {report['indexed']} indexed")
+    print()
+    total = sum(report["timings"].values())
+    print("stage        seconds   share")
+    for stage_name, seconds in report["timings"].items():
+        print(f"{stage_name:<12} {seconds:8.3f}  {seconds / total if total else 0:6.1%}")
+    if report["series"]:
+        print()
+        print("occurrences  seconds  path     series")
+        for entry in report["series"][: args.top]:
+            print(
+                f"{entry['occurrences']:>11}  {entry['seconds']:7.3f}  {entry['path']:<7}  "
+                f"{entry['summary'] or entry['uid']}  [{entry['rule'] or 'overrides only'}]"
+            )
+    if report["warnings"]:
+        print()
+        print("warnings")
+        for warning in report["warnings"]:
+            print(f"- {warning}")
+    return 0
+
+def sd_notify(message: str) -> bool:
+    address = os.environ.get("NOTIFY_SOCKET", "")
+    if not address:
+        return False
+    if address.startswith("@"):
+        address = "\0" + address[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(message.encode("utf-8", "replace"), address)
+    except OSError as ex:
+        logging.debug("sd_notify failed: %s", ex)
+        return False
+    return True
+
+def systemd_watchdog_seconds() -> float | None:
+    raw = os.environ.get("WATCHDOG_USEC", "")
+    pid = os.environ.get("WATCHDOG_PID", "")
+    if not raw.isdigit() or (pid and pid != str(os.getpid())):
+        return None
+    return int(raw) / 1_000_000
+
+# Pings only while cycles finish within their deadline and no refresh has hung.
+class ServiceNotifier:
+    __slots__ = ("watchdog", "ready", "cycles", "running", "healthy")
+
+    def __init__(self):
+        self.watchdog = systemd_watchdog_seconds()
+        self.ready = False
+        self.cycles = 0
+        self.running: dict[int, tuple] = {}
+        self.healthy = True
+        if self.watchdog is not None and self.watchdog <= POLL_DEADLINE_SECONDS + WATCHDOG_CYCLE_GRACE_SECONDS:
+            logging.warning(
+                "WatchdogSec=%ss is not longer than one poll deadline (%ss); expect restarts.",
+                self.watchdog,
+                POLL_DEADLINE_SECONDS + WATCHDOG_CYCLE_GRACE_SECONDS,
+            )
+
+    def stuck_seconds(self, tasks: dict, now: float) -> float:
+        running = {}
+        for group_index, task in tasks.items():
+            # Queued behind POLL_WORKERS is waiting, not hung.
+            if not task.running():
+                continue
+            seen = self.running.get(group_index)
+            running[group_index] = seen if seen is not None and seen[0] is task else (task, now)
+        self.running = running
+        return max((now - started for _, started in running.values()), default=0.0)
+
+    def cycle_finished(self, people: list[dict], elapsed: float, tasks: dict, now: float | None = None) -> bool:
+        now = time.monotonic() if now is None else now
+        self.cycles += 1
+        stuck = self.stuck_seconds(tasks, now)
+        stale = sum(1 for person in people if person.get("status_stale"))
+        problems = []
+        if elapsed > POLL_DEADLINE_SECONDS + WATCHDOG_CYCLE_GRACE_SECONDS:
+            problems.append(f"cycle took {elapsed:.1f}s")
+        if stuck > WATCHDOG_STUCK_SECONDS:
+            problems.append(f"a calendar refresh has hung for {stuck:.0f}s")
+        if problems:
+            if self.healthy:
+                logging.warning("Poll loop not making progress (%s); withholding watchdog pings.", "; ".join(problems))
+            self.healthy = False
+            sd_notify(f"STATUS=Cycle {self.cycles}: {'; '.join(problems)}")
+            return False
+        self.healthy = True
+        message = [f"STATUS=Cycle {self.cycles}: {len(people)} people, {stale} stale, {elapsed:.1f}s"]
+        if not self.ready:
+            message.append("READY=1")
+            self.ready = True
+        if self.watchdog is not None:
+            message.append("WATCHDOG=1")
+        sd_notify("\n".join(message))
+        return True
+
+    def idle(self, seconds: float, watcher: "LocalSourceWatcher | None" = None):
+        end = time.monotonic() + seconds
+        while True:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                return
+            if self.watchdog is not None:
+                remaining = min(remaining, self.watchdog / 2)
+            if watcher is not None:
+                if watcher.wait(remaining):
+                    return
+            else:
+                time.sleep(remaining)
+            if self.watchdog is not None and self.ready and self.healthy:
+                sd_notify("WATCHDOG=1")
+
+def seconds_since_start() -> float:
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesized command name start at field 3; starttime is field 22.
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(uptime - started_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - STARTED_AT
+
+def startup_summary(first_status: float, first_resolved: float) -> str:
+    imports = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in IMPORT_SECONDS.items())
+    return (
+        f"boot status after {first_status * 1000:.0f} ms, first resolved status after "
+        f"{first_resolved * 1000:.0f} ms; heavy imports: {imports or 'none'}"
+    )
+
 def main():
     groups = build_groups()
     boot_people = []
@@ -907,38 +3808,59 @@ def main():
                 status_path=None,
             )
         )
+    publisher = start_status_publisher(groups)
     if boot_people:
-        payload = {
-            "generated": datetime.utcnow().isoformat(timespec="seconds") + "Z",
-            "display_mode": DISPLAY_MODE,
-            "people": boot_people,
-        }
-        if ROWS_PER_COLUMN:
-            payload["rows_per_column"] = ROWS_PER_COLUMN
-        os.makedirs(os.path.dirname(STATUS_JSON_PATH), exist_ok=True)
-        tmp = STATUS_JSON_PATH + ".tmp"
-        with open(tmp, "w") as f:
-            json.dump(payload, f)
-        os.replace(tmp, STATUS_JSON_PATH)
-    while True:
-        people = []
-        for group in groups:
-            payload = resolve_and_write(group)
-            payload["name"] = group["display_name"]
-            people.append(payload)
-        payload = {
-            "generated": datetime.utcnow().isoformat(timespec="seconds") + "Z",
-            "display_mode": DISPLAY_MODE,
-            "people": people,
-        }
-        if ROWS_PER_COLUMN:
-            payload["rows_per_column"] = ROWS_PER_COLUMN
-        os.makedirs(os.path.dirname(STATUS_JSON_PATH), exist_ok=True)
-        tmp = STATUS_JSON_PATH + ".tmp"
-        with open(tmp, "w") as f:
-            json.dump(payload, f)
-        os.replace(tmp, STATUS_JSON_PATH)
-        time.sleep(POLL_SECONDS)
+        write_people(boot_people)
+        publish_people_shards(groups, boot_people)
+        if publisher is not None:
+            publisher.publish(boot_people)
+    first_status = seconds_since_start()
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(min(len(groups), POLL_WORKERS), 1), thread_name_prefix="status-group"
+    )
+    tasks: dict[int, concurrent.futures.Future] = {}
+    last_people = list(boot_people)
+    evaluator = BatchEvaluator(len(groups)) if BATCH_EVALUATION else None
+    history = TransitionHistory(len(groups))
+    watcher = start_local_watcher(groups)
+    notifier = ServiceNotifier()
+    # systemd stops the service with SIGTERM; leave through the finally below so
+    # transitions recorded since the last periodic flush reach the log.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        while True:
+            cycle_start = time.monotonic()
+            deadline = cycle_start + POLL_DEADLINE_SECONDS
+            if evaluator is not None:
+                people = run_batch_cycle(groups, executor, tasks, evaluator, deadline)
+            else:
+                people = run_poll_cycle(groups, executor, tasks, last_people, deadline)
+            write_people(people)
+            publish_people_shards(groups, people)
+            if publisher is not None:
+                publisher.publish(people)
+            history.record(people, time.time())
+            try:
+                history.flush()
+            except OSError:
+                logging.exception("Failed to flush status history")
+            if first_status is not None:
+                logging.info("Startup: %s", startup_summary(first_status, seconds_since_start()))
+                first_status = None
+            notifier.cycle_finished(people, time.monotonic() - cycle_start, tasks)
+            notifier.idle(POLL_SECONDS - (time.monotonic() - cycle_start), watcher)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        try:
+            history.flush(force=True)
+        except OSError:
+            logging.exception("Failed to flush status history")
+        if publisher is not None:
+            publisher.close()
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["replay"]:
+        sys.exit(replay_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["diagnose"]:
+        sys.exit(diagnose_main(sys.argv[2:]))
     main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""Measure how quickly both services come up, and what they import on the way.
+
+    python scripts/bench_startup.py --runs 5 --groups 4
+
+The resolver is started the way its unit starts it (``python -m
+pi.status_from_ics``) in a throwaway runtime directory, with its feeds served
+by the soak harness's stub server. Each run records the time until the boot
+status is written to status.json and until ``READY=1`` arrives on a
+``NOTIFY_SOCKET``, which the resolver sends once its first resolved status is
+published. Every round starts once with empty caches ("cold") and once more
+reusing the feed caches and index snapshots that start left behind, as a
+service restart would ("warm").
+
+The control server is started the same way and timed until ``/api/health``
+answers.
+
+Every child runs under ``-X importtime``, so the report also shows the
+process's total import time and what the heavy dependencies cost. The run
+fails (exit status 1) if a median exceeds a ``--max-*`` budget or if a warm
+resolver start imports anything listed in ``--warm-forbid``.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from soak_resolver import FeedFaults, StubFeedServer
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+HEAVY_MODULES = ("requests", "icalendar", "recurring_ical_events", "dateutil.tz", "flask")
+WARM_FORBIDDEN = ("requests", "icalendar", "recurring_ical_events")
+
+def parse_import_times(stderr: str) -> dict:
+    """Digest ``-X importtime`` output into total and per-heavy-module cumulative milliseconds."""
+    total = 0
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        cumulative = int(fields[1])
+        name = fields[2].strip()
+        # Nested imports are indented two spaces per level after one separator space.
+        if len(fields[2]) - len(fields[2].lstrip()) <= 1:
+            total += cumulative
+        if name in HEAVY_MODULES:
+            modules[name] = cumulative / 1000
+    return {"total_ms": total / 1000, "modules": modules}
+
+def resolver_environment(runtime_dir: str, server: StubFeedServer, groups: int, notify_path: str) -> dict:
+    return {
+        **os.environ,
+        "PYTHONPATH": REPO_DIR,
+        "STATUS_SCREEN_DIR": runtime_dir,
+        "ICS_URLS": json.dumps([server.url(feed) for feed in range(groups)]),
+        "DISPLAY_NAMES": json.dumps([f"Bench {feed + 1}" for feed in range(groups)]),
+        "TIMEZONE_NAME": os.environ.get("TIMEZONE_NAME", "UTC"),
+        # Long enough that a warm start finds every cache fresh, as after a
+        # quick service restart.
+        "ICS_REFRESH_SECONDS": "3600",
+        "ICS_REFRESH_MAX_SECONDS": "3600",
+        "NOTIFY_SOCKET": notify_path,
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    }
+
+def stop(child: subprocess.Popen, log_path: str) -> str:
+    """Terminate ``child`` if it is still running and return its stderr log."""
+    if child.poll() is None:
+        child.terminate()
+        try:
+            child.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            child.kill()
+            child.wait()
+    with open(log_path, errors="replace") as f:
+        return f.read()
+
+def spawn(module: str, env: dict, log_path: str) -> subprocess.Popen:
+    with open(log_path, "wb") as log:
+        return subprocess.Popen(
+            [sys.executable, "-X", "importtime", "-m", module],
+            cwd=REPO_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=log,
+        )
+
+def run_resolver(runtime_dir: str, server: StubFeedServer, groups: int, timeout: float) -> dict:
+    """Start the resolver once; returns its timings in milliseconds and import costs."""
+    status_path = os.path.join(runtime_dir, "status.json")
+    notify_path = os.path.join(runtime_dir, "notify.sock")
+    for path in (status_path, notify_path):
+        if os.path.exists(path):
+            os.remove(path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as notify:
+        notify.bind(notify_path)
+        began = time.monotonic()
+        log_path = os.path.join(runtime_dir, "resolver.log")
+        child = spawn("pi.status_from_ics", resolver_environment(runtime_dir, server, groups, notify_path), log_path)
+        first_status = ready = None
+        try:
+            while ready is None and time.monotonic() - began < timeout and child.poll() is None:
+                if first_status is None and os.path.exists(status_path):
+                    first_status = time.monotonic() - began
+                notify.settimeout(0.002 if first_status is None else 0.05)
+                try:
+                    message = notify.recv(4096).decode("utf-8", "replace")
+                except socket.timeout:
+                    continue
+                if "READY=1" in message.split("\n"):
+                    ready = time.monotonic() - began
+        finally:
+            log = stop(child, log_path)
+    if ready is None:
+        raise RuntimeError(f"resolver did not report READY=1 within {timeout}s:\n{log[-2000:]}")
+    return {
+        "first_status_ms": (first_status if first_status is not None else ready) * 1000,
+        "ready_ms": ready * 1000,
+        "imports": parse_import_times(log),
+    }
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def run_control_server(runtime_dir: str, timeout: float) -> dict:
+    """Start the control server once; returns the time until /api/health answers and import costs."""
+    port = free_port()
+    env = {
+        **os.environ,
+        "PYTHONPATH": REPO_DIR,
+        "STATUS_SCREEN_DIR": runtime_dir,
+        "CONTROL_HOST": "127.0.0.1",
+        "CONTROL_PORT": str(port),
+    }
+    log_path = os.path.join(runtime_dir, "control.log")
+    began = time.monotonic()
+    child = spawn("pi.control_server", env, log_path)
+    served = None
+    try:
+        while served is None and time.monotonic() - began < timeout and child.poll() is None:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            try:
+                connection.request("GET", "/api/health")
+                if connection.getresponse().status == 200:
+                    served = time.monotonic() - began
+            except OSError:
+                time.sleep(0.002)
+            finally:
+                connection.close()
+    finally:
+        log = stop(child, log_path)
+    if served is None:
+        raise RuntimeError(f"control server did not answer within {timeout}s:\n{log[-2000:]}")
+    return {"first_request_ms": served * 1000, "imports": parse_import_times(log)}
+
+def median_of(runs: list[dict], key: str) -> float:
+    return statistics.median(run[key] for run in runs)
+
+def summarize(runs: list[dict], keys: tuple) -> dict:
+    """Medians over ``runs``; heavy modules are listed if any run imported them."""
+    summary = {key: median_of(runs, key) for key in keys}
+    summary["import_ms"] = statistics.median(run["imports"]["total_ms"] for run in runs)
+    names = sorted({name for run in runs for name in run["imports"]["modules"]})
+    summary["heavy_imports"] = {
+        name: statistics.median(run["imports"]["modules"].get(name, 0.0) for run in runs) for name in names
+    }
+    return summary
+
+def evaluate(report: dict, limits: dict) -> list[str]:
+    """Returns the budgets the report breaks."""
+    failures = []
+    checks = (
+        ("cold", "ready_ms", "max_cold_ready_ms", "cold resolver READY"),
+        ("warm", "ready_ms", "max_warm_ready_ms", "warm resolver READY"),
+        ("warm", "import_ms", "max_warm_import_ms", "warm resolver imports"),
+        ("control", "first_request_ms", "max_first_request_ms", "control server first request"),
+    )
+    for section, key, limit_key, label in checks:
+        limit = limits.get(limit_key)
+        if limit is not None and section in report and report[section][key] > limit:
+            failures.append(f"{label} took {report[section][key]:.0f} ms (budget {limit:.0f} ms)")
+    warm = report.get("warm")
+    if warm is not None:
+        for name in limits.get("warm_forbid", ()):
+            if name in warm["heavy_imports"]:
+                failures.append(f"warm resolver start imported {name} ({warm['heavy_imports'][name]:.0f} ms)")
+    return failures
+
+def print_report(report: dict):
+    rows = (
+        ("cold", "resolver, empty caches", ("first_status_ms", "ready_ms")),
+        ("warm", "resolver, warm restart", ("first_status_ms", "ready_ms")),
+        ("control", "control server", ("first_request_ms",)),
+    )
+    for section, title, keys in rows:
+        summary = report.get(section)
+        if summary is None:
+            continue
+        timings = ", ".join(f"{key[:-3].replace('_', ' ')} {summary[key]:.0f} ms" for key in keys)
+        heavy = ", ".join(f"{name} {ms:.0f}" for name, ms in summary["heavy_imports"].items()) or "none"
+        print(f"{title:<24} {timings}; imports {summary['import_ms']:.0f} ms (heavy: {heavy})")
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--runs", type=int, default=3, help="starts of each kind; medians are reported (default: 3)")
+    parser.add_argument("--groups", type=int, default=4, help="people/feeds the resolver serves (default: 4)")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for one start (default: 60)")
+    parser.add_argument("--skip-control", action="store_true", help="only benchmark the resolver")
+    parser.add_argument("--max-cold-ready-ms", type=float)
+    parser.add_argument("--max-warm-ready-ms", type=float)
+    parser.add_argument("--max-warm-import-ms", type=float, help="budget for everything a warm start imports")
+    parser.add_argument("--max-first-request-ms", type=float)
+    parser.add_argument(
+        "--warm-forbid",
+        default=",".join(WARM_FORBIDDEN),
+        help="comma-separated modules a warm resolver start must not import (default: %(default)s)",
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+
+    server = StubFeedServer(FeedFaults(latency=0, error_rate=0, truncate_rate=0, trickle_rate=0, mutate_seconds=1e9))
+    threading.Thread(target=server.serve_forever, name="stub-feeds", daemon=True).start()
+    report = {}
+    try:
+        cold_runs = []
+        warm_runs = []
+        for _ in range(args.runs):
+            with tempfile.TemporaryDirectory(prefix="bench-startup-") as runtime_dir:
+                cold_runs.append(run_resolver(runtime_dir, server, args.groups, args.timeout))
+                warm_runs.append(run_resolver(runtime_dir, server, args.groups, args.timeout))
+        report["cold"] = summarize(cold_runs, ("first_status_ms", "ready_ms"))
+        report["warm"] = summarize(warm_runs, ("first_status_ms", "ready_ms"))
+        if not args.skip_control:
+            with tempfile.TemporaryDirectory(prefix="bench-startup-") as runtime_dir:
+                control_runs = [run_control_server(runtime_dir, args.timeout) for _ in range(args.runs)]
+            report["control"] = summarize(control_runs, ("first_request_ms",))
+    except RuntimeError as ex:
+        print(f"FAIL: {ex}", file=sys.stderr)
+        return 1
+    finally:
+        server.shutdown()
+
+    limits = {
+        "max_cold_ready_ms": args.max_cold_ready_ms,
+        "max_warm_ready_ms": args.max_warm_ready_ms,
+        "max_warm_import_ms": args.max_warm_import_ms,
+        "max_first_request_ms": args.max_first_request_ms,
+        "warm_forbid": [name.strip() for name in args.warm_forbid.split(",") if name.strip()],
+    }
+    report["failures"] = evaluate(report, limits)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    for failure in report["failures"]:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if report["failures"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -27,6 +27,8 @@ rsync -a --delete --exclude '.git' "$REPO_DIR/" "$RUNTIME_DIR/"
 sudo -u "$STATUS_SCREEN_USER" python3 -m venv "$RUNTIME_DIR/.venv"
 sudo -u "$STATUS_SCREEN_USER" "$RUNTIME_DIR/.venv/bin/pip" install --upgrade pip
 sudo -u "$STATUS_SCREEN_USER" "$RUNTIME_DIR/.venv/bin/pip" install requests icalendar recurring-ical-events python-dateutil flask
+# Precompile so the services' first start does not pay for it.
+sudo -u "$STATUS_SCREEN_USER" "$RUNTIME_DIR/.venv/bin/python" -m compileall -q "$RUNTIME_DIR/pi"
 
 # Web
 sudo rm -rf /var/www/html/*
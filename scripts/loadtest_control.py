@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""Drive the control server with a mix of API calls and report throughput and latency.
+
+By default a private control server is started on a free local port with
+its own runtime directory, so the run never touches a real install:
+
+    python scripts/loadtest_control.py --groups 20 --writers 16 --readers 4 --duration 30
+
+Writers loop over a weighted mix of override, clear and health calls, spread
+across every token and group. Readers load the control page and page through
+``/api/history`` like people using the control page. Use ``--url``,
+``--token`` and ``--allow-live`` to point at a server that is already
+running; every group the run could have touched is cleared afterwards.
+Exits non-zero when ``--max-p95-ms`` or ``--max-error-rate`` is exceeded.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+STATES = (
+    ("busy", "BUSY"),
+    ("meeting", "IN A MEETING"),
+    ("focus", "FOCUS TIME"),
+    ("available", "AVAILABLE"),
+)
+WRITER_OPERATIONS = ("override", "clear", "health")
+READER_OPERATIONS = ("control", "history")
+
+def parse_mix(value: str) -> dict[str, int]:
+    """Parse ``override=6,clear=3,health=1`` into operation weights."""
+    weights = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in WRITER_OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}; expected {', '.join(WRITER_OPERATIONS)}")
+        try:
+            weights[name] = int(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid weight for {name}: {weight!r}")
+    if not any(weight > 0 for weight in weights.values()):
+        raise argparse.ArgumentTypeError("at least one operation needs a positive weight")
+    return weights
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(-(-fraction * len(sorted_values) // 1)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class Recorder:
+    """Latencies and errors per operation, shared by every worker thread."""
+
+    __slots__ = ("lock", "latencies", "errors", "error_samples")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.error_samples: list[str] = []
+
+    def record(self, operation: str, seconds: float, error: str | None = None):
+        with self.lock:
+            self.latencies.setdefault(operation, []).append(seconds)
+            if error is not None:
+                self.errors[operation] = self.errors.get(operation, 0) + 1
+                if len(self.error_samples) < 10:
+                    self.error_samples.append(f"{operation}: {error}")
+
+    def summary(self, elapsed: float) -> dict:
+        operations = {}
+        everything = []
+        for operation, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            everything.extend(ordered)
+            operations[operation] = summarize(ordered, self.errors.get(operation, 0), elapsed)
+        everything.sort()
+        return {
+            "seconds": elapsed,
+            "total": summarize(everything, sum(self.errors.values()), elapsed),
+            "operations": operations,
+            "error_samples": self.error_samples,
+        }
+
+def summarize(ordered: list[float], errors: int, elapsed: float) -> dict:
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "error_rate": errors / len(ordered) if ordered else 0.0,
+        "throughput": len(ordered) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+    }
+
+class Client:
+    """One keep-alive HTTP connection, reopened whenever the server closes it."""
+
+    __slots__ = ("host", "port", "timeout", "connection")
+
+    def __init__(self, base_url: str, timeout: float):
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self.connection = None
+
+    def request(self, method: str, path: str, body: dict | None = None, token: str | None = None) -> int:
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        if token:
+            headers["X-Auth-Token"] = token
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = None
+            raise
+        if response.will_close:
+            self.connection.close()
+            self.connection = None
+        return response.status
+
+def writer_loop(client: Client, recorder: Recorder, stop_at: float, weights: dict, tokens: list, groups: int, think: float, seed: int):
+    rng = random.Random(seed)
+    operations = [name for name, weight in weights.items() for _ in range(weight)]
+    while time.monotonic() < stop_at:
+        operation = rng.choice(operations)
+        token = rng.choice(tokens)
+        group = rng.randrange(groups)
+        if operation == "override":
+            state, label = rng.choice(STATES)
+            request = ("POST", "/api/override", {"state": state, "label": label, "minutes": rng.randint(5, 120), "group_index": group})
+        elif operation == "clear":
+            request = ("POST", "/api/clear", {"group_index": group})
+        else:
+            request = ("GET", "/api/health", None)
+        run_request(client, recorder, operation, *request, token)
+        if think:
+            time.sleep(rng.uniform(0, 2 * think))
+
+def reader_loop(client: Client, recorder: Recorder, stop_at: float, tokens: list, think: float, seed: int):
+    rng = random.Random(seed)
+    while time.monotonic() < stop_at:
+        run_request(client, recorder, "control", "GET", "/control", None, None)
+        run_request(client, recorder, "history", "GET", "/api/history?limit=50", None, rng.choice(tokens))
+        if think:
+            time.sleep(rng.uniform(0, 2 * think))
+
+def run_request(client: Client, recorder: Recorder, operation: str, method: str, path: str, body: dict | None, token: str | None):
+    began = time.perf_counter()
+    try:
+        status = client.request(method, path, body, token)
+    except (OSError, http.client.HTTPException) as ex:
+        recorder.record(operation, time.perf_counter() - began, f"{type(ex).__name__}: {ex}")
+        return
+    elapsed = time.perf_counter() - began
+    recorder.record(operation, elapsed, None if 200 <= status < 300 else f"HTTP {status} for {method} {path}")
+
+def clear_groups(base_url: str, tokens: list, groups: int, timeout: float) -> list[str]:
+    """Clear every override the run may have set; returns the requests that failed."""
+    client = Client(base_url, timeout)
+    # With several tokens the server picks the group from the token and
+    # ignores group_index.
+    targets = [(token, 0) for token in tokens] if len(tokens) > 1 else [(tokens[0], group) for group in range(groups)]
+    failures = []
+    for token, group in targets:
+        try:
+            status = client.request("POST", "/api/clear", {"group_index": group}, token)
+        except (OSError, http.client.HTTPException) as ex:
+            failures.append(f"clear group {group}: {type(ex).__name__}: {ex}")
+            continue
+        if not 200 <= status < 300:
+            failures.append(f"clear group {group}: HTTP {status}")
+    return failures
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+def start_server(runtime_dir: str, groups: int, tokens: list, log_path: str) -> tuple[subprocess.Popen, str]:
+    """Start control_server.py on a free local port with a throwaway runtime directory."""
+    port = free_port()
+    env = {
+        **os.environ,
+        "STATUS_SCREEN_DIR": runtime_dir,
+        "AUTH_TOKENS": json.dumps(tokens),
+        "ICS_URLS": json.dumps([f"https://example.invalid/{index + 1}.ics" for index in range(groups)]),
+        "DISPLAY_NAMES": json.dumps([f"Person {index + 1}" for index in range(groups)]),
+    }
+    env["CONTROL_HOST"] = "127.0.0.1"
+    env["CONTROL_PORT"] = str(port)
+    with open(log_path, "ab") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "pi.control_server"], cwd=REPO_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+    base_url = f"http://127.0.0.1:{port}"
+    client = Client(base_url, 1)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"control server exited with {process.returncode}; see {log_path}")
+        try:
+            if client.request("GET", "/api/health") == 200:
+                return process, base_url
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"control server did not become healthy; see {log_path}")
+
+def run_load(
+    base_url: str,
+    tokens: list,
+    groups: int,
+    writers: int,
+    readers: int,
+    duration: float,
+    weights: dict,
+    think: float = 0.0,
+    timeout: float = 10.0,
+    seed: int = 1,
+) -> dict:
+    recorder = Recorder()
+    stop_at = time.monotonic() + duration
+    threads = [
+        threading.Thread(
+            target=writer_loop,
+            args=(Client(base_url, timeout), recorder, stop_at, weights, tokens, groups, think, seed + index),
+            daemon=True,
+        )
+        for index in range(writers)
+    ]
+    threads += [
+        threading.Thread(
+            target=reader_loop,
+            args=(Client(base_url, timeout), recorder, stop_at, tokens, think, seed + writers + index),
+            daemon=True,
+        )
+        for index in range(readers)
+    ]
+    began = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.summary(time.monotonic() - began)
+
+def print_report(report: dict):
+    print(f"{'operation':<10} {'requests':>9} {'req/s':>8} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    rows = list(report["operations"].items()) + [("total", report["total"])]
+    for name, row in rows:
+        print(
+            f"{name:<10} {row['requests']:>9} {row['throughput']:>8.1f} {row['errors']:>7} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}"
+        )
+    for sample in report["error_samples"]:
+        print(f"error: {sample}")
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="base URL of a running control server (default: start a private one)")
+    parser.add_argument("--token", action="append", help="auth token for --url (repeat for several)")
+    parser.add_argument(
+        "--allow-live",
+        action="store_true",
+        help="confirm --url may be a live wall; its overrides are cleared when the run ends",
+    )
+    parser.add_argument("--groups", type=int, default=10, help="groups to spread writes over (default: 10)")
+    parser.add_argument("--tokens", type=int, default=0, help="tokens for the private server (default: one per group)")
+    parser.add_argument("--writers", type=int, default=8, help="concurrent API writers (default: 8)")
+    parser.add_argument("--readers", type=int, default=2, help="concurrent control page readers (default: 2)")
+    parser.add_argument("--duration", type=float, default=20, help="seconds to run (default: 20)")
+    parser.add_argument("--mix", type=parse_mix, default="override=6,clear=3,health=1", help="writer operation weights")
+    parser.add_argument("--think-ms", type=float, default=0, help="mean pause between a worker's requests")
+    parser.add_argument("--timeout", type=float, default=10, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--max-p95-ms", type=float, help="fail if the overall p95 latency is higher")
+    parser.add_argument("--max-error-rate", type=float, help="fail if the overall error rate is higher (0-1)")
+    args = parser.parse_args(argv)
+    if args.groups < 1 or args.writers < 0 or args.readers < 0 or args.writers + args.readers == 0:
+        parser.error("need at least one group and one worker")
+
+    process = None
+    with tempfile.TemporaryDirectory(prefix="loadtest-control-") as runtime_dir:
+        if args.url:
+            if not args.token:
+                parser.error("--url needs at least one --token")
+            if not args.allow_live:
+                parser.error("--url writes fake overrides to real people; pass --allow-live to confirm")
+            base_url = args.url.rstrip("/")
+            tokens = args.token
+        else:
+            count = min(args.tokens or args.groups, args.groups)
+            tokens = [f"loadtest-{index + 1}" for index in range(count)]
+            log_path = os.path.join(runtime_dir, "control-server.log")
+            process, base_url = start_server(runtime_dir, args.groups, tokens, log_path)
+        try:
+            report = run_load(
+                base_url,
+                tokens,
+                args.groups,
+                args.writers,
+                args.readers,
+                args.duration,
+                args.mix,
+                args.think_ms / 1000,
+                args.timeout,
+                args.seed,
+            )
+        finally:
+            if args.url:
+                for failure in clear_groups(base_url, tokens, args.groups, args.timeout):
+                    print(f"WARNING: could not clean up: {failure}", file=sys.stderr)
+            if process is not None:
+                process.terminate()
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    report["config"] = {
+        "groups": args.groups,
+        "tokens": len(tokens),
+        "writers": args.writers,
+        "readers": args.readers,
+        "mix": args.mix,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    failed = False
+    if args.max_p95_ms is not None and report["total"]["p95_ms"] > args.max_p95_ms:
+        print(f"FAIL: p95 {report['total']['p95_ms']:.1f} ms > {args.max_p95_ms} ms", file=sys.stderr)
+        failed = True
+    if args.max_error_rate is not None and report["total"]["error_rate"] > args.max_error_rate:
+        print(f"FAIL: error rate {report['total']['error_rate']:.2%} > {args.max_error_rate:.2%}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
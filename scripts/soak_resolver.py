@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""Run the resolver for a long time against a misbehaving local feed server and watch for leaks.
+
+    python scripts/soak_resolver.py --duration 3600 --groups 10
+
+The resolver's ``main()`` runs in a child process with a throwaway runtime
+directory, a one-second poll and short refresh intervals, so an hour covers
+thousands of cycles. Its feeds come from a stub HTTP server in this process
+that mutates the calendars over time and injects latency, 304s, 5xx errors,
+truncated bodies and slow trickled responses.
+
+Every ``--interval`` seconds the harness samples the child's RSS and open
+file descriptors, and the child reports each cycle's latency, status writes
+and the size of every module-level cache. After ``--warmup`` the run fails
+(exit status 1) if RSS, descriptors or any cache grow past their thresholds,
+if cycles get slow, or if status writes stall.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+class FeedFaults:
+    """How the stub server misbehaves; rates are per request, between 0 and 1."""
+
+    __slots__ = ("latency", "error_rate", "truncate_rate", "trickle_rate", "mutate_seconds")
+
+    def __init__(self, latency=0.2, error_rate=0.05, truncate_rate=0.03, trickle_rate=0.03, mutate_seconds=30.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.truncate_rate = truncate_rate
+        self.trickle_rate = trickle_rate
+        self.mutate_seconds = mutate_seconds
+
+def synthetic_feed(feed: int, version: int, events: int = 40) -> bytes:
+    """A feed whose meetings move with every version, plus a recurring series and an all-day event."""
+    rng = random.Random(feed * 100003 + version)
+    day = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:-//soak//feed {feed}//EN"]
+    for index in range(events):
+        start = day + timedelta(days=rng.randint(-1, 14), minutes=rng.randrange(0, 24 * 60, 15))
+        end = start + timedelta(minutes=rng.choice([15, 30, 45, 60, 120]))
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:soak-{feed}-{index}",
+            f"DTSTAMP:{day:%Y%m%dT%H%M%SZ}",
+            f"DTSTART:{start:%Y%m%dT%H%M%SZ}",
+            f"DTEND:{end:%Y%m%dT%H%M%SZ}",
+            f"SUMMARY:Meeting {index} v{version}",
+            "END:VEVENT",
+        ]
+    lines += [
+        "BEGIN:VEVENT",
+        f"UID:soak-{feed}-standup",
+        "DTSTAMP:20240101T000000Z",
+        "DTSTART;TZID=Europe/Berlin:20240101T093000",
+        "DTEND;TZID=Europe/Berlin:20240101T094500",
+        "RRULE:FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR",
+        "SUMMARY:Standup",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        f"UID:soak-{feed}-pto-{version % 3}",
+        "DTSTAMP:20240101T000000Z",
+        f"DTSTART;VALUE=DATE:{day + timedelta(days=version % 5):%Y%m%d}",
+        f"DTEND;VALUE=DATE:{day + timedelta(days=version % 5 + 1):%Y%m%d}",
+        "SUMMARY:Out of office",
+        "END:VEVENT",
+        "END:VCALENDAR",
+    ]
+    return ("\r\n".join(lines) + "\r\n").encode()
+
+class StubFeedServer(ThreadingHTTPServer):
+    """Serves ``/feed/<n>.ics`` with mutating content and injected faults."""
+
+    daemon_threads = True
+
+    def __init__(self, faults: FeedFaults, seed: int = 1):
+        super().__init__(("127.0.0.1", 0), StubFeedHandler)
+        self.faults = faults
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.started = time.monotonic()
+        self.counts: dict[str, int] = {}
+        self.bodies: dict[tuple, tuple] = {}
+
+    def url(self, feed: int) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/feed/{feed}.ics"
+
+    def roll(self) -> float:
+        with self.rng_lock:
+            return self.rng.random()
+
+    def count(self, outcome: str):
+        with self.rng_lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+    def body(self, feed: int) -> tuple[bytes, str]:
+        version = int((time.monotonic() - self.started) // max(self.faults.mutate_seconds, 0.001))
+        key = (feed, version)
+        cached = self.bodies.get(key)
+        if cached is None:
+            body = synthetic_feed(feed, version)
+            cached = (body, '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"')
+            self.bodies = {key: cached, **{k: v for k, v in self.bodies.items() if k[1] == version}}
+        return cached
+
+class StubFeedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        faults = server.faults
+        try:
+            feed = int(self.path.rsplit("/", 1)[-1].split(".", 1)[0])
+        except ValueError:
+            self.send_error(404)
+            return
+        time.sleep(faults.latency * server.roll())
+        if server.roll() < faults.error_rate:
+            server.count("5xx")
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body, etag = server.body(feed)
+        if self.headers.get("If-None-Match") == etag:
+            server.count("304")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/calendar")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        roll = server.roll()
+        if roll < faults.truncate_rate:
+            server.count("truncated")
+            self.wfile.write(body[: len(body) // 2])
+            self.close_connection = True
+        elif roll < faults.truncate_rate + faults.trickle_rate:
+            server.count("trickle")
+            for offset in range(0, len(body), 512):
+                self.wfile.write(body[offset : offset + 512])
+                self.wfile.flush()
+                time.sleep(0.05)
+        else:
+            server.count("200")
+            self.wfile.write(body)
+
+def child_main():
+    """Run the resolver in this process, printing one JSON metrics line per status write."""
+    sys.path.insert(0, REPO_DIR)
+    from pi import status_from_ics
+
+    timing = {"cycle": None}
+    writes = [0]
+
+    def timed(run_cycle):
+        def wrapper(*args, **kwargs):
+            began = time.perf_counter()
+            try:
+                return run_cycle(*args, **kwargs)
+            finally:
+                timing["cycle"] = time.perf_counter() - began
+
+        return wrapper
+
+    def cache_sizes() -> dict:
+        sizes = {}
+        for name, value in list(vars(status_from_ics).items()):
+            if hasattr(value, "cache_info"):
+                sizes[name] = value.cache_info().currsize
+            elif name.isupper() and isinstance(value, dict):
+                sizes[name] = len(value)
+        return sizes
+
+    write_people = status_from_ics.write_people
+
+    def counted_write_people(people):
+        write_people(people)
+        writes[0] += 1
+        line = {"time": time.time(), "writes": writes[0], "cycle": timing["cycle"], "caches": cache_sizes()}
+        sys.stdout.write(json.dumps(line) + "\n")
+        sys.stdout.flush()
+
+    status_from_ics.run_poll_cycle = timed(status_from_ics.run_poll_cycle)
+    status_from_ics.run_batch_cycle = timed(status_from_ics.run_batch_cycle)
+    status_from_ics.write_people = counted_write_people
+    status_from_ics.main()
+
+def process_rss(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+def process_fds(pid: int) -> int:
+    return len(os.listdir(f"/proc/{pid}/fd"))
+
+def soak_environment(runtime_dir: str, server: StubFeedServer, groups: int, poll_seconds: int) -> dict:
+    return {
+        **os.environ,
+        "STATUS_SCREEN_DIR": runtime_dir,
+        "ICS_URLS": json.dumps([server.url(feed) for feed in range(groups)]),
+        "DISPLAY_NAMES": json.dumps([f"Soak {feed + 1}" for feed in range(groups)]),
+        "TIMEZONE_NAME": os.environ.get("TIMEZONE_NAME", "UTC"),
+        "POLL_SECONDS": str(poll_seconds),
+        "ICS_REFRESH_SECONDS": "2",
+        "ICS_REFRESH_MIN_SECONDS": "1",
+        "ICS_REFRESH_MAX_SECONDS": "6",
+        "ICS_REFRESH_ACTIVE_HOURS": "00:00-24:00",
+        "ICS_REFRESH_OFF_HOURS_FACTOR": "1",
+        "ICS_BACKOFF_MAX_SECONDS": "10",
+        "ICS_READ_TIMEOUT": "3",
+        "ICS_CONNECT_TIMEOUT": "2",
+        "HISTORY_FLUSH_SECONDS": "10",
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    }
+
+def window_median(samples: list[dict], key: str, first: bool, fraction: float = 0.2) -> float:
+    count = max(int(len(samples) * fraction), 1)
+    chosen = samples[:count] if first else samples[-count:]
+    return statistics.median(sample[key] for sample in chosen)
+
+def evaluate(samples: list[dict], cycles: list[float], caches: tuple[dict, dict], limits: dict, longest_gap: float) -> list[str]:
+    """Compare the start and end of the measured window; returns the failed checks."""
+    failures = []
+    if len(samples) < 2:
+        return ["not enough samples after warm-up; run longer or shorten --warmup"]
+    rss_growth = (window_median(samples, "rss", False) - window_median(samples, "rss", True)) / 2**20
+    if rss_growth > limits["rss_mb"]:
+        failures.append(f"RSS grew {rss_growth:.1f} MiB (limit {limits['rss_mb']} MiB)")
+    fd_growth = max(sample["fds"] for sample in samples[-max(len(samples) // 5, 1) :]) - samples[0]["fds"]
+    if fd_growth > limits["fds"]:
+        failures.append(f"open descriptors grew by {fd_growth} (limit {limits['fds']})")
+    before, after = caches
+    for name, size in sorted(after.items()):
+        growth = size - before.get(name, 0)
+        if growth > limits["cache_entries"]:
+            failures.append(f"{name} grew by {growth} entries to {size} (limit {limits['cache_entries']})")
+    if cycles:
+        ordered = sorted(cycles)
+        p95 = ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+        if p95 > limits["cycle_seconds"]:
+            failures.append(f"p95 cycle took {p95:.2f}s (limit {limits['cycle_seconds']}s)")
+    if longest_gap > limits["stall_seconds"]:
+        failures.append(f"no status write for {longest_gap:.0f}s (limit {limits['stall_seconds']}s)")
+    return failures
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--duration", type=float, default=600, help="seconds to run (default: 600)")
+    parser.add_argument("--warmup", type=float, default=60, help="seconds before growth is measured (default: 60)")
+    parser.add_argument("--interval", type=float, default=10, help="seconds between samples (default: 10)")
+    parser.add_argument("--groups", type=int, default=8, help="people/feeds to resolve (default: 8)")
+    parser.add_argument("--poll-seconds", type=int, default=1, help="resolver POLL_SECONDS (default: 1)")
+    parser.add_argument("--latency-ms", type=float, default=200, help="maximum injected response delay")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="share of 503 responses")
+    parser.add_argument("--truncate-rate", type=float, default=0.03, help="share of truncated bodies")
+    parser.add_argument("--trickle-rate", type=float, default=0.03, help="share of slowly trickled bodies")
+    parser.add_argument("--mutate-seconds", type=float, default=30, help="seconds between feed versions")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=16)
+    parser.add_argument("--max-fd-growth", type=int, default=4)
+    parser.add_argument("--max-cache-growth", type=int, default=32, help="entries any one cache may grow by")
+    parser.add_argument("--max-cycle-seconds", type=float, default=8, help="p95 cycle latency limit")
+    parser.add_argument("--max-stall-seconds", type=float, default=30, help="longest allowed gap between status writes")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the final report as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child_main()
+        return 0
+    if not os.path.isdir("/proc/self/fd"):
+        parser.error("the soak harness reads /proc and needs Linux")
+
+    faults = FeedFaults(
+        args.latency_ms / 1000, args.error_rate, args.truncate_rate, args.trickle_rate, args.mutate_seconds
+    )
+    server = StubFeedServer(faults, args.seed)
+    threading.Thread(target=server.serve_forever, name="stub-feeds", daemon=True).start()
+    limits = {
+        "rss_mb": args.max_rss_growth_mb,
+        "fds": args.max_fd_growth,
+        "cache_entries": args.max_cache_growth,
+        "cycle_seconds": args.max_cycle_seconds,
+        "stall_seconds": args.max_stall_seconds,
+    }
+    metrics = {"writes": 0, "last_write": time.monotonic(), "longest_gap": 0.0, "caches": {}}
+    cycles: list[float] = []
+    samples: list[dict] = []
+    warm_caches: dict = {}
+
+    with tempfile.TemporaryDirectory(prefix="soak-resolver-") as runtime_dir:
+        log_path = os.path.join(runtime_dir, "resolver.log")
+        with open(log_path, "wb") as log:
+            child = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "--child"],
+                env=soak_environment(runtime_dir, server, args.groups, args.poll_seconds),
+                stdout=subprocess.PIPE,
+                stderr=log,
+                text=True,
+            )
+
+        def read_metrics():
+            for line in child.stdout:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                now = time.monotonic()
+                if now - began >= args.warmup:
+                    # Stalls that recover count too, not just one at the end.
+                    gap = now - max(metrics["last_write"], began + args.warmup)
+                    metrics["longest_gap"] = max(metrics["longest_gap"], gap)
+                    if entry["cycle"] is not None:
+                        cycles.append(entry["cycle"])
+                metrics["writes"] = entry["writes"]
+                metrics["last_write"] = now
+                metrics["caches"] = entry["caches"]
+
+        began = time.monotonic()
+        threading.Thread(target=read_metrics, name="soak-metrics", daemon=True).start()
+        progress = sys.stderr if args.json else sys.stdout
+        print(f"{'elapsed':>8} {'rss MiB':>8} {'fds':>5} {'writes':>7} {'p95 s':>6}  responses", file=progress)
+        try:
+            while time.monotonic() - began < args.duration:
+                time.sleep(min(args.interval, max(args.duration - (time.monotonic() - began), 0)))
+                if child.poll() is not None:
+                    break
+                elapsed = time.monotonic() - began
+                sample = {"elapsed": elapsed, "rss": process_rss(child.pid), "fds": process_fds(child.pid)}
+                if elapsed >= args.warmup:
+                    if not samples:
+                        warm_caches = dict(metrics["caches"])
+                    samples.append(sample)
+                recent = sorted(cycles[-200:])
+                p95 = recent[min(int(len(recent) * 0.95), len(recent) - 1)] if recent else 0.0
+                print(
+                    f"{elapsed:>8.0f} {sample['rss'] / 2**20:>8.1f} {sample['fds']:>5} {metrics['writes']:>7} "
+                    f"{p95:>6.2f}  {json.dumps(server.counts, sort_keys=True)}",
+                    file=progress,
+                    flush=True,
+                )
+        finally:
+            exit_code = child.poll()
+            if exit_code is None:
+                child.terminate()
+                try:
+                    child.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    child.kill()
+            server.shutdown()
+            with open(log_path, errors="replace") as f:
+                log_tail = f.read()[-4000:]
+
+    failures = []
+    if exit_code is not None:
+        failures.append(f"resolver exited early with status {exit_code}")
+    longest_gap = max(metrics["longest_gap"], time.monotonic() - metrics["last_write"])
+    failures += evaluate(samples, cycles, (warm_caches, metrics["caches"]), limits, longest_gap)
+    report = {
+        "seconds": time.monotonic() - began,
+        "writes": metrics["writes"],
+        "longest_write_gap": longest_gap,
+        "cycles_measured": len(cycles),
+        "responses": server.counts,
+        "samples": samples,
+        "caches": metrics["caches"],
+        "failures": failures,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    if failures and log_tail:
+        print("--- resolver log (tail) ---", file=sys.stderr)
+        print(log_tail, file=sys.stderr)
+    if not failures and not args.json:
+        print(f"OK: {metrics['writes']} status writes, {len(cycles)} cycles measured, no growth past limits")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
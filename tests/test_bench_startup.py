@@ -0,0 +1,71 @@
+import importlib.util
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+# The benchmark borrows the soak harness's stub feed server.
+sys.path.insert(0, str(SCRIPTS))
+spec = importlib.util.spec_from_file_location("bench_startup", SCRIPTS / "bench_startup.py")
+bench_startup = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bench_startup)
+
+HAS_DEPS = all(importlib.util.find_spec(name) for name in ("requests", "icalendar", "dateutil"))
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       300 |        300 |   zipimport
+import time:      2000 |       2500 | encodings
+import time:       800 |      90000 |     urllib3
+import time:      1000 |     150000 | requests
+import time:      5000 |     60000 |   icalendar
+import time:       700 |      70000 | recurring_ical_events
+"""
+
+
+class StartupBenchmarkTests(unittest.TestCase):
+    def test_import_times_and_budgets(self):
+        imports = bench_startup.parse_import_times(IMPORTTIME + "2024-01-01 INFO not an import line\n")
+        self.assertEqual(imports["total_ms"], 222.5)
+        self.assertEqual(imports["modules"], {"requests": 150.0, "icalendar": 60.0, "recurring_ical_events": 70.0})
+        runs = [
+            {"ready_ms": 300.0, "first_status_ms": 100.0, "imports": imports},
+            {"ready_ms": 500.0, "first_status_ms": 120.0, "imports": {"total_ms": 90.0, "modules": {}}},
+        ]
+        warm = bench_startup.summarize(runs, ("first_status_ms", "ready_ms"))
+        self.assertEqual(warm["ready_ms"], 400.0)
+        self.assertEqual(warm["heavy_imports"]["requests"], 75.0)
+        failures = bench_startup.evaluate(
+            {"warm": warm}, {"max_warm_ready_ms": 350, "max_cold_ready_ms": 100, "warm_forbid": ["requests", "flask"]}
+        )
+        self.assertEqual(len(failures), 2)
+        self.assertIn("warm resolver READY took 400 ms", failures[0])
+        self.assertIn("imported requests", failures[1])
+
+    @unittest.skipUnless(HAS_DEPS, "requires requests, icalendar and dateutil")
+    def test_warm_restart_skips_network_and_parser_imports(self):
+        server = bench_startup.StubFeedServer(
+            bench_startup.FeedFaults(latency=0, error_rate=0, truncate_rate=0, trickle_rate=0, mutate_seconds=1e9)
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        with tempfile.TemporaryDirectory() as runtime_dir:
+            cold = bench_startup.run_resolver(runtime_dir, server, 2, 30)
+            warm = bench_startup.run_resolver(runtime_dir, server, 2, 30)
+            # Both runs end with SIGTERM, before the periodic history flush is due.
+            history = Path(runtime_dir) / "history" / "transitions.bin"
+            self.assertEqual(history.stat().st_size % 12, 0)
+            self.assertGreater(history.stat().st_size, 0)
+            self.assertFalse((Path(runtime_dir) / "status.sock").exists())
+        self.assertIn("requests", cold["imports"]["modules"])
+        self.assertIn("icalendar", cold["imports"]["modules"])
+        self.assertIn("dateutil.tz", cold["imports"]["modules"])
+        self.assertEqual(set(warm["imports"]["modules"]), {"dateutil.tz"})
+        self.assertLessEqual(warm["first_status_ms"], warm["ready_ms"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,240 @@
+import concurrent.futures
+import importlib.util
+import json
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+from urllib.parse import quote
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+HAS_DEPS = bool(importlib.util.find_spec("flask"))
+if HAS_DEPS:
+    from pi import control_server
+else:
+    control_server = None
+
+
+def hours(day: datetime, start: float, end: float) -> list:
+    base = day.timestamp()
+    return [base + start * 3600, base + end * 3600]
+
+
+@unittest.skipUnless(HAS_DEPS, "requires flask")
+class AvailabilityTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.originals = {
+            name: getattr(control_server, name)
+            for name in ("AVAILABILITY_DIR", "AUTH_TOKENS", "DISPLAY_NAMES", "GROUP_COUNT", "TIMEZONE_NAME")
+        }
+        control_server.AVAILABILITY_DIR = self.tmp.name
+        control_server.AUTH_TOKENS = ["secret"]
+        control_server.DISPLAY_NAMES = ["Alex", "Sam"]
+        control_server.GROUP_COUNT = 2
+        control_server.TIMEZONE_NAME = "UTC"
+        control_server.AVAILABILITY_CACHE.clear()
+        self.day = datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+    def tearDown(self):
+        for name, value in self.originals.items():
+            setattr(control_server, name, value)
+        control_server.AVAILABILITY_CACHE.clear()
+        self.tmp.cleanup()
+
+    def publish(self, index: int, busy: list, work: list | None):
+        window = [self.day.timestamp() - 86400, self.day.timestamp() + 90 * 86400]
+        payload = {"index": index, "name": "", "window": window, "busy": busy, "work": work}
+        path = Path(self.tmp.name) / f"group-{index + 1}.json"
+        path.write_text(json.dumps(payload))
+
+    def test_common_free_slots_respect_meetings_and_work_hours(self):
+        self.publish(0, [hours(self.day, 9, 10), hours(self.day, 13, 14)], [hours(self.day, 9, 17)])
+        self.publish(1, [hours(self.day, 9.5, 11), hours(self.day, 15, 15.25)], [hours(self.day, 8, 16)])
+        client = control_server.app.test_client()
+        query = "/api/availability?groups=Alex,1&start=2024-01-02T00:00Z&end=2024-01-03T00:00Z&min_minutes=60"
+        self.assertEqual(client.get(query).status_code, 401)
+        response = client.get(query, headers={"X-Auth-Token": "secret"})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertTrue(data["complete"])
+        self.assertEqual(
+            [(slot["start"][11:16], slot["end"][11:16]) for slot in data["common_free"]],
+            [("11:00", "13:00"), ("14:00", "15:00")],
+        )
+        self.assertEqual(data["groups"][1]["free"][0]["start"][11:16], "08:00")
+
+        response = client.get(query + "&working_hours=false", headers={"X-Auth-Token": "secret"})
+        self.assertEqual(response.get_json()["common_free"][0]["end"][11:16], "09:00")
+
+    def test_unpublished_group_marks_result_incomplete(self):
+        self.publish(0, [], None)
+        result = control_server.compute_availability(
+            [0, 1], self.day.timestamp(), self.day.timestamp() + 86400, 0
+        )
+        self.assertFalse(result["complete"])
+        self.assertIn("error", result["groups"][1])
+        self.assertEqual(result["common_free"], [(self.day.timestamp(), self.day.timestamp() + 86400)])
+
+    def test_week_for_fifty_people_reuses_loaded_intervals(self):
+        control_server.GROUP_COUNT = 50
+        for index in range(50):
+            busy = []
+            work = []
+            for day_offset in range(-1, 90):
+                day = self.day + timedelta(days=day_offset)
+                work.append(hours(day, 8 + index % 3, 17 + index % 3))
+                for slot in range(6):
+                    start = 8 + slot * 1.5 + (index % 4) * 0.25
+                    busy.append(hours(day, start, start + 0.75))
+            self.publish(index, busy, work)
+        indexes = list(range(50))
+        start = self.day.timestamp()
+        control_server.compute_availability(indexes, start, start + 7 * 86400, 1800)
+        with mock.patch.object(control_server.json, "load", wraps=json.load) as load, mock.patch.object(
+            control_server, "clip_intervals", wraps=control_server.clip_intervals
+        ) as clip:
+            result = control_server.compute_availability(indexes, start, start + 7 * 86400, 1800)
+        self.assertTrue(result["complete"])
+        # Unchanged files come from the cache; each group clips its busy and work lists once.
+        self.assertEqual(load.call_count, 0)
+        self.assertEqual(clip.call_count, 2 * 50)
+
+
+@unittest.skipUnless(HAS_DEPS, "requires flask")
+class GroupCountTests(unittest.TestCase):
+    def test_group_count_matches_the_resolver_for_multi_calendar_people(self):
+        feeds = [
+            ["https://example.invalid/alex-work.ics", {"url": "https://example.invalid/alex-home.ics", "mode": "ooo"}],
+            ["https://example.invalid/sam.ics"],
+        ]
+        cases = [
+            ({"ICS_FEEDS": json.dumps(feeds)}, 2),
+            ({"ICS_URLS": "https://example.invalid/a.ics", "ICS_FEEDS": json.dumps(feeds)}, 2),
+            # Not JSON: the resolver ignores it, so splitting it on commas would invent people.
+            ({"ICS_FEEDS": "[[a.ics, b.ics], [c.ics]]"}, 1),
+        ]
+        repo = Path(__file__).resolve().parents[1]
+        for settings, expected in cases:
+            with self.subTest(settings=settings), tempfile.TemporaryDirectory() as tmp:
+                env = {key: value for key, value in os.environ.items() if key not in {"ICS_URLS", "ICS_FEEDS"}}
+                env.update(settings, STATUS_SCREEN_DIR=tmp)
+                output = subprocess.run(
+                    [sys.executable, "-c", "from pi import control_server; print(control_server.GROUP_COUNT)"],
+                    cwd=repo,
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                ).stdout
+                self.assertEqual(int(output), expected)
+
+
+@unittest.skipUnless(HAS_DEPS, "requires flask")
+class OverrideTests(unittest.TestCase):
+    def test_concurrent_overrides_for_one_group_all_succeed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "override-1.json")
+            with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+                futures = [
+                    executor.submit(control_server.write_override, "busy", f"BUSY {n}", "", 5, path)
+                    for n in range(200)
+                ]
+                for future in futures:
+                    future.result()
+            self.assertTrue(json.loads(Path(path).read_text())["label"].startswith("BUSY"))
+            self.assertEqual(sorted(p.name for p in Path(tmp).iterdir()), ["override-1.json"])
+
+    def test_journal_rotates_one_generation(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "override-journal.jsonl")
+            with mock.patch.object(control_server, "OVERRIDE_JOURNAL_PATH", path), mock.patch.object(
+                control_server, "OVERRIDE_JOURNAL_MAX_BYTES", 300
+            ):
+                for n in range(20):
+                    control_server.journal_override(0, {"state": "busy", "label": f"BUSY {n}"})
+            self.assertLess(Path(path).stat().st_size, 400)
+            self.assertLess(Path(path + ".1").stat().st_size, 400)
+            self.assertEqual(
+                sorted(p.name for p in Path(tmp).iterdir()), ["override-journal.jsonl", "override-journal.jsonl.1"]
+            )
+            last = json.loads(Path(path).read_text().splitlines()[-1])
+            self.assertEqual(last["override"]["label"], "BUSY 19")
+
+
+@unittest.skipUnless(HAS_DEPS, "requires flask")
+class HistoryTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.originals = {
+            name: getattr(control_server, name)
+            for name in ("HISTORY_DIR", "AUTH_TOKENS", "DISPLAY_NAMES", "GROUP_COUNT", "TIMEZONE_NAME")
+        }
+        control_server.HISTORY_DIR = self.tmp.name
+        control_server.AUTH_TOKENS = ["secret"]
+        control_server.DISPLAY_NAMES = ["Alex", "Sam"]
+        control_server.GROUP_COUNT = 2
+        control_server.TIMEZONE_NAME = "UTC"
+        control_server.HISTORY_NAMES_CACHE.clear()
+        names = ["", "available", "default", "AVAILABLE", "meeting", "calendar", "IN A MEETING"]
+        (Path(self.tmp.name) / "names.json").write_text(json.dumps(names))
+        self.base = int(datetime(2024, 1, 2, tzinfo=timezone.utc).timestamp())
+
+    def tearDown(self):
+        for name, value in self.originals.items():
+            setattr(control_server, name, value)
+        control_server.HISTORY_NAMES_CACHE.clear()
+        self.tmp.cleanup()
+
+    def write_log(self, name: str, records: list):
+        with open(Path(self.tmp.name) / name, "ab") as f:
+            f.write(b"".join(control_server.HISTORY_RECORD.pack(*record) for record in records))
+
+    def test_pages_newest_first_across_rotated_logs(self):
+        self.write_log("transitions.bin.1", [(self.base + minute * 60, minute % 2, 1, 2, 3) for minute in range(4)])
+        self.write_log("transitions.bin", [(self.base + minute * 60, minute % 2, 4, 5, 6) for minute in range(4, 8)])
+        client = control_server.app.test_client()
+        self.assertEqual(client.get("/api/history").status_code, 401)
+        headers = {"X-Auth-Token": "secret"}
+        data = client.get("/api/history?groups=Alex&limit=3", headers=headers).get_json()
+        self.assertEqual([entry["time"][11:16] for entry in data["transitions"]], ["00:06", "00:04", "00:02"])
+        self.assertEqual(data["transitions"][0]["label"], "IN A MEETING")
+        self.assertEqual(data["transitions"][2]["state"], "available")
+        query = f"/api/history?groups=Alex&limit=3&before={quote(data['next_before'])}"
+        data = client.get(query, headers=headers).get_json()
+        self.assertEqual([entry["time"][11:16] for entry in data["transitions"]], ["00:00"])
+        self.assertIsNone(data["next_before"])
+
+    def test_page_reads_only_the_records_it_needs(self):
+        records = [(self.base + second, second % 2, 4, 5, 6) for second in range(200000)]
+        self.write_log("transitions.bin", records)
+        before = self.base + 100000
+        unpacked = []
+
+        class CountingRecord(struct.Struct):
+            def unpack_from(self, buffer, offset=0):
+                unpacked.append(1)
+                return super().unpack_from(buffer, offset)
+
+            def iter_unpack(self, buffer):
+                for record in super().iter_unpack(buffer):
+                    unpacked.append(1)
+                    yield record
+
+        with mock.patch.object(control_server, "HISTORY_RECORD", CountingRecord(control_server.HISTORY_RECORD.format)):
+            found, cursor = control_server.read_history({1}, before, 50)
+        self.assertEqual(len(found), 50)
+        self.assertEqual(found[0][0], before - 1)
+        self.assertEqual(cursor, found[-1][0])
+        # A binary search plus one chunk, not a scan of the 200000 records.
+        self.assertLess(len(unpacked), 2 * control_server.HISTORY_CHUNK_RECORDS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from pi import eink_render
+
+
+def build_people(count: int, changed: int = -1) -> list[dict]:
+    states = ["available", "meeting", "busy", "ooo"]
+    people = []
+    for index in range(count):
+        state = states[(index + (index == changed)) % len(states)]
+        people.append(
+            {
+                "name": f"Person {index + 1}",
+                "state": state,
+                "label": state.upper(),
+                "detail": "Project sync" if index % 2 else "",
+                "until": "2024-01-02T10:30:00Z",
+            }
+        )
+    return people
+
+
+class FrameRendererTests(unittest.TestCase):
+    def test_only_changed_boxes_are_reported_as_byte_aligned_rects(self):
+        renderer = eink_render.FrameRenderer(800, 480, "mono")
+        rects, full = renderer.render(build_people(10), 5)
+        self.assertTrue(full)
+        self.assertEqual(rects, [(0, 0, 800, 480)])
+        self.assertEqual(renderer.render(build_people(10), 5), ([], False))
+
+        rects, full = renderer.render(build_people(10, changed=7), 5)
+        self.assertFalse(full)
+        self.assertEqual(len(rects), 1)
+        x, y, w, h = rects[0]
+        self.assertEqual((x % 8, w % 8), (0, 0))
+        self.assertTrue(400 <= x and x + w <= 800 and 192 <= y and y + h <= 288)
+        self.assertEqual(renderer.sequence, 2)
+
+        rects, full = renderer.render(build_people(12), 5)
+        self.assertTrue(full)
+
+    def test_planes_are_packed_per_panel_mode(self):
+        renderer = eink_render.FrameRenderer(16, 1, "tricolor")
+        renderer.pixels[:] = bytes([eink_render.BLACK] * 4 + [eink_render.RED] * 4 + [eink_render.WHITE] * 8)
+        self.assertEqual(renderer.pack((0, 0, 16, 1)), bytes([0x0F, 0xFF, 0x0F, 0x00]))
+        renderer = eink_render.FrameRenderer(8, 1, "gray")
+        renderer.pixels[:] = bytes([eink_render.WHITE, eink_render.LIGHT, eink_render.DARK, eink_render.BLACK] * 2)
+        self.assertEqual(renderer.pack((0, 0, 8, 1)), bytes([0b11100100, 0b11100100]))
+        message = renderer.message([(0, 0, 8, 1)])
+        header = eink_render.FRAME_HEADER.unpack_from(message)
+        self.assertEqual(header, (b"EINK", 1, eink_render.EINK_MODES["gray"], 8, 1, 1, 0))
+
+    def test_plan_view_uses_the_active_segment(self):
+        person = {
+            "name": "Sam",
+            "state": "available",
+            "label": "AVAILABLE",
+            "plan": [
+                {"start": "2024-01-02T09:00:00+00:00", "end": "2024-01-02T10:00:00+00:00", "state": "available",
+                 "label": "AVAILABLE"},
+                {"start": "2024-01-02T10:00:00+00:00", "end": "2024-01-02T11:00:00+00:00", "state": "meeting",
+                 "label": "IN A MEETING", "detail": "Review", "until": "2024-01-02T11:00:00+00:00"},
+            ],
+        }
+        ten = 1704189600
+        view = eink_render.plan_view(person, ten + 60)
+        self.assertEqual((view["state"], view["detail"], view["name"]), ("meeting", "Review", "Sam"))
+        self.assertEqual(eink_render.plan_boundary([person], ten - 60), ten)
+
+    def test_frame_file_and_rects_share_a_sequence(self):
+        renderer = eink_render.FrameRenderer(64, 32, "mono")
+        rects, full = renderer.render(build_people(2), 2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "frame.bin")
+            eink_render.write_frame_file(renderer, rects, full, path)
+            with open(path, "rb") as f:
+                header = eink_render.FRAME_HEADER.unpack(f.read(eink_render.FRAME_HEADER.size))
+            with open(path + ".json") as f:
+                meta = json.load(f)
+        self.assertEqual(header[-1], meta["sequence"])
+        self.assertEqual(meta["rects"], [list(rect) for rect in rects])
+
+    def test_one_cell_change_on_a_full_wall_sends_only_that_cell(self):
+        for mode in eink_render.EINK_MODES:
+            renderer = eink_render.FrameRenderer(800, 480, mode)
+            rects, full = renderer.render(build_people(200), 20)
+            full_bytes = len(renderer.message(rects))
+            draw_person = eink_render.FrameRenderer.draw_person
+            with mock.patch.object(
+                eink_render.FrameRenderer, "draw_person", autospec=True, side_effect=draw_person
+            ) as draw:
+                rects, full = renderer.render(build_people(200, changed=57), 20)
+            self.assertFalse(full)
+            self.assertEqual(draw.call_count, 1, mode)
+            # 10 columns of 20 rows: a cell is 80x24, and alignment can widen it by one byte.
+            self.assertEqual(len(rects), 1, mode)
+            self.assertLessEqual(rects[0][2] * rects[0][3], 88 * 24, mode)
+            packed = len(renderer.message(rects)) - eink_render.FRAME_HEADER.size - eink_render.RECT_HEADER.size
+            self.assertEqual(packed, len(renderer.pack(rects[0])), mode)
+            self.assertLess(packed * 100, full_bytes, mode)
+
+if __name__ == "__main__":
+    unittest.main()
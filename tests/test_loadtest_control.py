@@ -0,0 +1,50 @@
+import importlib.util
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "loadtest_control.py"
+spec = importlib.util.spec_from_file_location("loadtest_control", SCRIPT)
+loadtest_control = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(loadtest_control)
+
+HAS_DEPS = bool(importlib.util.find_spec("flask"))
+
+
+class LoadTestHarnessTests(unittest.TestCase):
+    def test_percentiles_use_nearest_rank(self):
+        values = [float(n) for n in range(1, 101)]
+        self.assertEqual(loadtest_control.percentile(values, 0.50), 50.0)
+        self.assertEqual(loadtest_control.percentile(values, 0.99), 99.0)
+        self.assertEqual(loadtest_control.percentile([7.0], 0.95), 7.0)
+        self.assertEqual(loadtest_control.parse_mix("override=2,health"), {"override": 2, "health": 1})
+        with self.assertRaises(SystemExit), mock.patch("sys.stderr"):
+            loadtest_control.main(["--url", "http://127.0.0.1:5000", "--token", "a"])
+
+    @unittest.skipUnless(HAS_DEPS, "requires flask")
+    def test_short_run_against_private_server_has_no_errors(self):
+        tokens = ["a", "b", "c"]
+        with tempfile.TemporaryDirectory() as runtime_dir:
+            process, base_url = loadtest_control.start_server(
+                runtime_dir, 3, tokens, str(Path(runtime_dir) / "server.log")
+            )
+            try:
+                report = loadtest_control.run_load(
+                    base_url, tokens, 3, 4, 1, 1.0, {"override": 2, "clear": 1, "health": 1}
+                )
+                cleanup_failures = loadtest_control.clear_groups(base_url, tokens, 3, 5.0)
+                leftovers = sorted(path.name for path in Path(runtime_dir).glob("override*.json"))
+            finally:
+                process.terminate()
+                process.wait(timeout=5)
+        self.assertGreater(report["total"]["requests"], 10)
+        self.assertEqual(report["total"]["errors"], 0, report["error_samples"])
+        self.assertEqual(set(report["operations"]), {"override", "clear", "health", "control", "history"})
+        self.assertEqual(cleanup_failures, [])
+        self.assertEqual(leftovers, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import http.client
+import importlib.util
+import threading
+import unittest
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "soak_resolver.py"
+spec = importlib.util.spec_from_file_location("soak_resolver", SCRIPT)
+soak_resolver = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(soak_resolver)
+
+LIMITS = {"rss_mb": 16, "fds": 4, "cache_entries": 32, "cycle_seconds": 8, "stall_seconds": 30}
+
+
+class StubFeedServerTests(unittest.TestCase):
+    def start(self, faults):
+        server = soak_resolver.StubFeedServer(faults)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def get(self, server, headers=None):
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+        self.addCleanup(connection.close)
+        connection.request("GET", "/feed/3.ics", headers=headers or {})
+        return connection.getresponse()
+
+    def test_feed_revalidates_and_truncates(self):
+        server = self.start(soak_resolver.FeedFaults(latency=0, error_rate=0, truncate_rate=0, trickle_rate=0))
+        response = self.get(server)
+        body = response.read()
+        self.assertEqual(response.status, 200)
+        self.assertIn(b"BEGIN:VCALENDAR", body)
+        self.assertEqual(self.get(server, {"If-None-Match": response.getheader("ETag")}).status, 304)
+
+        server.faults.truncate_rate = 1
+        response = self.get(server)
+        with self.assertRaises(http.client.IncompleteRead):
+            response.read()
+        self.assertEqual(server.counts, {"200": 1, "304": 1, "truncated": 1})
+
+    def test_evaluate_flags_growth_and_stalls(self):
+        steady = [{"rss": 50 * 2**20, "fds": 7} for _ in range(10)]
+        self.assertEqual(soak_resolver.evaluate(steady, [0.2] * 50, ({"A": 3}, {"A": 3}), LIMITS, 1), [])
+        leaking = [{"rss": (50 + 4 * n) * 2**20, "fds": 7 + n} for n in range(10)]
+        failures = soak_resolver.evaluate(leaking, [0.2] * 19 + [9.0] * 2, ({"A": 3}, {"A": 300}), LIMITS, 45)
+        self.assertEqual(
+            [failure.split()[0] for failure in failures], ["RSS", "open", "A", "p95", "no"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,29 @@
+import concurrent.futures
+import contextlib
+import gc
+import json
+import os
+import random
+import socket
 import sys
+import tempfile
+import threading
+import time
+import tracemalloc
 import unittest
 import importlib.util
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
+from unittest import mock
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 HAS_DEPS = bool(importlib.util.find_spec("dateutil")) and bool(
     importlib.util.find_spec("ics")
 )
+HAS_RECURRENCE_DEPS = HAS_DEPS and bool(
+    importlib.util.find_spec("recurring_ical_events")
+)
 if HAS_DEPS:
     from pi import status_from_ics
 else:
@@ -149,6 +164,62 @@ class StatusFromIcsTests(unittest.TestCase):
         self.assertIsNotNone(event)
         self.assertEqual(event["name"], "Windows TZ Meeting")
 
+    def test_custom_vtimezone_is_used_for_unknown_tzid(self):
+        self.set_now(datetime(2024, 1, 1, 14, 30, tzinfo=timezone.utc))
+        ics_text = "\n".join(
+            [
+                "BEGIN:VCALENDAR",
+                "VERSION:2.0",
+                "BEGIN:VTIMEZONE",
+                "TZID:Customized Time Zone",
+                "BEGIN:STANDARD",
+                "DTSTART:16010101T000000",
+                "TZOFFSETFROM:-0500",
+                "TZOFFSETTO:-0500",
+                "END:STANDARD",
+                "END:VTIMEZONE",
+                "BEGIN:VEVENT",
+                "UID:event-1",
+                "DTSTAMP:20240101T090000Z",
+                "DTSTART;TZID=Customized Time Zone:20240101T090000",
+                "DTEND;TZID=Customized Time Zone:20240101T100000",
+                "SUMMARY:Custom Zone Meeting",
+                "END:VEVENT",
+                "END:VCALENDAR",
+            ]
+        )
+        calendar = status_from_ics.parse_icalendar(ics_text)
+        table = status_from_ics.build_tz_table(calendar)
+        self.assertIn("Customized Time Zone", table)
+        event = status_from_ics.current_calendar_event(ics_text)
+        self.assertIsNotNone(event)
+        self.assertEqual(event["end"].isoformat(), "2024-01-01T15:00:00+00:00")
+
+    def test_windows_tzid_outside_us_maps_to_iana_timezone(self):
+        self.set_now(datetime(2024, 7, 1, 7, 30, tzinfo=timezone.utc))
+        ics_text = "\n".join(
+            [
+                "BEGIN:VCALENDAR",
+                "VERSION:2.0",
+                "BEGIN:VEVENT",
+                "UID:event-1",
+                "DTSTAMP:20240701T090000Z",
+                "DTSTART;TZID=W. Europe Standard Time:20240701T090000",
+                "DTEND;TZID=W. Europe Standard Time:20240701T100000",
+                "SUMMARY:Berlin Meeting",
+                "END:VEVENT",
+                "END:VCALENDAR",
+            ]
+        )
+        event = status_from_ics.current_calendar_event(ics_text)
+        self.assertIsNotNone(event)
+        self.assertEqual(event["end"].isoformat(), "2024-07-01T08:00:00+00:00")
+
+    def test_windows_tz_map_entries_resolve(self):
+        for windows_name, iana_name in status_from_ics.WINDOWS_TZ_MAP.items():
+            self.assertIsNotNone(status_from_ics.resolve_tzinfo(iana_name), windows_name)
+        self.assertEqual(status_from_ics.map_windows_tz("(UTC+01:00) Romance Standard Time"), "Europe/Paris")
+
     def test_working_hours_before_start_is_ooo(self):
         work_hours = self.build_work_hours()
         now = datetime(2024, 1, 1, 8, 30, tzinfo=timezone.utc)
@@ -182,6 +253,64 @@ class StatusFromIcsTests(unittest.TestCase):
         now = datetime(2024, 1, 2, 12, 0, tzinfo=timezone.utc)
         self.assertIsNotNone(status_from_ics.working_hours_status(work_hours, now=now))
 
+    def test_split_shift_lunch_is_ooo_until_afternoon_window(self):
+        work_hours = status_from_ics.build_work_hours_config(
+            "", "", "", work_hours_windows="Mon-Fri 09:00-12:00,13:00-17:00"
+        )
+        now = datetime(2024, 1, 2, 12, 30, tzinfo=timezone.utc)
+        work_status = status_from_ics.working_hours_status(work_hours, now=now)
+        self.assertEqual(work_status["until"], "2024-01-02T13:00:00+00:00")
+        self.assertEqual(
+            work_status["detail"],
+            "Outside working hours (9:00 AM-12:00 PM, 1:00 PM-5:00 PM)",
+        )
+        now = datetime(2024, 1, 2, 13, 30, tzinfo=timezone.utc)
+        self.assertIsNone(status_from_ics.working_hours_status(work_hours, now=now))
+
+    def test_holidays_and_date_exceptions_replace_weekly_windows(self):
+        work_hours = status_from_ics.build_work_hours_config(
+            "09:00",
+            "17:00",
+            "Mon-Fri",
+            holidays="2024-12-25",
+            exceptions="2024-12-24 09:00-12:00; 2024-12-28 10:00-14:00",
+        )
+        now = datetime(2024, 12, 24, 13, 0, tzinfo=timezone.utc)
+        work_status = status_from_ics.working_hours_status(work_hours, now=now)
+        self.assertEqual(work_status["until"], "2024-12-26T09:00:00+00:00")
+        saturday = datetime(2024, 12, 28, 11, 0, tzinfo=timezone.utc)
+        self.assertIsNone(status_from_ics.working_hours_status(work_hours, now=saturday))
+
+    def test_work_start_inside_dst_gap_moves_to_first_valid_instant(self):
+        status_from_ics.TIMEZONE_NAME = "America/Los_Angeles"
+        local_tz = status_from_ics.resolve_tzinfo("America/Los_Angeles")
+        work_hours = status_from_ics.build_work_hours_config(
+            "", "", "", work_hours_windows="Sun 02:30-05:00"
+        )
+        now = datetime(2024, 3, 9, 12, 0, tzinfo=local_tz)
+        work_status = status_from_ics.working_hours_status(work_hours, now=now)
+        self.assertEqual(work_status["until"], "2024-03-10T03:30:00-07:00")
+
+    def test_window_with_unknown_day_is_dropped_with_a_warning(self):
+        with self.assertLogs(level="WARNING") as logs:
+            windows = status_from_ics.parse_work_windows("Mo-Fx 09:00-17:00; Sat 10:00-14:00")
+        self.assertEqual(windows, {5: [(600, 840)]})
+        self.assertIn("Mo-Fx", logs.output[0])
+        with self.assertLogs(level="WARNING"):
+            config = status_from_ics.build_work_hours_config("", "", "", work_hours_windows="Mon-Fx 09:00-17:00")
+        self.assertIsNone(config)
+        self.assertEqual(sorted(status_from_ics.parse_work_windows("Fri-Mon,Wed 09:00-10:00")), [0, 2, 4, 5, 6])
+
+    def test_overnight_window_wraps_from_sunday_into_monday(self):
+        work_hours = status_from_ics.build_work_hours_config(
+            "", "", "", work_hours_windows="Sun 22:00-06:00"
+        )
+        now = datetime(2024, 1, 8, 1, 0, tzinfo=timezone.utc)
+        self.assertIsNone(status_from_ics.working_hours_status(work_hours, now=now))
+        now = datetime(2024, 1, 8, 7, 0, tzinfo=timezone.utc)
+        work_status = status_from_ics.working_hours_status(work_hours, now=now)
+        self.assertEqual(work_status["until"], "2024-01-14T22:00:00+00:00")
+
     def test_next_event_display_excludes_outside_work_hours(self):
         work_hours = self.build_work_hours()
         self.set_now(datetime(2024, 1, 1, 7, 30, tzinfo=timezone.utc))
@@ -201,6 +330,1335 @@ class StatusFromIcsTests(unittest.TestCase):
         )
         self.assertIsNone(status_from_ics.next_event_for_display(ics_text, work_hours))
 
+    def test_keywords_match_whole_words_only(self):
+        self.assertTrue(status_from_ics.is_ooo("Annual Leave"))
+        self.assertTrue(status_from_ics.is_ooo("OOO - dentist"))
+        self.assertFalse(status_from_ics.is_ooo("Cleaver sync"))
+        self.assertFalse(status_from_ics.is_ooo("Spotoo review"))
+        self.assertTrue(status_from_ics.should_ignore("Canceled: 1:1"))
+
+    def test_title_rule_kinds_match_independently(self):
+        with self.assertLogs(level="WARNING"):
+            rules = status_from_ics.build_event_rules(
+                {
+                    "ooo_keywords": ["out of office"],
+                    "ignore_keywords": ["office hours"],
+                    "ooo_patterns": ["(a)\\1x", "("],
+                    "ignore_categories": 5,
+                }
+            )
+        self.assertEqual(status_from_ics.title_rule_kinds("Out of office hours", rules), {"ooo", "ignore"})
+        self.assertEqual(status_from_ics.title_rule_kinds("aax", rules), {"ooo"})
+        self.assertEqual(rules["ignore_categories"], status_from_ics.DEFAULT_EVENT_RULES["ignore_categories"])
+
+    def test_category_and_organizer_rules_classify_events(self):
+        from icalendar import Event
+
+        rules = status_from_ics.build_event_rules(
+            {
+                "ooo_categories": ["Vacation"],
+                "ignore_organizers": ["@noreply.example.com"],
+                "ooo_patterns": ["^holiday\\b", "("],
+            }
+        )
+        vacation = Event()
+        vacation.add("uid", "a")
+        vacation.add("summary", "Trip")
+        vacation.add("categories", ["Travel", "Vacation"])
+        robot = Event()
+        robot.add("uid", "b")
+        robot.add("summary", "Build report")
+        robot.add("organizer", "mailto:Bot@NoReply.Example.com")
+        holiday = Event()
+        holiday.add("uid", "c")
+        holiday.add("summary", "Holiday party")
+        self.assertEqual(status_from_ics.classify_event(vacation, rules), status_from_ics.EVENT_OOO)
+        self.assertEqual(status_from_ics.classify_event(robot, rules), status_from_ics.EVENT_IGNORED)
+        self.assertEqual(status_from_ics.classify_event(holiday, rules), status_from_ics.EVENT_OOO)
+
+    def test_classification_cache_sees_category_and_organizer_changes(self):
+        from icalendar import Event
+
+        rules = status_from_ics.build_event_rules(
+            {"ooo_categories": ["Vacation"], "ignore_organizers": ["bot@example.com"]}
+        )
+        cache = {}
+        plain = Event()
+        plain.add("uid", "a")
+        plain.add("summary", "Away")
+        tagged = Event()
+        tagged.add("uid", "a")
+        tagged.add("summary", "Away")
+        tagged.add("categories", ["Vacation"])
+        automated = Event()
+        automated.add("uid", "a")
+        automated.add("summary", "Away")
+        automated.add("organizer", "mailto:bot@example.com")
+        self.assertEqual(status_from_ics.classify_event(plain, rules, cache), 0)
+        self.assertEqual(status_from_ics.classify_event(tagged, rules, cache), status_from_ics.EVENT_OOO)
+        self.assertEqual(status_from_ics.classify_event(automated, rules, cache), status_from_ics.EVENT_IGNORED)
+        self.assertEqual(len(cache), 3)
+
+    def test_recurring_series_is_classified_once(self):
+        local_tz = status_from_ics.resolve_tzinfo("UTC")
+        rules = status_from_ics.build_event_rules()
+        calls = []
+        original = status_from_ics.title_rule_kinds
+
+        def counting(text, compiled):
+            calls.append(text)
+            return original(text, compiled)
+
+        status_from_ics.title_rule_kinds = counting
+        try:
+            index = status_from_ics.build_calendar_index(
+                build_large_feed(0, 2), local_tz, datetime(2024, 1, 8, tzinfo=local_tz), rules
+            )
+        finally:
+            status_from_ics.title_rule_kinds = original
+        self.assertGreater(len(index), 20)
+        self.assertEqual(sorted(calls), ["Standup 0", "Standup 1"])
+
+
+def format_ics_time(value, kind: str, tzid: str = "") -> tuple[str, str]:
+    if kind == "date":
+        return ";VALUE=DATE", value.strftime("%Y%m%d")
+    if kind == "utc":
+        return "", value.strftime("%Y%m%dT%H%M%SZ")
+    if kind == "tzid":
+        return f";TZID={tzid}", value.strftime("%Y%m%dT%H%M%S")
+    return "", value.strftime("%Y%m%dT%H%M%S")
+
+
+def build_random_series(rng: random.Random) -> dict:
+    kind = rng.choice(["utc", "tzid", "floating", "date"])
+    tzid = rng.choice(["America/Los_Angeles", "Europe/Berlin"])
+    start = datetime(
+        rng.randint(2018, 2023), rng.randint(1, 12), rng.randint(1, 28), rng.randint(0, 23), rng.choice([0, 30])
+    )
+    if kind == "date":
+        start = start.date()
+        duration = timedelta(days=rng.randint(1, 3))
+    else:
+        duration = timedelta(minutes=rng.choice([0, 15, 30, 60, 90, 600]))
+    freq = rng.choice(["DAILY", "WEEKLY", "WEEKLY"])
+    parts = [f"FREQ={freq}", f"INTERVAL={rng.randint(1, 4)}"]
+    if freq == "WEEKLY" or rng.random() < 0.3:
+        days = {start.weekday()} | set(rng.sample(range(7), rng.randint(0, 4)))
+        parts.append("BYDAY=" + ",".join(status_from_ics.RRULE_WEEKDAYS[day] for day in sorted(days)))
+        if freq == "DAILY":
+            parts[1] = "INTERVAL=1"
+    if rng.random() < 0.3:
+        parts.append("WKST=" + rng.choice(["MO", "SU", "WE"]))
+    ending = rng.choice(["none", "count", "until"])
+    if ending == "count":
+        parts.append(f"COUNT={rng.randint(1, 2500)}")
+    elif ending == "until":
+        until = datetime(rng.randint(2023, 2025), rng.randint(1, 12), rng.randint(1, 28), 12)
+        until_kind = {"tzid": "utc", "utc": "utc"}.get(kind, kind)
+        parts.append("UNTIL=" + format_ics_time(until.date() if kind == "date" else until, until_kind)[1])
+    return {"kind": kind, "tzid": tzid, "start": start, "duration": duration, "rrule": ";".join(parts)}
+
+
+def build_series_ics(series: dict, exdates=(), moved=()) -> str:
+    kind, tzid = series["kind"], series["tzid"]
+    start_params, start_value = format_ics_time(series["start"], kind, tzid)
+    end_params, end_value = format_ics_time(series["start"] + series["duration"], kind, tzid)
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "BEGIN:VEVENT",
+        "UID:series-1",
+        f"DTSTART{start_params}:{start_value}",
+        f"DTEND{end_params}:{end_value}",
+        f"RRULE:{series['rrule']}",
+        "SUMMARY:Recurring",
+    ]
+    for exdate in exdates:
+        params, value = format_ics_time(exdate, kind, tzid)
+        lines.append(f"EXDATE{params}:{value}")
+    lines.append("END:VEVENT")
+    for original, new_start in moved:
+        rid_params, rid_value = format_ics_time(original, kind, tzid)
+        start_params, start_value = format_ics_time(new_start, kind, tzid)
+        end_params, end_value = format_ics_time(new_start + series["duration"], kind, tzid)
+        lines.extend(
+            [
+                "BEGIN:VEVENT",
+                "UID:series-1",
+                f"RECURRENCE-ID{rid_params}:{rid_value}",
+                f"DTSTART{start_params}:{start_value}",
+                f"DTEND{end_params}:{end_value}",
+                "SUMMARY:Moved",
+                "END:VEVENT",
+            ]
+        )
+    lines.append("END:VCALENDAR")
+    return "\n".join(lines)
+
+
+def occurrence_set(events) -> list:
+    result = []
+    for event in events:
+        start = event.get("DTSTART").dt
+        end = status_from_ics.event_end_value(event, start)
+        result.append((str(event.get("SUMMARY")), repr(start), repr(end)))
+    return sorted(result)
+
+
+@unittest.skipUnless(HAS_RECURRENCE_DEPS, "requires dateutil, ics and recurring_ical_events")
+class RecurrenceFastPathTests(unittest.TestCase):
+    def library_events(self, ics_text: str, start: datetime, end: datetime) -> list:
+        from recurring_ical_events import of
+
+        return list(of(status_from_ics.parse_icalendar(ics_text)).between(start, end))
+
+    def test_fast_path_matches_library_for_random_rules(self):
+        rng = random.Random(20240101)
+        local_tz = status_from_ics.resolve_tzinfo("America/Los_Angeles")
+        fast_path_used = 0
+        for _ in range(300):
+            series = build_random_series(rng)
+            window_start = datetime(2024, rng.randint(1, 12), rng.randint(1, 28), rng.randint(0, 23), tzinfo=local_tz)
+            window_end = window_start + timedelta(days=rng.choice([1, 2, 7, 21]))
+            base = self.library_events(build_series_ics(series), window_start, window_end)
+            starts = [event.get("DTSTART").dt for event in base]
+            exdates = rng.sample(starts, min(len(starts), rng.randint(0, 2)))
+            remaining = [value for value in starts if value not in exdates]
+            moved = [
+                (value, value + timedelta(days=rng.choice([-3, 1, 10])))
+                for value in rng.sample(remaining, min(len(remaining), rng.randint(0, 1)))
+            ]
+            ics_text = build_series_ics(series, exdates, moved)
+            calendar = status_from_ics.parse_icalendar(ics_text)
+            if status_from_ics.fast_expand_series(calendar.walk("VEVENT"), window_start, window_end) is not None:
+                fast_path_used += 1
+            expected = occurrence_set(self.library_events(ics_text, window_start, window_end))
+            actual = occurrence_set(status_from_ics.expanded_events(calendar, window_start, window_end))
+            self.assertEqual(actual, expected, f"{series} window={window_start}")
+        self.assertGreater(fast_path_used, 250)
+
+    def test_unsupported_rule_falls_back_to_library(self):
+        local_tz = status_from_ics.resolve_tzinfo("UTC")
+        ics_text = "\n".join(
+            [
+                "BEGIN:VCALENDAR",
+                "VERSION:2.0",
+                "BEGIN:VEVENT",
+                "UID:monthly",
+                "DTSTART:20190104T090000Z",
+                "DTEND:20190104T100000Z",
+                "RRULE:FREQ=MONTHLY;BYDAY=1FR",
+                "SUMMARY:Monthly review",
+                "END:VEVENT",
+                "END:VCALENDAR",
+            ]
+        )
+        calendar = status_from_ics.parse_icalendar(ics_text)
+        window_start = datetime(2024, 3, 1, tzinfo=local_tz)
+        window_end = datetime(2024, 3, 2, tzinfo=local_tz)
+        self.assertIsNone(status_from_ics.fast_expand_series(calendar.walk("VEVENT"), window_start, window_end))
+        events = status_from_ics.expanded_events(calendar, window_start, window_end)
+        self.assertEqual(occurrence_set(events), occurrence_set(self.library_events(ics_text, window_start, window_end)))
+        self.assertEqual(len(events), 1)
+
+
+@unittest.skipUnless(HAS_RECURRENCE_DEPS, "requires dateutil, ics and recurring_ical_events")
+class DiagnoseTests(unittest.TestCase):
+    def test_diagnose_ranks_series_and_flags_runaway_rules(self):
+        local_tz = status_from_ics.resolve_tzinfo("UTC")
+        ics_text = "\n".join(
+            [
+                "BEGIN:VCALENDAR",
+                "VERSION:2.0",
+                "BEGIN:VEVENT",
+                "UID:standup",
+                "DTSTART:20240101T090000Z",
+                "DTEND:20240101T091500Z",
+                "RRULE:FREQ=DAILY",
+                "SUMMARY:Standup",
+                "END:VEVENT",
+                "BEGIN:VEVENT",
+                "UID:ping",
+                "DTSTART:20240101T090000Z",
+                "DTEND:20240101T090500Z",
+                "RRULE:FREQ=MINUTELY;INTERVAL=30",
+                "SUMMARY:Ping",
+                "END:VEVENT",
+                "BEGIN:VEVENT",
+                "UID:odd",
+                "DTSTART;TZID=Mars/Olympus:20240105T100000",
+                "DTEND;TZID=Mars/Olympus:20240105T110000",
+                "SUMMARY:Odd zone",
+                "END:VEVENT",
+                "END:VCALENDAR",
+            ]
+        )
+        report = status_from_ics.diagnose_calendar(ics_text, local_tz, datetime(2024, 1, 2, tzinfo=local_tz))
+        self.assertEqual((report["vevents"], report["recurring_masters"], report["vtimezones"]), (3, 2, 0))
+        self.assertEqual(
+            [(entry["summary"], entry["path"]) for entry in report["series"]],
+            [("Ping", "library"), ("Standup", "fast")],
+        )
+        self.assertEqual(report["series"][1]["occurrences"], 91)
+        self.assertEqual(report["occurrences"], sum(entry["occurrences"] for entry in report["series"]) + 1)
+        self.assertEqual(set(report["timings"]), {"parse", "expand", "timezones", "classify"})
+        warnings = "\n".join(report["warnings"])
+        self.assertIn("repeats MINUTELY", warnings)
+        self.assertIn("generates", warnings)
+        self.assertIn("Mars/Olympus", warnings)
+        self.assertNotIn("Standup", warnings)
+
+
+def build_large_feed(single_events: int, recurring_events: int) -> str:
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0"]
+    base = datetime(2024, 1, 1, 8, tzinfo=timezone.utc)
+    for index in range(single_events):
+        start = base + timedelta(minutes=37 * index)
+        end = start + timedelta(minutes=30)
+        lines.extend(
+            [
+                "BEGIN:VEVENT",
+                f"UID:single-{index}",
+                f"DTSTART:{start:%Y%m%dT%H%M%SZ}",
+                f"DTEND:{end:%Y%m%dT%H%M%SZ}",
+                f"SUMMARY:Project sync {index % 40}",
+                "END:VEVENT",
+            ]
+        )
+    for index in range(recurring_events):
+        lines.extend(
+            [
+                "BEGIN:VEVENT",
+                f"UID:recurring-{index}",
+                "DTSTART;TZID=America/Los_Angeles:20190107T090000",
+                "DTEND;TZID=America/Los_Angeles:20190107T091500",
+                "RRULE:FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR",
+                f"SUMMARY:Standup {index % 5}",
+                "END:VEVENT",
+            ]
+        )
+    lines.append("END:VCALENDAR")
+    return "\n".join(lines)
+
+
+@unittest.skipUnless(HAS_RECURRENCE_DEPS, "requires dateutil, ics and recurring_ical_events")
+class CalendarIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.original_timezone = status_from_ics.TIMEZONE_NAME
+        self.original_now_local = status_from_ics.now_local
+        status_from_ics.TIMEZONE_NAME = "UTC"
+        status_from_ics.CALENDAR_INDEXES.clear()
+
+    def tearDown(self):
+        status_from_ics.TIMEZONE_NAME = self.original_timezone
+        status_from_ics.now_local = self.original_now_local
+        status_from_ics.CALENDAR_INDEXES.clear()
+
+    def test_index_stays_within_per_group_memory_budget(self):
+        ics_text = build_large_feed(1500, 20)
+        local_tz = status_from_ics.resolve_tzinfo("UTC")
+        now = datetime(2024, 1, 20, tzinfo=local_tz)
+        # Keep the warm-up index alive so its titles stay interned; otherwise a
+        # resize of the interpreter-wide interned-string table can land in
+        # the measurement depending on which modules were imported first.
+        warm_index = status_from_ics.build_calendar_index(ics_text, local_tz, now)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            index = status_from_ics.build_calendar_index(ics_text, local_tz, now)
+            gc.collect()
+            with_index = tracemalloc.get_traced_memory()[0]
+            occurrences = len(index)
+            del index
+            gc.collect()
+            residue = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+        # Allocations that outlive the index (interpreter and library
+        # bookkeeping) are not part of its footprint, but must stay far below
+        # the parsed component tree.
+        retained = with_index - before - residue
+        self.assertLess(residue, 256 * 1024)
+        self.assertEqual(occurrences, len(warm_index))
+        self.assertGreater(occurrences, 2000)
+        # Budget: 64 bytes per occurrence plus fixed overhead, far below the
+        # component tree the index replaces.
+        self.assertLess(retained, 64 * occurrences + 16 * 1024)
+
+    def test_current_event_lookup_is_one_bisect_under_a_long_vacation(self):
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+        records = [(base, base + 21 * 86400, "Vacation", status_from_ics.EVENT_OOO, "")]
+        records += [(base + slot * 900, base + slot * 900 + 600, f"Meeting {slot}", 0, "") for slot in range(1, 2000)]
+        index = status_from_ics.CalendarIndex(records, base, base + 30 * 86400, base)
+        reads = []
+
+        class CountingColumn(list):
+            def __getitem__(self, position):
+                reads.append(position)
+                return super().__getitem__(position)
+
+        for now_ts in (base + 100, base + 1000 * 900 + 300, base + 20 * 86400, base + 22 * 86400):
+            expected = next(
+                (position for position in range(len(index)) if index.starts[position] <= now_ts < index.ends[position]),
+                -1,
+            )
+            self.assertEqual(status_from_ics.current_position(index, now_ts), expected)
+        self.assertEqual(status_from_ics.current_position(index, base + 1000 * 900 + 300), 0)
+        index.starts = CountingColumn(index.starts)
+        index.ends_reach = CountingColumn(index.ends_reach)
+        status_from_ics.current_position(index, base + 1000 * 900 + 300)
+        self.assertLess(len(reads), 16)
+
+    def test_titles_are_interned_across_occurrences(self):
+        local_tz = status_from_ics.resolve_tzinfo("UTC")
+        index = status_from_ics.build_calendar_index(
+            build_large_feed(0, 2), local_tz, datetime(2024, 1, 8, tzinfo=local_tz)
+        )
+        titles = [title for title in index.titles if title == "Standup 0"]
+        self.assertGreater(len(titles), 10)
+        self.assertTrue(all(title is titles[0] for title in titles))
+        self.assertEqual(index.tzids, ("America/Los_Angeles",))
+
+    def test_cached_index_is_reused_for_unchanged_feed(self):
+        status_from_ics.now_local = lambda tz: datetime(2024, 1, 1, 8, 10, tzinfo=timezone.utc).astimezone(tz)
+        ics_text = build_large_feed(3, 0)
+        first = status_from_ics.load_calendar_index("group", ics_text)
+        second = status_from_ics.load_calendar_index("group", ics_text)
+        self.assertIs(first, second)
+        event = status_from_ics.current_calendar_event(ics_text, first)
+        self.assertEqual(event["name"], "Project sync 0")
+        self.assertEqual(event["end"].isoformat(), "2024-01-01T08:30:00+00:00")
+        upcoming = status_from_ics.next_calendar_event(ics_text, first)
+        self.assertEqual(upcoming["start"].isoformat(), "2024-01-01T08:37:00+00:00")
+
+    def test_restart_reuses_index_snapshot_until_rules_change(self):
+        status_from_ics.now_local = lambda tz: datetime(2024, 1, 1, 8, 10, tzinfo=timezone.utc).astimezone(tz)
+        ics_text = build_large_feed(3, 0)
+        with tempfile.TemporaryDirectory() as tmp:
+            snapshot_path = os.path.join(tmp, "calendar.ics.index")
+            built = status_from_ics.load_calendar_index("group", ics_text, snapshot_path=snapshot_path)
+            status_from_ics.CALENDAR_INDEXES.clear()
+            with mock.patch.object(status_from_ics, "build_calendar_index", side_effect=AssertionError("rebuilt")):
+                restored = status_from_ics.load_calendar_index("group", ics_text, snapshot_path=snapshot_path)
+            self.assertEqual(list(restored.starts), list(built.starts))
+            self.assertEqual(list(restored.flags), list(built.flags))
+            self.assertEqual(restored.titles, built.titles)
+            self.assertEqual(restored.tzids, built.tzids)
+            self.assertEqual((restored.digest, restored.built_at), (built.digest, built.built_at))
+
+            status_from_ics.CALENDAR_INDEXES.clear()
+            rules = status_from_ics.build_event_rules({"ignore_keywords": ["standup"]})
+            with mock.patch.object(
+                status_from_ics, "build_calendar_index", wraps=status_from_ics.build_calendar_index
+            ) as build:
+                status_from_ics.load_calendar_index("group", ics_text, rules, snapshot_path=snapshot_path)
+            build.assert_called_once()
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, text="", headers=None, chunk_size=None):
+        self.status_code = status_code
+        self.body = text.encode("utf-8")
+        self.headers = headers or {}
+        self.chunk_size = chunk_size
+        self.chunks_read = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size=1):
+        chunk_size = self.chunk_size or chunk_size
+        for offset in range(0, len(self.body), chunk_size):
+            self.chunks_read += 1
+            yield self.body[offset : offset + chunk_size]
+
+
+@unittest.skipUnless(HAS_DEPS, "requires dateutil and ics")
+class FeedRefreshTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = str(Path(self.tmp.name) / "calendar.ics")
+        status_from_ics.FEED_REFRESH_STATES.clear()
+
+    def tearDown(self):
+        status_from_ics.FEED_REFRESH_STATES.clear()
+        self.tmp.cleanup()
+
+    def test_interval_adapts_to_change_frequency(self):
+        state = {"interval": 300.0, "next_fetch": 0.0}
+        with mock.patch.object(status_from_ics, "ICS_REFRESH_JITTER", 0.0), mock.patch.object(
+            status_from_ics, "seconds_until_active_refresh", return_value=0.0
+        ):
+            status_from_ics.schedule_feed_refresh(state, 1000.0, False)
+            self.assertEqual(state["interval"], 450.0)
+            self.assertEqual(state["next_fetch"], 1450.0)
+            status_from_ics.schedule_feed_refresh(state, 1000.0, True)
+            self.assertEqual(state["interval"], 225.0)
+            for _ in range(20):
+                status_from_ics.schedule_feed_refresh(state, 1000.0, False)
+            self.assertEqual(state["interval"], status_from_ics.ICS_REFRESH_MAX_SECONDS)
+            status_from_ics.schedule_feed_refresh(state, 1000.0, True, lifetime=7200.0)
+            self.assertEqual(state["next_fetch"], 1000.0 + status_from_ics.ICS_REFRESH_MAX_SECONDS)
+
+    def test_off_hours_slow_down_until_the_day_starts(self):
+        state = {"interval": 300.0, "next_fetch": 0.0}
+        with mock.patch.object(status_from_ics, "ICS_REFRESH_JITTER", 0.0), mock.patch.object(
+            status_from_ics, "seconds_until_active_refresh", return_value=600.0
+        ):
+            status_from_ics.schedule_feed_refresh(state, 0.0, True)
+        self.assertEqual(state["next_fetch"], 600.0)
+
+    def test_cache_lifetime_headers(self):
+        parse = status_from_ics.parse_cache_lifetime
+        self.assertEqual(parse({"Cache-Control": "public, max-age=600", "Age": "100"}, 0), 500.0)
+        self.assertEqual(parse({"Cache-Control": "no-cache"}, 0), 0.0)
+        self.assertEqual(
+            parse({"Date": "Mon, 01 Jan 2024 00:00:00 GMT", "Expires": "Mon, 01 Jan 2024 00:15:00 GMT"}, 0),
+            900.0,
+        )
+        self.assertEqual(parse({"Expires": "0"}, 0), 0.0)
+        self.assertIsNone(parse({}, 0))
+
+    def test_unmodified_feed_is_revalidated_with_etag(self):
+        ics_text = build_all_day_ics("Out of Office", "20240101", "20240102")
+        first = FakeResponse(text=ics_text, headers={"ETag": '"v1"'})
+        with mock.patch("requests.get", return_value=first):
+            self.assertEqual(status_from_ics.fetch_ics_text("https://example.com/a.ics", self.cache_path), ics_text)
+        status_from_ics.FEED_REFRESH_STATES[self.cache_path]["next_fetch"] = 0.0
+        with mock.patch("requests.get", return_value=FakeResponse(status_code=304)) as get:
+            self.assertEqual(status_from_ics.fetch_ics_text("https://example.com/a.ics", self.cache_path), ics_text)
+        self.assertEqual(get.call_args.kwargs["headers"]["If-None-Match"], '"v1"')
+        state = status_from_ics.FEED_REFRESH_STATES[self.cache_path]
+        self.assertEqual(state["changes"], 1)
+        self.assertGreater(state["next_fetch"], 0.0)
+
+
+    def test_restart_sees_unchanged_non_utf8_feed_as_unchanged(self):
+        ics_text = build_all_day_ics("Caf\u00e9 day", "20240101", "20240102")
+        response = FakeResponse(text=ics_text, chunk_size=7)
+        response.body = response.body.replace(b"day", b"d\xe9y")
+        url = "https://example.com/a.ics"
+        with mock.patch("requests.get", return_value=response):
+            text = status_from_ics.fetch_ics_text(url, self.cache_path)
+        self.assertIn("\ufffd", text)
+        self.assertEqual(
+            status_from_ics.FEED_REFRESH_STATES[self.cache_path]["digest"], status_from_ics.ics_digest(text)
+        )
+        status_from_ics.FEED_REFRESH_STATES.clear()
+        response.chunk_size = 5
+        state = status_from_ics.feed_refresh_state(self.cache_path, 0.0)
+        state["next_fetch"] = 0.0
+        with mock.patch("requests.get", return_value=response):
+            self.assertEqual(status_from_ics.fetch_ics_text(url, self.cache_path), text)
+        self.assertEqual(state["changes"], 0)
+
+    def test_fresh_cache_is_served_without_importing_the_http_stack(self):
+        ics_text = build_all_day_ics("Out of Office", "20240101", "20240102")
+        status_from_ics.write_ics_cache(self.cache_path, ics_text)
+        with mock.patch.object(status_from_ics, "ICS_REFRESH_SECONDS", 300), mock.patch.object(
+            status_from_ics, "lazy_import", side_effect=AssertionError("imported")
+        ):
+            self.assertEqual(status_from_ics.fetch_ics_text("https://example.com/a.ics", self.cache_path), ics_text)
+
+    def test_breaker_opens_after_failures_and_probes_once(self):
+        ics_text = build_all_day_ics("Out of Office", "20240101", "20240102")
+        url = "https://example.com/a.ics"
+        with mock.patch("requests.get", return_value=FakeResponse(text=ics_text)):
+            status_from_ics.fetch_ics_text(url, self.cache_path)
+        state = status_from_ics.FEED_REFRESH_STATES[self.cache_path]
+        with mock.patch("requests.get", side_effect=ConnectionError("down")) as get:
+            for _ in range(status_from_ics.ICS_BREAKER_THRESHOLD):
+                self.assertFalse(status_from_ics.feed_health(self.cache_path)["stale"])
+                state["next_fetch"] = 0.0
+                self.assertEqual(status_from_ics.fetch_ics_text(url, self.cache_path), ics_text)
+            self.assertEqual(state["breaker"], "open")
+            self.assertTrue(status_from_ics.feed_health(self.cache_path)["stale"])
+            state["next_fetch"] = 0.0
+            status_from_ics.fetch_ics_text(url, self.cache_path)
+            self.assertEqual(get.call_count, status_from_ics.ICS_BREAKER_THRESHOLD)
+            first_backoff = state["open_until"]
+            state["open_until"] = state["next_fetch"] = 0.0
+            status_from_ics.fetch_ics_text(url, self.cache_path)
+            self.assertEqual(get.call_count, status_from_ics.ICS_BREAKER_THRESHOLD + 1)
+            self.assertEqual(state["breaker"], "open")
+            self.assertGreater(state["open_until"] - time.time(), (first_backoff - time.time()) * 1.2)
+        state["open_until"] = state["next_fetch"] = 0.0
+        with mock.patch("requests.get", return_value=FakeResponse(text=ics_text)):
+            status_from_ics.fetch_ics_text(url, self.cache_path)
+        self.assertEqual(state["breaker"], "closed")
+        self.assertFalse(status_from_ics.feed_health(self.cache_path)["stale"])
+
+
+    def test_feed_is_streamed_into_compressed_cache(self):
+        import gzip
+
+        ics_text = build_large_feed(200, 2)
+        url = "https://example.com/a.ics"
+        response = FakeResponse(text=ics_text, chunk_size=4096)
+        with mock.patch("requests.get", return_value=response) as get:
+            self.assertEqual(status_from_ics.fetch_ics_text(url, self.cache_path), ics_text)
+        self.assertTrue(get.call_args.kwargs["stream"])
+        self.assertIn("gzip", get.call_args.kwargs["headers"]["Accept-Encoding"])
+        self.assertGreater(response.chunks_read, 1)
+        with open(self.cache_path, "rb") as f:
+            compressed = f.read()
+        self.assertLess(len(compressed), len(ics_text) // 4)
+        self.assertEqual(gzip.decompress(compressed).decode("utf-8"), ics_text)
+
+        Path(self.cache_path).write_text(ics_text)
+        self.assertEqual(status_from_ics.read_ics_cache(self.cache_path), ics_text)
+
+    def test_oversized_or_invalid_feed_keeps_previous_cache(self):
+        ics_text = build_all_day_ics("Out of Office", "20240101", "20240102")
+        url = "https://example.com/a.ics"
+        with mock.patch("requests.get", return_value=FakeResponse(text=ics_text)):
+            status_from_ics.fetch_ics_text(url, self.cache_path)
+        state = status_from_ics.FEED_REFRESH_STATES[self.cache_path]
+
+        html = FakeResponse(text="<html>" + "x" * 100000, chunk_size=1024)
+        state["next_fetch"] = 0.0
+        with mock.patch("requests.get", return_value=html):
+            self.assertEqual(status_from_ics.fetch_ics_text(url, self.cache_path), ics_text)
+        self.assertLessEqual(html.chunks_read, 2)
+
+        huge = FakeResponse(text=ics_text + "X" * 5000, chunk_size=1024)
+        state["next_fetch"] = 0.0
+        with mock.patch.object(status_from_ics, "ICS_MAX_BYTES", 4096), mock.patch(
+            "requests.get", return_value=huge
+        ):
+            self.assertEqual(status_from_ics.fetch_ics_text(url, self.cache_path), ics_text)
+        self.assertEqual(huge.chunks_read, 5)
+        self.assertEqual(state["failures"], 2)
+        self.assertEqual(status_from_ics.read_ics_cache(self.cache_path), ics_text)
+        self.assertFalse(Path(self.cache_path + ".tmp").exists())
+
+
+def build_timed_ics(*events) -> str:
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0"]
+    for position, (summary, start, end) in enumerate(events):
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{summary}-{position}",
+            "DTSTAMP:20240101T000000Z",
+            f"DTSTART:{start}",
+            f"DTEND:{end}",
+            f"SUMMARY:{summary}",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "\n".join(lines)
+
+
+@unittest.skipUnless(HAS_DEPS, "requires dateutil and ics")
+class MultiFeedTests(unittest.TestCase):
+    def setUp(self):
+        self.original_now_local = status_from_ics.now_local
+        self.original_timezone = status_from_ics.TIMEZONE_NAME
+        status_from_ics.TIMEZONE_NAME = "UTC"
+        status_from_ics.now_local = lambda tz: datetime(2024, 1, 2, 9, 45, tzinfo=timezone.utc).astimezone(tz)
+        status_from_ics.CALENDAR_INDEXES.clear()
+
+    def tearDown(self):
+        status_from_ics.now_local = self.original_now_local
+        status_from_ics.TIMEZONE_NAME = self.original_timezone
+        status_from_ics.CALENDAR_INDEXES.clear()
+
+    def test_feeds_merge_into_one_disjoint_timeline(self):
+        feeds = {
+            "https://example.com/work.ics": build_timed_ics(
+                ("Standup", "20240102T090000Z", "20240102T100000Z"),
+                ("Review", "20240102T093000Z", "20240102T110000Z"),
+                ("Planning", "20240102T140000Z", "20240102T150000Z"),
+            ),
+            "https://example.com/oncall.ics": build_timed_ics(
+                ("Standup", "20240102T090000Z", "20240102T100000Z"),
+                ("Pager OOO handover", "20240102T133000Z", "20240102T143000Z"),
+            ),
+            "https://example.com/pto.ics": build_timed_ics(
+                ("Vacation", "20240102T103000Z", "20240102T120000Z"),
+                ("Team lunch", "20240102T120000Z", "20240102T130000Z"),
+            ),
+        }
+        group = {
+            "display_name": "Sam",
+            "cache_path": "/tmp/sam.ics",
+            "feeds": status_from_ics.build_group_feeds(
+                [
+                    "https://example.com/work.ics",
+                    {"url": "https://example.com/oncall.ics", "mode": "meeting"},
+                    {"url": "https://example.com/pto.ics", "mode": "ooo"},
+                ],
+                "",
+                "/tmp/sam.ics",
+                {},
+                0,
+            ),
+        }
+        self.assertEqual(
+            [feed["cache_path"] for feed in group["feeds"]],
+            ["/tmp/sam.ics", "/tmp/sam-feed2.ics", "/tmp/sam-feed3.ics"],
+        )
+        with mock.patch.object(
+            status_from_ics, "fetch_ics_text", side_effect=lambda url, path, work_hours=None: feeds[url]
+        ):
+            index = status_from_ics.load_group_index(group)
+            self.assertIs(status_from_ics.load_group_index(group), index)
+
+        def hour(value):
+            return datetime.fromtimestamp(value, timezone.utc).strftime("%H:%M")
+
+        timeline = [
+            (hour(start), hour(end), title, bool(flags & status_from_ics.EVENT_OOO))
+            for start, end, title, flags in zip(index.starts, index.ends, index.titles, index.flags)
+        ]
+        self.assertEqual(
+            timeline,
+            [
+                ("09:00", "10:30", "Standup", False),
+                ("10:30", "12:00", "Vacation", True),
+                ("13:30", "15:00", "Pager OOO handover", False),
+            ],
+        )
+        event = status_from_ics.current_calendar_event(None, index)
+        self.assertEqual(event["name"], "Standup")
+        self.assertEqual(event["end"].strftime("%H:%M"), "10:30")
+
+    def test_local_directory_feed_is_reindexed_only_when_a_file_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            calendars = Path(tmp) / "alex"
+            calendars.mkdir()
+            (calendars / "work.ics").write_text(build_timed_ics(("Standup", "20240102T090000Z", "20240102T100000Z")))
+            pto = calendars / "pto.ics"
+            pto.write_text(build_timed_ics(("Dentist", "20240102T130000Z", "20240102T140000Z")))
+            (calendars / "notes.txt").write_text("not a calendar")
+            cache_path = str(Path(tmp) / "alex.ics")
+            group = {
+                "cache_path": cache_path,
+                "feeds": status_from_ics.build_group_feeds([calendars.as_uri() + "/"], "", cache_path, {}, 0),
+            }
+            self.addCleanup(status_from_ics.FEED_REFRESH_STATES.clear)
+            with mock.patch.object(
+                status_from_ics, "read_local_calendar", wraps=status_from_ics.read_local_calendar
+            ) as reads:
+                index = status_from_ics.load_group_index(group)
+                self.assertIs(status_from_ics.load_group_index(group), index)
+                self.assertEqual(reads.call_count, 1)
+                self.assertEqual(list(index.titles), ["Standup", "Dentist"])
+
+                pto.write_text(build_timed_ics(("Dentist", "20240102T150000Z", "20240102T160000Z")))
+                os.utime(pto, ns=(0, pto.stat().st_mtime_ns + 1_000_000_000))
+                changed = status_from_ics.load_group_index(group)
+                self.assertEqual(reads.call_count, 2)
+            self.assertEqual(datetime.fromtimestamp(changed.starts[1], timezone.utc).hour, 15)
+            self.assertIn("Dentist", status_from_ics.read_ics_cache(cache_path))
+
+            pto.unlink()
+            (calendars / "work.ics").unlink()
+            fallback = status_from_ics.load_group_index(group)
+            self.assertEqual(fallback.digest, changed.digest)
+            self.assertFalse(status_from_ics.feed_health(cache_path)["stale"])
+            for _ in range(status_from_ics.ICS_BREAKER_THRESHOLD - 1):
+                status_from_ics.load_group_index(group)
+            self.assertTrue(status_from_ics.feed_health(cache_path)["stale"])
+
+    def test_availability_publishes_merged_busy_and_work_intervals(self):
+        ics_text = build_timed_ics(
+            ("Standup", "20240102T090000Z", "20240102T100000Z"),
+            ("Review", "20240102T093000Z", "20240102T110000Z"),
+        )
+        local_tz = status_from_ics.resolve_tzinfo("UTC")
+        index = status_from_ics.build_calendar_index(ics_text, local_tz, datetime(2024, 1, 2, 9, tzinfo=local_tz))
+        group = {
+            "index": 0,
+            "display_name": "Sam",
+            "work_hours": status_from_ics.build_work_hours_config(
+                "", "", "", work_hours_windows="Tue 08:00-12:00,13:00-17:00"
+            ),
+        }
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(
+            status_from_ics, "AVAILABILITY_DIR", tmp
+        ), mock.patch.dict(status_from_ics.PUBLISHED_AVAILABILITY, clear=True):
+            status_from_ics.publish_availability(group, index)
+            data = json.loads((Path(tmp) / "group-1.json").read_text())
+        day = datetime(2024, 1, 2, tzinfo=timezone.utc).timestamp()
+        self.assertEqual(data["busy"], [[day + 9 * 3600, day + 11 * 3600]])
+        self.assertEqual(
+            data["work"][:2],
+            [[day + 8 * 3600, day + 12 * 3600], [day + 13 * 3600, day + 17 * 3600]],
+        )
+
+
+@unittest.skipUnless(HAS_DEPS, "requires dateutil and ics")
+class PollCycleTests(unittest.TestCase):
+    def test_slow_group_publishes_last_known_status_until_it_finishes(self):
+        import concurrent.futures
+        import threading
+
+        release = threading.Event()
+        groups = [
+            {"display_name": "Fast", "cache_path": "fast"},
+            {"display_name": "Slow", "cache_path": "slow"},
+        ]
+
+        def resolve(group):
+            if group["display_name"] == "Slow":
+                release.wait(5)
+            return {"state": "meeting", "label": "IN A MEETING"}
+
+        last_people = [
+            {"state": "available", "label": "AVAILABLE", "name": "Fast"},
+            {"state": "ooo", "label": "OUT OF OFFICE", "name": "Slow"},
+        ]
+        tasks = {}
+        with mock.patch.object(status_from_ics, "resolve_and_write", side_effect=resolve) as resolver, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            people = status_from_ics.run_poll_cycle(
+                groups, executor, tasks, last_people, time.monotonic() + 0.2
+            )
+            self.assertEqual(people[0]["state"], "meeting")
+            self.assertNotIn("status_stale", people[0])
+            self.assertEqual(people[1]["state"], "ooo")
+            self.assertTrue(people[1]["status_stale"])
+            self.assertEqual(people[1]["name"], "Slow")
+
+            people = status_from_ics.run_poll_cycle(
+                groups, executor, tasks, last_people, time.monotonic() + 0.2
+            )
+            self.assertTrue(people[1]["status_stale"])
+            self.assertEqual(resolver.call_count, 3)
+
+            release.set()
+            people = status_from_ics.run_poll_cycle(
+                groups, executor, tasks, last_people, time.monotonic() + 2
+            )
+        self.assertEqual(people[1]["state"], "meeting")
+        self.assertNotIn("status_stale", people[1])
+
+    def test_status_shards_are_rewritten_only_when_a_person_changes(self):
+        groups = [
+            {"display_name": "Alex", "teams": ["Platform"]},
+            {"display_name": "Sam", "teams": ["Platform", "Design"]},
+            {"display_name": "alex"},
+        ]
+        people = [
+            {"name": "Alex", "state": "available", "label": "AVAILABLE", "updated": "2024-01-02T09:00:00"},
+            {"name": "Sam", "state": "meeting", "label": "IN A MEETING", "updated": "2024-01-02T09:00:00"},
+            {"name": "alex", "state": "ooo", "label": "OUT OF OFFICE", "updated": "2024-01-02T09:00:00"},
+        ]
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(
+            status_from_ics, "STATUS_SHARD_DIR", tmp
+        ), mock.patch.dict(status_from_ics.PUBLISHED_SHARDS, clear=True):
+            self.assertEqual(status_from_ics.write_status_shards(groups, people), 6)
+            index = json.loads((Path(tmp) / "index.json").read_text())
+            self.assertEqual(index["people"]["alex"], "people/alex-3.json")
+            self.assertEqual(index["teams"], {"Platform": "teams/platform.json", "Design": "teams/design.json"})
+            team = json.loads((Path(tmp) / "teams" / "platform.json").read_text())
+            self.assertEqual([person["name"] for person in team["people"]], ["Alex", "Sam"])
+
+            people = [{**person, "updated": "2024-01-02T09:00:30"} for person in people]
+            self.assertEqual(status_from_ics.write_status_shards(groups, people), 0)
+
+            people[1] = {**people[1], "state": "available", "label": "AVAILABLE"}
+            self.assertEqual(status_from_ics.write_status_shards(groups, people), 3)
+            shard = json.loads((Path(tmp) / "people" / "sam.json").read_text())
+            self.assertEqual(shard["people"][0]["state"], "available")
+
+    def test_plans_are_published_in_shards_but_not_in_status_json(self):
+        groups = [{"display_name": "Alex"}]
+        plan = [{"start": "2024-01-02T09:00:00", "end": "2024-01-02T10:00:00", "state": "meeting"}]
+        people = [{"name": "Alex", "state": "meeting", "plan": plan, "plan_version": 3}]
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(
+            status_from_ics, "STATUS_SHARD_DIR", tmp
+        ), mock.patch.object(
+            status_from_ics, "STATUS_JSON_PATH", os.path.join(tmp, "status.json")
+        ), mock.patch.dict(status_from_ics.PUBLISHED_SHARDS, clear=True):
+            status_from_ics.write_people(people)
+            status_from_ics.write_status_shards(groups, people)
+            status = json.loads((Path(tmp) / "status.json").read_text())
+            self.assertEqual(status["people"], [{"name": "Alex", "state": "meeting"}])
+            shard = json.loads((Path(tmp) / "people" / "alex.json").read_text())
+            self.assertEqual(shard["people"][0]["plan"], plan)
+
+            with mock.patch.object(status_from_ics, "STATUS_JSON_PLANS", True):
+                status_from_ics.write_people(people)
+            status = json.loads((Path(tmp) / "status.json").read_text())
+            self.assertEqual(status["people"][0]["plan_version"], 3)
+
+
+@unittest.skipUnless(HAS_DEPS, "requires dateutil and ics")
+class BatchEvaluationTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_timezone = status_from_ics.TIMEZONE_NAME
+        self.original_now_local = status_from_ics.now_local
+        status_from_ics.TIMEZONE_NAME = "America/Los_Angeles"
+        status_from_ics.FEED_REFRESH_STATES.clear()
+
+    def tearDown(self):
+        status_from_ics.TIMEZONE_NAME = self.original_timezone
+        status_from_ics.now_local = self.original_now_local
+        self.tmp.cleanup()
+
+    def build_groups(self, count: int) -> list[dict]:
+        local_tz = status_from_ics.get_local_tz()
+        built = datetime(2024, 1, 8, tzinfo=local_tz)
+        feeds = [
+            status_from_ics.build_calendar_index(build_large_feed(40 + variant * 20, variant + 1), local_tz, built)
+            for variant in range(4)
+        ]
+        groups = []
+        for group_index in range(count):
+            groups.append(
+                {
+                    "index": group_index,
+                    "display_name": f"Person {group_index}",
+                    "cache_path": str(Path(self.tmp.name) / f"calendar-{group_index}.ics"),
+                    "override_path": str(Path(self.tmp.name) / f"override-{group_index}.json"),
+                    "work_hours": status_from_ics.build_work_hours_config("08:00", "17:00", "Mon-Fri")
+                    if group_index % 2
+                    else None,
+                    "test_index": feeds[group_index % len(feeds)],
+                }
+            )
+        return groups
+
+    def test_batch_matches_per_group_resolution(self):
+        groups = self.build_groups(12)
+        Path(groups[3]["override_path"]).write_text(
+            json.dumps({"state": "busy", "label": "BUSY", "detail": "Call", "until": "2024-01-09T12:00:00-08:00"})
+        )
+        evaluator = status_from_ics.BatchEvaluator(len(groups))
+        for group_index, group in enumerate(groups):
+            evaluator.set_index(group_index, group["test_index"])
+        rng = random.Random(7)
+        local_tz = status_from_ics.get_local_tz()
+        moments = sorted(
+            datetime(2024, 1, 8, tzinfo=local_tz) + timedelta(minutes=rng.randrange(0, 4 * 24 * 60))
+            for _ in range(60)
+        )
+        fields = ("state", "label", "detail", "until", "next_event_at", "source")
+        for moment in moments:
+            status_from_ics.now_local = lambda tz, moment=moment: moment.astimezone(tz)
+            batch = evaluator.evaluate(groups, moment)
+            for group, payload in zip(groups, batch):
+                with mock.patch.object(status_from_ics, "refresh_group_index", return_value=group["test_index"]):
+                    expected = status_from_ics.resolve_group_status(group)
+                self.assertEqual(
+                    {field: payload.get(field) for field in fields},
+                    {field: expected.get(field) for field in fields},
+                    f"{group['display_name']} at {moment}",
+                )
+
+    def test_only_expired_or_changed_groups_are_recomputed(self):
+        groups = self.build_groups(12)
+        evaluator = status_from_ics.BatchEvaluator(len(groups))
+        for group_index, group in enumerate(groups):
+            evaluator.set_index(group_index, group["test_index"])
+        moment = datetime(2024, 1, 9, 10, 5, tzinfo=status_from_ics.get_local_tz())
+        status_from_ics.now_local = lambda tz: moment.astimezone(tz)
+        first = evaluator.evaluate(groups, moment)
+        target = next(index for index, payload in enumerate(first) if payload["source"] != "calendar")
+        override = Path(groups[target]["override_path"])
+        with mock.patch.object(
+            status_from_ics, "compose_group_status", wraps=status_from_ics.compose_group_status
+        ) as compose, mock.patch.object(status_from_ics.os, "scandir", wraps=os.scandir) as scandir, \
+                mock.patch.object(status_from_ics.os, "stat", wraps=os.stat) as stat:
+            self.assertEqual(evaluator.evaluate(groups, moment), first)
+            self.assertEqual(compose.call_count, 0)
+            self.assertEqual(scandir.call_count, 1)
+            self.assertEqual(stat.call_count, 0)
+
+            override.write_text(json.dumps({"state": "busy", "label": "BUSY", "until": "2024-01-09T12:00:00-08:00"}))
+            people = evaluator.evaluate(groups, moment)
+            self.assertEqual(compose.call_count, 1)
+            self.assertEqual(people[target]["label"], "BUSY")
+            self.assertEqual(people[:target] + people[target + 1:], first[:target] + first[target + 1:])
+
+            override.unlink()
+            self.assertEqual(evaluator.evaluate(groups, moment)[target], first[target])
+            self.assertEqual(compose.call_count, 2)
+
+            later = datetime.fromtimestamp(min(evaluator.payload_until), moment.tzinfo)
+            expired = sum(1 for until in evaluator.payload_until if until <= later.timestamp())
+            evaluator.evaluate(groups, later)
+            self.assertEqual(compose.call_count, 2 + expired)
+            self.assertLess(expired, len(groups))
+
+    def test_group_still_refreshing_is_marked_stale(self):
+        groups = self.build_groups(2)
+        release = threading.Event()
+
+        def refresh(group):
+            if group["index"] == 1:
+                release.wait(5)
+            return group["test_index"]
+
+        status_from_ics.now_local = lambda tz: datetime(2024, 1, 9, 10, tzinfo=tz)
+        evaluator = status_from_ics.BatchEvaluator(len(groups))
+        tasks = {}
+        with mock.patch.object(status_from_ics, "refresh_group_index", side_effect=refresh), \
+                concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            people = status_from_ics.run_batch_cycle(groups, executor, tasks, evaluator, time.monotonic() + 0.2)
+            self.assertNotIn("status_stale", people[0])
+            self.assertTrue(people[1]["status_stale"])
+            release.set()
+            tasks[1].result(timeout=5)
+            people = status_from_ics.run_batch_cycle(groups, executor, tasks, evaluator, time.monotonic() + 2)
+        self.assertNotIn("status_stale", people[1])
+
+    def test_work_hours_answer_holds_until_valid_until(self):
+        config = status_from_ics.build_work_hours_config(
+            "", "", "", work_hours_windows="Mon-Fri 09:00-12:00,13:00-17:00; Sun 22:00-02:00",
+            holidays="2024-03-13",
+        )
+        local_tz = status_from_ics.get_local_tz()
+        rng = random.Random(11)
+        for _ in range(200):
+            moment = datetime(2024, 3, 6, tzinfo=local_tz) + timedelta(minutes=rng.randrange(0, 14 * 24 * 60))
+            inside = status_from_ics.is_within_work_hours(moment, config)
+            until = status_from_ics.work_hours_valid_until(moment, config)
+            self.assertGreater(until, moment.timestamp())
+            probe = moment
+            while probe.timestamp() < until:
+                self.assertEqual(status_from_ics.is_within_work_hours(probe, config), inside, probe)
+                probe = datetime.fromtimestamp(probe.timestamp() + 600, local_tz)
+            self.assertEqual(
+                status_from_ics.is_within_work_hours(datetime.fromtimestamp(until - 1, local_tz), config),
+                inside,
+            )
+
+    def test_status_plan_segments_match_evaluation_at_every_moment(self):
+        group = self.build_groups(2)[1]
+        local_tz = status_from_ics.get_local_tz()
+        start = datetime(2024, 1, 9, 7, 45, tzinfo=local_tz)
+        override = {"state": "busy", "label": "FOCUS", "detail": "", "until": "2024-01-09T12:30:00-08:00"}
+        plan = status_from_ics.build_status_plan(group, group["test_index"], override, None, start)
+        self.assertEqual(plan[0]["start"], start.isoformat())
+        self.assertEqual(plan[-1]["end"], (start + timedelta(hours=24)).isoformat())
+        for previous, segment in zip(plan, plan[1:]):
+            self.assertEqual(previous["end"], segment["start"])
+        self.assertIn("FOCUS", [segment["label"] for segment in plan])
+        self.assertIn("Outside working hours (8:00 AM-5:00 PM)", [segment.get("detail") for segment in plan])
+
+        evaluator = status_from_ics.BatchEvaluator(1)
+        evaluator.set_index(0, group["test_index"])
+        evaluator.set_override(0, override)
+        planned = {**group, "override_path": None}
+        for minute in range(0, 24 * 60, 11):
+            moment = start + timedelta(minutes=minute)
+            segment = next(
+                segment for segment in plan if datetime.fromisoformat(segment["end"]) > moment
+            )
+            payload = evaluator.evaluate([planned], moment)[0]
+            for field in status_from_ics.PLAN_FIELDS:
+                self.assertEqual(segment.get(field), payload.get(field) or None, f"{field} at {moment}")
+
+    def test_status_plan_is_rebuilt_only_when_its_inputs_change(self):
+        group = self.build_groups(1)[0]
+        moment = datetime(2024, 1, 9, 10, tzinfo=status_from_ics.get_local_tz())
+        status_from_ics.now_local = lambda tz: moment.astimezone(tz)
+        with mock.patch.dict(status_from_ics.STATUS_PLANS, clear=True), mock.patch.object(
+            status_from_ics, "build_status_plan", wraps=status_from_ics.build_status_plan
+        ) as builder:
+            first = status_from_ics.attach_status_plan(group, {}, group["test_index"], None, None)
+            moment += timedelta(hours=3)
+            second = status_from_ics.attach_status_plan(group, {}, group["test_index"], None, None)
+            self.assertEqual(builder.call_count, 1)
+            self.assertEqual(first["plan_version"], second["plan_version"])
+            override = {"state": "busy", "label": "BUSY", "until": "2024-01-09T14:00:00-08:00"}
+            third = status_from_ics.attach_status_plan(group, {}, group["test_index"], override, None)
+            self.assertEqual(builder.call_count, 2)
+            self.assertNotEqual(third["plan_version"], second["plan_version"])
+            moment += timedelta(hours=12)
+            status_from_ics.attach_status_plan(group, {}, group["test_index"], override, None)
+            self.assertEqual(builder.call_count, 3)
+
+    def test_hundreds_of_groups_evaluate_from_cached_state(self):
+        groups = self.build_groups(300)
+        evaluator = status_from_ics.BatchEvaluator(len(groups))
+        for group_index, group in enumerate(groups):
+            evaluator.set_index(group_index, group["test_index"])
+        moment = datetime(2024, 1, 9, 10, 7, tzinfo=status_from_ics.get_local_tz())
+        evaluator.evaluate(groups, moment)
+        with mock.patch.object(
+            status_from_ics.BatchEvaluator, "refresh_calendar", autospec=True
+        ) as refresh_calendar:
+            people = evaluator.evaluate(groups, moment + timedelta(seconds=30))
+        self.assertEqual(len(people), 300)
+        # Only groups whose current event ended or next event started in the
+        # last 30 seconds are recomputed.
+        self.assertEqual(refresh_calendar.call_count, 0)
+
+
+@unittest.skipUnless(HAS_DEPS, "requires dateutil and ics")
+class TransitionHistoryTests(unittest.TestCase):
+    def test_only_transitions_are_recorded_and_flushed_in_time_order(self):
+        meeting = {"state": "meeting", "source": "calendar", "label": "IN A MEETING"}
+        available = {"state": "available", "source": "default", "label": "AVAILABLE"}
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(status_from_ics, "HISTORY_DIR", tmp):
+            history = status_from_ics.TransitionHistory(2, ring_size=4)
+            self.assertEqual(history.record([available, meeting], 1000), 2)
+            self.assertEqual(history.record([available, meeting], 1030), 0)
+            self.assertEqual(history.record([meeting, {**meeting, "status_stale": True}], 1060), 1)
+            self.assertEqual(history.flush(force=True), 3)
+            self.assertEqual(history.flush(force=True), 0)
+
+            history.record([available, available], 1090)
+            self.assertEqual(history.flush(force=True), 2)
+            data = (Path(tmp) / "transitions.bin").read_bytes()
+            names = json.loads((Path(tmp) / "names.json").read_text())
+            reopened = status_from_ics.TransitionHistory(2)
+        records = list(status_from_ics.HISTORY_RECORD.iter_unpack(data))
+        self.assertEqual(len(data), 5 * status_from_ics.HISTORY_RECORD.size)
+        self.assertEqual(
+            [(ts, group) for ts, group, *_ in records],
+            [(1000, 0), (1000, 1), (1060, 0), (1090, 0), (1090, 1)],
+        )
+        self.assertEqual(
+            [names[record[2]] for record in records],
+            ["available", "meeting", "meeting", "available", "available"],
+        )
+        self.assertEqual(reopened.intern("IN A MEETING"), names.index("IN A MEETING"))
+
+    def test_restart_does_not_log_unchanged_status_again(self):
+        meeting = {"state": "meeting", "source": "calendar", "label": "IN A MEETING"}
+        available = {"state": "available", "source": "default", "label": "AVAILABLE"}
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(status_from_ics, "HISTORY_DIR", tmp):
+            history = status_from_ics.TransitionHistory(3, ring_size=4)
+            history.record([available, meeting, available], 1000)
+            history.record([meeting, meeting, available], 1060)
+            history.flush(force=True)
+            with mock.patch.object(status_from_ics, "HISTORY_SEED_CHUNK_RECORDS", 2):
+                restarted = status_from_ics.TransitionHistory(4, ring_size=4)
+            self.assertEqual(restarted.flush(force=True), 0)
+            self.assertEqual(restarted.record([meeting, meeting, meeting, available], 1090), 2)
+            self.assertEqual(restarted.flush(force=True), 2)
+            records = list(status_from_ics.HISTORY_RECORD.iter_unpack((Path(tmp) / "transitions.bin").read_bytes()))
+        self.assertEqual([(ts, group) for ts, group, *_ in records][-2:], [(1090, 2), (1090, 3)])
+
+    def test_ring_keeps_only_the_most_recent_transitions(self):
+        ring = status_from_ics.TransitionRing(3)
+        for ts in range(5):
+            ring.append(ts, ts, 0, 0)
+        self.assertEqual([record[0] for record in ring.since(0)], [2, 3, 4])
+        self.assertEqual([record[0] for record in ring.since(4)], [4])
+        self.assertEqual(ring.last(), (4, 0, 0))
+
+
+@unittest.skipUnless(HAS_DEPS, "requires dateutil and ics")
+class ServiceNotifierTests(unittest.TestCase):
+    def test_pings_only_for_cycles_that_make_progress(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            address = str(Path(tmp) / "notify.sock")
+            systemd = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self.addCleanup(systemd.close)
+            systemd.bind(address)
+            systemd.settimeout(2)
+            env = {"NOTIFY_SOCKET": address, "WATCHDOG_USEC": "120000000"}
+            with mock.patch.dict(status_from_ics.os.environ, env):
+                notifier = status_from_ics.ServiceNotifier()
+                self.assertEqual(notifier.watchdog, 120)
+                people = [{"state": "available"}, {"state": "meeting", "status_stale": True}]
+                hung = concurrent.futures.Future()
+                hung.set_running_or_notify_cancel()
+                self.assertTrue(notifier.cycle_finished(people, 1.5, {1: hung}, now=1000))
+                first = systemd.recv(1024).decode().split("\n")
+                self.assertEqual(first, ["STATUS=Cycle 1: 2 people, 1 stale, 1.5s", "READY=1", "WATCHDOG=1"])
+
+                stuck_at = 1000 + status_from_ics.WATCHDOG_STUCK_SECONDS + 1
+                self.assertFalse(notifier.cycle_finished(people, 1.0, {1: hung}, now=stuck_at))
+                self.assertIn("hung", systemd.recv(1024).decode())
+                slow = status_from_ics.POLL_DEADLINE_SECONDS + status_from_ics.WATCHDOG_CYCLE_GRACE_SECONDS + 1
+                self.assertFalse(notifier.cycle_finished(people, slow, {}, now=stuck_at))
+                self.assertNotIn("WATCHDOG=1", systemd.recv(1024).decode())
+
+                queued = concurrent.futures.Future()
+                self.assertTrue(notifier.cycle_finished(people[:1], 1.0, {1: queued}, now=stuck_at))
+                self.assertEqual(systemd.recv(1024).decode().split("\n")[1:], ["WATCHDOG=1"])
+                queued.set_running_or_notify_cancel()
+                self.assertTrue(notifier.cycle_finished(people[:1], 1.0, {1: queued}, now=stuck_at))
+                self.assertEqual(systemd.recv(1024).decode().split("\n")[1:], ["WATCHDOG=1"])
+
+                # Idle waits ping every half WatchdogSec, but only after a healthy cycle.
+                notifier.watchdog = 0.1
+                notifier.idle(0.12)
+                systemd.setblocking(False)
+                pings = []
+                with contextlib.suppress(BlockingIOError):
+                    while True:
+                        pings.append(systemd.recv(1024).decode())
+                self.assertGreaterEqual(len(pings), 2)
+                self.assertEqual(set(pings), {"WATCHDOG=1"})
+                notifier.healthy = False
+                notifier.idle(0.12)
+                with self.assertRaises(BlockingIOError):
+                    systemd.recv(1024)
+
+            with mock.patch.dict(status_from_ics.os.environ):
+                status_from_ics.os.environ.pop("NOTIFY_SOCKET", None)
+                self.assertFalse(status_from_ics.sd_notify("READY=1"))
+
+
+@unittest.skipUnless(HAS_DEPS, "requires dateutil and ics")
+class StatusPublisherTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        groups = [
+            {"display_name": "Alex", "teams": ["Ops"]},
+            {"display_name": "Sam", "teams": []},
+        ]
+        self.publisher = status_from_ics.StatusPublisher(str(Path(self.tmp.name) / "status.sock"), groups)
+
+    def tearDown(self):
+        self.publisher.close()
+        self.tmp.cleanup()
+
+    def subscribe(self, request: bytes | None):
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.settimeout(2)
+        client.connect(self.publisher.path)
+        self.addCleanup(client.close)
+        reader = client.makefile("rb")
+        if request is not None:
+            self.assertEqual(json.loads(reader.readline())["event"], "snapshot")
+            client.sendall(request + b"\n")
+        return client, reader
+
+    def test_snapshot_then_filtered_changes(self):
+        available = {"state": "available", "label": "AVAILABLE", "updated": "2024-01-02T09:00:00"}
+        meeting = {"state": "meeting", "label": "IN A MEETING", "updated": "2024-01-02T09:00:30"}
+        self.assertEqual(self.publisher.publish([{**available, "name": "Alex"}, {**available, "name": "Sam"}]), 2)
+        _, everyone = self.subscribe(b"{}")
+        snapshot = json.loads(everyone.readline())
+        self.assertEqual(snapshot["event"], "snapshot")
+        self.assertEqual([entry["person"]["name"] for entry in snapshot["people"]], ["Alex", "Sam"])
+        _, sam = self.subscribe(b'{"people": ["sam"]}')
+        self.assertEqual([entry["index"] for entry in json.loads(sam.readline())["people"]], [1])
+        _, ops = self.subscribe(b'{"teams": ["ops"]}')
+        self.assertEqual([entry["index"] for entry in json.loads(ops.readline())["people"]], [0])
+
+        later = {**available, "updated": "2024-01-02T09:00:30", "plan": [], "plan_version": "x"}
+        self.assertEqual(
+            self.publisher.publish([{**meeting, "name": "Alex"}, {**later, "name": "Sam"}]),
+            1,
+        )
+        self.assertEqual(self.publisher.publish([{**meeting, "name": "Alex"}, {**meeting, "name": "Sam"}]), 1)
+        first = json.loads(everyone.readline())
+        self.assertEqual((first["event"], first["index"], first["person"]["state"]), ("change", 0, "meeting"))
+        self.assertEqual(json.loads(everyone.readline())["index"], 1)
+        self.assertEqual(json.loads(sam.readline())["index"], 1)
+        self.assertEqual(json.loads(ops.readline())["index"], 0)
+        self.assertNotIn("plan", first["person"])
+
+    def test_snapshot_on_connect_without_a_request(self):
+        self.publisher.publish([{"state": "available", "name": "Alex"}, {"state": "ooo", "name": "Sam"}])
+        client, reader = self.subscribe(None)
+        snapshot = json.loads(reader.readline())
+        self.assertEqual([entry["person"]["state"] for entry in snapshot["people"]], ["available", "ooo"])
+        # Closing the write side before any request still subscribes to everyone.
+        client.shutdown(socket.SHUT_WR)
+        self.publisher.publish([{"state": "meeting", "name": "Alex"}, {"state": "ooo", "name": "Sam"}])
+        change = json.loads(reader.readline())
+        self.assertEqual((change["event"], change["index"]), ("change", 0))
+
+    def test_slow_subscriber_is_disconnected(self):
+        client, reader = self.subscribe(b"{}")
+        self.assertEqual(json.loads(reader.readline())["event"], "snapshot")
+        with mock.patch.object(status_from_ics, "STATUS_SOCKET_BUFFER_BYTES", 4096):
+            for round_ in range(20):
+                self.publisher.publish([{"state": "meeting", "detail": str(round_) * 100000}])
+            received = 0
+            while True:
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                received += len(chunk)
+        self.assertLess(received, 20 * 100000)
+        self.assertFalse(self.publisher.subscribers)
+
+
+@unittest.skipUnless(HAS_DEPS, "requires dateutil and ics")
+class ReplayTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_timezone = status_from_ics.TIMEZONE_NAME
+        status_from_ics.TIMEZONE_NAME = "America/Los_Angeles"
+
+    def tearDown(self):
+        status_from_ics.TIMEZONE_NAME = self.original_timezone
+        self.tmp.cleanup()
+
+    def test_replay_matches_evaluating_every_minute(self):
+        local_tz = status_from_ics.get_local_tz()
+        groups = []
+        for group_index in range(4):
+            cache_path = Path(self.tmp.name) / f"calendar-{group_index}.ics"
+            cache_path.write_text(build_large_feed(30 + group_index * 10, group_index + 1))
+            groups.append(
+                {
+                    "index": group_index,
+                    "display_name": f"Person {group_index}",
+                    "cache_path": str(cache_path),
+                    "override_path": str(Path(self.tmp.name) / "unused.json"),
+                    "work_hours": status_from_ics.build_work_hours_config("08:00", "17:00", "Mon-Fri")
+                    if group_index % 2
+                    else None,
+                }
+            )
+        journal_path = Path(self.tmp.name) / "journal.jsonl"
+        journal_path.write_text(
+            json.dumps(
+                {
+                    "time": "2024-01-01T10:07:00-08:00",
+                    "group": "Person 1",
+                    "override": {"state": "busy", "label": "FOCUS", "until": "2024-01-01T11:00:00-08:00"},
+                }
+            )
+            + "\n"
+            + "not json\n"
+        )
+        journal = status_from_ics.load_override_journal(str(journal_path), groups, local_tz)
+        self.assertEqual(len(journal), 1)
+        start = datetime(2024, 1, 1, tzinfo=local_tz)
+        end = start + timedelta(days=1)
+        real_clock = status_from_ics.CLOCK
+
+        rows = status_from_ics.replay_timeline(groups, start, end, 60, journal)
+
+        self.assertIs(status_from_ics.CLOCK, real_clock)
+        self.assertIn((1, "FOCUS"), [(group, person["label"]) for _, group, person in rows])
+        fields = status_from_ics.REPLAY_FIELDS
+        timeline = {}
+        for ts, group, person in rows:
+            timeline.setdefault(group, []).append((ts, tuple(person.get(field) for field in fields)))
+        indexes = [
+            status_from_ics.build_calendar_index(Path(group["cache_path"]).read_text(), local_tz, start)
+            for group in groups
+        ]
+        replay_groups = [{**group, "override_path": None} for group in groups]
+        for minute in range(0, 24 * 60, 7):
+            moment = start + timedelta(minutes=minute)
+            evaluator = status_from_ics.BatchEvaluator(len(groups))
+            for group_index, index in enumerate(indexes):
+                evaluator.set_index(group_index, index)
+            for ts, group_index, override in journal:
+                if ts <= moment.timestamp():
+                    evaluator.set_override(group_index, override)
+            with mock.patch.object(status_from_ics, "CLOCK", moment.timestamp):
+                expected = evaluator.evaluate(replay_groups, moment)
+            for group_index, person in enumerate(expected):
+                replayed = [key for ts, key in timeline[group_index] if ts <= moment.timestamp()][-1]
+                self.assertEqual(replayed, tuple(person.get(field) for field in fields), f"{group_index} at {moment}")
+
 
 if __name__ == "__main__":
     unittest.main()